@@ -35,28 +35,28 @@ def get_ai_agent():
     # Set up SQL database
     try:
         engine = get_mysql_engine()
-        logger.info(f" --------------- SQLAlchemy engine created: {engine}")
+        logger.info(" --------------- SQLAlchemy engine created: %s", engine)
         # Test engine connection
         with engine.connect() as conn:
             conn.execute(text("SELECT 1"))
         logger.info(" --------------- Engine connection test passed.")
     except Exception as e:
-        logger.error(f" --------------- Engine connection failed: {e}")
+        logger.error(" --------------- Engine connection failed: %s", e)
         raise
     try:
         db = SQLDatabase(engine)
-        logger.info(f" --------------- LangChain SQLDatabase created: {db}")
+        logger.info(" --------------- LangChain SQLDatabase created: %s", db)
         # Test table access
         tables = db.get_usable_table_names()
-        logger.info(f" --------------- Usable tables: {tables}")
+        logger.info(" --------------- Usable tables: %s", tables)
     except Exception as e:
-        logger.error(f" --------------- SQLDatabase setup failed: {e}")
+        logger.error(" --------------- SQLDatabase setup failed: %s", e)
         raise
     try:
         toolkit = SQLDatabaseToolkit(db=db, llm=llm)
-        logger.info(f" --------------- SQLDatabaseToolkit created: {toolkit}")
+        logger.info(" --------------- SQLDatabaseToolkit created: %s", toolkit)
     except Exception as e:
-        logger.error(f" --------------- SQLDatabaseToolkit setup failed: {e}")
+        logger.error(" --------------- SQLDatabaseToolkit setup failed: %s", e)
         raise
 
     # Create the agent
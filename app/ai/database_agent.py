@@ -1,12 +1,14 @@
 from app.ai.agent import get_ai_agent
+import logging
 
-# Create the SQL agent
-agent_executor = get_ai_agent()
-
-print("\n--- LangChain SQL Agent Ready ---")
+logger = logging.getLogger("lms_backend.ai.database_agent")
 
 def run_agent_query():
     try:
+        # Create the SQL agent
+        agent_executor = get_ai_agent()
+        logger.info("LangChain SQL agent ready")
+
         queries = [
             "List all developers and their assigned project roles.",
             "What skills does Jane Smith have and at what proficiency level?",
@@ -15,20 +17,19 @@ def run_agent_query():
         ]
         for i, q in enumerate(queries, 1):
             if not q.strip():
-                print(f"Query {i} is empty, skipping.")
+                logger.warning("Query %s is empty, skipping.", i)
                 continue
-            print(f"\nQuery {i}: {q}")
+            logger.info("Query %s: %s", i, q)
             try:
                 response = agent_executor.invoke(q)
                 # If response is an object with 'content', extract it
                 if hasattr(response, 'content'):
                     response = response.content
-                print(f"Agent Response: {response}")
+                logger.info("Agent response: %s", response)
             except Exception as agent_exc:
-                print(f"Agent error for Query {i}: {agent_exc}")
+                logger.error("Agent error for query %s: %s", i, agent_exc)
     except Exception as e:
-        print(f"\nAn error occurred during agent execution: {e}")
-        print("Check the 'verbose' output above for detailed trace if available.")
+        logger.exception("An error occurred during agent execution: %s", e)
 
 if __name__ == "__main__":
-    run_agent_query()
\ No newline at end of file
+    run_agent_query()
@@ -1,14 +1,12 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
-from app.ai.agent import get_ai_agent
-from app.ai.agent_memory import AgentWithMemory, get_db_schema
 from sqlalchemy import inspect
 from app.core.database import get_mysql_engine
 from app.core.logger import get_logger
-from langchain_google_genai import ChatGoogleGenerativeAI
 import os
-
-from app.ai.database_agent import run_agent_query
+import time
+from app.core.metrics import llm_call_duration_seconds
+from app.core.lazy_resource import LazyResource, ResourceNotReady
 
 router = APIRouter(prefix="/ai", tags=["AI Chat"])
 
@@ -18,50 +16,50 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     answer: str
 
-# Global agent and memory context
-agent_instance = None
-llm_instance = None
-agent_memory_instance = None
 logger = get_logger(__name__)
 
-def setup_agent_and_check_db():
-    global agent_instance, llm_instance, agent_memory_instance
+def _build_agent_with_memory():
+    # LangChain and the Gemini client are imported here, not at module level,
+    # so that they stay off the worker start-up path
+    from app.ai.agent import get_ai_agent
+    from app.ai.agent_memory import AgentWithMemory, get_db_schema
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
     # Set up agent and LLM
-    try:
-        agent_instance = get_ai_agent()
-        llm_instance = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
-            google_api_key=os.getenv("GOOGLE_API_KEY"),
-            temperature=0.2,
-            max_output_tokens=2048
-        )
-        # Check DB access
-        engine = get_mysql_engine()
-        
-        inspector = inspect(engine)
-        tables = inspector.get_table_names()
-        if not tables:
-            logger.warning("No tables found in the database! Continuing without raising exception.")
-        else:
-            logger.info(f"Database tables accessible: {tables}")
-        # Set up memory context
-        db_schema = get_db_schema()
-        agent_memory_instance = AgentWithMemory(agent_instance, llm_instance, db_schema)
-        logger.info("Agent and memory context initialized.")
-    except Exception as e:
-        logger.error(f"Database connection/setup failed: {e}")
-        agent_instance = None
-        llm_instance = None
-        agent_memory_instance = None
+    agent = get_ai_agent()
+    llm = ChatGoogleGenerativeAI(
+        model="gemini-2.0-flash",
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        temperature=0.2,
+        max_output_tokens=2048
+    )
+    # Check DB access
+    engine = get_mysql_engine()
 
-# Call setup on module load
-setup_agent_and_check_db()
+    inspector = inspect(engine)
+    tables = inspector.get_table_names()
+    if not tables:
+        logger.warning("No tables found in the database! Continuing without raising exception.")
+    else:
+        logger.info("Database tables accessible: %s", tables)
+    # Set up memory context
+    db_schema = get_db_schema()
+    agent_memory = AgentWithMemory(agent, llm, db_schema)
+    logger.info("Agent and memory context initialized.")
+    return agent_memory
 
-# run_agent_query()
+# Built by the background warm-up started in app.main, or on first use
+ai_agent = LazyResource("ai_chat", _build_agent_with_memory)
 
 def get_agent_with_memory():
-    global agent_memory_instance
-    return agent_memory_instance
+    try:
+        return ai_agent.get()
+    except ResourceNotReady as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"AI assistant is not available yet ({e.state}).",
+            headers={"Retry-After": "5"},
+        )
 
 @router.post("/chat", response_model=ChatResponse)
 def chat_with_ai(request: ChatRequest):
@@ -69,7 +67,13 @@ def chat_with_ai(request: ChatRequest):
     try:
         if not request.question or not request.question.strip():
             raise HTTPException(status_code=400, detail="Question cannot be empty.")
-        response = agent_mem.run(request.question)
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = agent_mem.run(request.question)
+            outcome = "ok"
+        finally:
+            llm_call_duration_seconds.labels("ai_chat", outcome).observe(time.perf_counter() - start)
         return ChatResponse(answer=response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta, datetime
-from typing import Annotated, Optional
+from typing import Annotated, List, Optional
 import logging
+import uuid
 
 import app.models.models as models
 import app.schemas.schemas as schemas
 import app.crud.crud as crud
 from app.core.database import get_db
 from app.core.config import ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY
+from app.core.reference_data import reference_data
+from app.core.token_revocation import revocation_registry
+from app.services.recommendations import recommend
 from jose import JWTError, jwt
 
 router = APIRouter()
@@ -29,7 +33,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None, r
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     if role:
         to_encode["role"] = role
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
@@ -48,6 +52,8 @@ async def get_current_user(
         sso_id: str = payload.get("sub")
         if sso_id is None:
             raise credentials_exception
+        if revocation_registry.is_revoked(payload.get("jti")):
+            raise credentials_exception
         token_data = schemas.TokenData(username=sso_id)
     except JWTError:
         raise credentials_exception
@@ -94,12 +100,26 @@ async def read_users_me(current_user: Annotated[models.User, Depends(get_current
         user_dict["current_project_role"] = None
     return schemas.UserResponse(**user_dict)
 
+@router.get("/users/me/recommendations", response_model=List[schemas.CourseRecommendation])
+def read_my_recommendations(
+    current_user: Annotated[models.User, Depends(get_current_user)],
+    db: Annotated[Session, Depends(get_db)],
+    limit: int = Query(10, ge=1, le=50),
+):
+    """
+    Courses that close the current user's gaps against their project role's
+    requirements, best first, leaving out courses they already have.
+    """
+    result = recommend(db, reference_data.get(), current_user.current_project_role_id, limit,
+                       models.User.id == current_user.id)
+    return result[0]["recommendations"] if result else []
+
 @router.get("/admin/me/", response_model=schemas.UserResponse)
 async def read_admin_me(current_admin_user: Annotated[models.User, Depends(get_current_admin_user)]):
     return current_admin_user
 
 @router.post("/refresh", response_model=schemas.Token)
-async def refresh_access_token(
+def refresh_access_token(
     token: Annotated[str, Depends(oauth2_scheme)],
     db: Annotated[Session, Depends(get_db)]
 ):
@@ -115,21 +135,49 @@ async def refresh_access_token(
         if sso_id is None:
             logger.warning("No subject in token during refresh.")
             raise credentials_exception
+        jti = payload.get("jti")
+        if revocation_registry.is_revoked(jti):
+            logger.warning("Revoked token presented during refresh.")
+            raise credentials_exception
+        # The role claim is reissued from the user as it is now, so a deleted
+        # or demoted user cannot keep refreshing their old privileges.
         user = crud.get_user_by_sso_id(db, sso_id=sso_id)
         if user is None:
-            logger.warning("User not found during refresh.")
+            logger.warning("Refresh for unknown user: %s", sso_id)
             raise credentials_exception
+        # The presented token is replaced, not duplicated
+        if jti:
+            revocation_registry.revoke(db, jti, sso_id, datetime.utcfromtimestamp(payload["exp"]))
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         new_token = create_access_token({"sub": user.sso_id}, expires_delta=access_token_expires, role=user.role)
-        logger.info(f"Refreshed token for user: {user.sso_id}")
+        logger.info("Refreshed token for user: %s", sso_id)
         return {"access_token": new_token, "token_type": "bearer"}
     except JWTError as e:
-        logger.error(f"JWT error during refresh: {e}")
+        logger.error("JWT error during refresh: %s", e)
         raise credentials_exception
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Unexpected error during token refresh: {e}")
+        logger.error("Unexpected error during token refresh: %s", e)
         raise credentials_exception
 
+@router.post("/logout")
+async def logout(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    current_user: Annotated[models.User, Depends(get_current_user)],
+    db: Annotated[Session, Depends(get_db)]
+):
+    logger.debug("/logout endpoint accessed.")
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    jti = payload.get("jti")
+    if not jti:
+        # Tokens issued before jti was introduced cannot be revoked; they simply expire.
+        logger.warning("Logout with a token without jti for user: %s", current_user.sso_id)
+        return {"message": "Token has no jti and will expire on its own."}
+    revocation_registry.revoke(db, jti, current_user.sso_id, datetime.utcfromtimestamp(payload["exp"]))
+    logger.info("Logged out user: %s", current_user.sso_id)
+    return {"message": "Logged out successfully."}
+
 @router.post("/register", response_model=schemas.UserResponse)
 async def register_user(user: schemas.UserCreate, db: Annotated[Session, Depends(get_db)]):
     existing_user = crud.get_user_by_sso_id(db, sso_id=user.sso_id)
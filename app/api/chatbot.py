@@ -2,14 +2,15 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from typing import Annotated
-from app.core.database import get_db, engine
+from app.core.database import get_db, get_mysql_engine
 from app.api.auth import get_current_user
-from langchain_community.utilities import SQLDatabase
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.agents import create_sql_agent
-from langchain.agents.agent_toolkits import SQLDatabaseToolkit
-from langchain.agents.agent_types import AgentType
 import app.models.models as models
+import logging
+import time
+from app.core.metrics import llm_call_duration_seconds
+from app.core.lazy_resource import LazyResource, ResourceNotReady
+
+logger = logging.getLogger("lms_backend.api.chatbot")
 
 router = APIRouter()
 
@@ -19,9 +20,15 @@ class ChatQuery(BaseModel):
 class ChatResponse(BaseModel):
     answer: str
 
-try:
+def _build_chatbot_agent():
+    from langchain_community.utilities import SQLDatabase
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from langchain.agents import create_sql_agent
+    from langchain.agents.agent_toolkits import SQLDatabaseToolkit
+    from langchain.agents.agent_types import AgentType
+
     db_langchain = SQLDatabase(
-        engine,
+        get_mysql_engine(),
         include_tables=['users', 'skills', 'proficiency_levels', 'project_roles', 'user_skills', 'courses', 'learning_paths', 'user_course_progress'],
         sample_rows_in_table_info=3,
         custom_table_info={
@@ -35,45 +42,50 @@ try:
             "user_course_progress": "Tracks individual user progress in courses (user_id, course_id, status, progress_percentage)."
         }
     )
-    print("LangChain SQLDatabase initialized successfully within FastAPI.")
-except Exception as e:
-    print(f"Error initializing LangChain SQLDatabase in chatbot.py: {e}")
-    db_langchain = None
-
-llm_chatbot = ChatGoogleGenerativeAI(model="gemini-pro", temperature=0)
-
-if db_langchain:
+    llm_chatbot = ChatGoogleGenerativeAI(model="gemini-pro", temperature=0)
     toolkit_chatbot = SQLDatabaseToolkit(db=db_langchain, llm=llm_chatbot)
-    agent_executor_chatbot = create_sql_agent(
+    return create_sql_agent(
         llm=llm_chatbot,
         toolkit=toolkit_chatbot,
         verbose=True,
         agent_type=AgentType.OPENAI_FUNCTIONS,
         handle_parsing_errors=True
     )
-    print("LangChain SQL Agent initialized successfully within FastAPI.")
-else:
-    agent_executor_chatbot = None
-    print("LangChain SQL Agent not initialized due to DB error. Chatbot API may not function.")
 
+# Built by the background warm-up started in app.main, or on first use
+chatbot_agent = LazyResource("chatbot", _build_chatbot_agent)
+
+# A plain def: FastAPI runs it in the threadpool, so building the agent on
+# first use and the blocking agent call never stall the event loop
 @router.post("/query/", response_model=ChatResponse)
-async def query_chatbot(
+def query_chatbot(
     chat_query: ChatQuery,
     current_user: Annotated[models.User, Depends(get_current_user)],
     db: Annotated[Session, Depends(get_db)]
 ):
-    if not agent_executor_chatbot:
+    try:
+        agent_executor_chatbot = chatbot_agent.get()
+    except ResourceNotReady as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Chatbot service is not initialized. Database connection might be down."
+            detail=f"Chatbot service is not initialized ({e.state}). Database connection might be down.",
+            headers={"Retry-After": "5"},
         )
     try:
         if not chat_query.query or not chat_query.query.strip():
             raise HTTPException(status_code=400, detail="Query cannot be empty.")
-        response_text = agent_executor_chatbot.run(chat_query.query)
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response_text = agent_executor_chatbot.run(chat_query.query)
+            outcome = "ok"
+        finally:
+            llm_call_duration_seconds.labels("chatbot", outcome).observe(time.perf_counter() - start)
         return ChatResponse(answer=response_text)
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error during chatbot query processing: {e}")
+        logger.error("Error during chatbot query processing: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to process query: {str(e)}"
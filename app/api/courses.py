@@ -5,8 +5,10 @@ from typing import List
 import app.models.models as models
 import app.schemas.schemas as schemas
 import app.crud.crud as crud
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.schemas.schemas import PaginatedResponse
+from app.core.nplusone import query_budget
+from app.core.cache import user_cache
 
 router = APIRouter(prefix="/courses", tags=["courses"])
 
@@ -22,14 +24,15 @@ def get_courses(
     search: str = Query(None, description="Search by course name or description"),
     sort_by: str = Query("id", description="Sort by field name"),
     sort_order: str = Query("asc", description="Sort order: asc or desc"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     total = crud.count_courses(db, search=search)
     items = crud.get_courses(db, skip=skip, limit=limit, search=search, sort_by=sort_by, sort_order=sort_order)
     return {"total": total, "items": items}
 
 @router.get("/{course_id}", response_model=schemas.CourseResponse)
-def get_course(course_id: int, db: Session = Depends(get_db)):
+@query_budget(3)
+def get_course(course_id: int, db: Session = Depends(get_read_db)):
     db_course = crud.get_course(db, course_id)
     if not db_course:
         raise HTTPException(status_code=404, detail="Course not found")
@@ -40,6 +43,7 @@ def update_course(course_id: int, course: schemas.CourseUpdate, db: Session = De
     db_course = crud.update_course(db, course_id, course)
     if not db_course:
         raise HTTPException(status_code=404, detail="Course not found")
+    user_cache.invalidate()
     return db_course
 
 @router.delete("/{course_id}", response_model=schemas.CourseResponse)
@@ -47,4 +51,5 @@ def delete_course(course_id: int, db: Session = Depends(get_db)):
     db_course = crud.delete_course(db, course_id)
     if not db_course:
         raise HTTPException(status_code=404, detail="Course not found")
+    user_cache.invalidate()
     return db_course
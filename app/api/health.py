@@ -1,7 +1,11 @@
 from fastapi import APIRouter
 from app.core.logger import logger
 from sqlalchemy.exc import OperationalError
-from app.core.database import SessionLocal
+from app.core.database import SessionLocal, replica_router
+from app.core.engines import engine_registry
+from app.core.pool_metrics import get_pool_status
+from app.core.nplusone import query_budget
+from app.core.lazy_resource import lazy_resources
 from sqlalchemy.sql import text
 
 router = APIRouter()
@@ -12,6 +16,7 @@ async def root():
     return {"message": "LMS Backend API is running!"}
 
 @router.get("/db-health", tags=["Health"])
+@query_budget(1)
 def db_health_check():
     logger.debug("/db-health endpoint accessed.")
     try:
@@ -22,13 +27,26 @@ def db_health_check():
         logger.debug("Database health check successful.")
         return {"status": "ok", "message": "Database connection successful."}
     except OperationalError as e:
-        logger.error(f"Database health check failed: {e}")
+        logger.error("Database health check failed: %s", e)
         return {"status": "error", "message": "Database connection failed."}
     except Exception as e:
-        logger.error(f"Unexpected error during DB health check: {e}")
+        logger.error("Unexpected error during DB health check: %s", e)
         return {"status": "error", "message": "Unexpected error during DB health check."}
 
 @router.get("/api-health", tags=["Health"])
 def api_health_check():
     logger.debug("/api-health endpoint accessed.")
     return {"status": "ok", "message": "API is healthy and running."}
+
+@router.get("/db-pool", tags=["Health"])
+def db_pool_status():
+    logger.debug("/db-pool endpoint accessed.")
+    engines = {name: get_pool_status(engine) for name, engine in engine_registry.created().items()}
+    return {"status": "ok", "engines": engines, "replicas": replica_router.status()}
+
+@router.get("/ready", tags=["Health"])
+def readiness():
+    logger.debug("/ready endpoint accessed.")
+    # Core routes serve as soon as the process is up; AI agents report separately
+    resources = {name: resource.status() for name, resource in lazy_resources.items()}
+    return {"status": "ok", "ai_ready": all(r.ready for r in lazy_resources.values()), "resources": resources}
@@ -1,13 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Annotated, List, Optional
+import logging
 import app.models.models as models
 import app.schemas.schemas as schemas
 import app.crud.crud as crud
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.reference_data import ReferenceSnapshot, reference_data
 from app.schemas.schemas import PaginatedResponse
-from app.api.auth import get_current_user
+from app.api.auth import get_current_admin_user, get_current_user
+from app.core.cache import user_cache
+from app.services.learning_paths import generate
+
+logger = logging.getLogger("lms_backend.api.learning_paths")
 
 router = APIRouter(prefix="/learning-paths", tags=["learning-paths"])
 
@@ -23,14 +29,85 @@ def get_learning_paths(
     search: str = Query(None, description="Search by learning path name or description"),
     sort_by: str = Query("id", description="Sort by field name"),
     sort_order: str = Query("asc", description="Sort order: asc or desc"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     total = crud.count_learning_paths(db, search=search)
     lps = crud.get_learning_paths_with_details(db, skip=skip, limit=limit, search=search, sort_by=sort_by, sort_order=sort_order)
     return {"total": total, "items": lps}
 
+def _target_role(db: Session, snapshot: ReferenceSnapshot, project_role_id: Optional[int], user_ids: List[int]) -> int:
+    """
+    ``project_role_id`` if given, otherwise the current project role the
+    users all share.
+    """
+    if project_role_id is None:
+        roles = {role_id for role_id, in db.query(models.User.current_project_role_id)
+                 .filter(models.User.id.in_(user_ids)).distinct()}
+        if len(roles) != 1 or None in roles:
+            raise HTTPException(status_code=400, detail="project_role_id is required unless the users share "
+                                                        "a current project role")
+        project_role_id = roles.pop()
+    if project_role_id not in snapshot.project_roles:
+        raise HTTPException(status_code=404, detail="Project role not found")
+    return project_role_id
+
+@router.get("/generate", response_model=List[schemas.GeneratedLearningPath])
+def preview_generated_learning_paths(
+    db: Annotated[Session, Depends(get_read_db)],
+    current_admin_user: Annotated[models.User, Depends(get_current_admin_user)],
+    user_id: List[int] = Query([], description="Users to plan for; repeat for more. "
+                                               "Defaults to everyone currently in project_role_id"),
+    project_role_id: Optional[int] = Query(None, description="Role whose requirements to cover; "
+                                                             "defaults to the users' shared current role"),
+    cohort: bool = Query(False, description="One path for all the users instead of one per user"),
+):
+    """
+    Course sequences covering each user's gaps against a project role with
+    the fewest course hours (see app.services.learning_paths). Nothing is
+    saved; POST the same users to /learning-paths/generate to persist one.
+    """
+    snapshot = reference_data.get()
+    project_role_id = _target_role(db, snapshot, project_role_id, user_id)
+    criteria = ([models.User.id.in_(user_id)] if user_id
+                else [models.User.current_project_role_id == project_role_id])
+    paths = generate(db, snapshot, project_role_id, *criteria, cohort=cohort)
+    logger.info("Generated %s learning path(s) towards role %s", len(paths), project_role_id)
+    return paths
+
+@router.post("/generate", response_model=schemas.LearningPathResponse)
+def create_generated_learning_path(
+    request: schemas.LearningPathGenerate,
+    db: Annotated[Session, Depends(get_db)],
+    current_admin_user: Annotated[models.User, Depends(get_current_admin_user)],
+):
+    """
+    Generate one path covering the gaps of all ``user_ids`` and save it as a
+    LearningPath with its courses in sequence order, assigned to those users
+    unless ``assign`` is false.
+    """
+    if not request.user_ids:
+        raise HTTPException(status_code=400, detail="user_ids must not be empty")
+    if db.query(models.LearningPath.id).filter(models.LearningPath.name == request.name).first():
+        raise HTTPException(status_code=400, detail="Learning path name already exists")
+    snapshot = reference_data.get()
+    project_role_id = _target_role(db, snapshot, request.project_role_id, request.user_ids)
+    paths = generate(db, snapshot, project_role_id, models.User.id.in_(request.user_ids), cohort=True)
+    if not paths or len(paths[0]["user_ids"]) != len(set(request.user_ids)):
+        raise HTTPException(status_code=404, detail="User not found")
+    path = paths[0]
+    if not path["courses"]:
+        raise HTTPException(status_code=400, detail="No courses to add: the users have no gaps the catalogue can close")
+    assigned = path["user_ids"] if request.assign else []
+    db_lp = crud.create_learning_path_from_sequence(db, request.name, request.description,
+                                                    [course["course_id"] for course in path["courses"]], assigned)
+    for user_id in assigned:
+        user_cache.invalidate(user_id)
+    logger.info("Saved generated learning path %s (%s courses, %s h) for %s user(s)",
+                db_lp["id"], len(path["courses"]), path["total_hours"], len(path["user_ids"]))
+    return db_lp
+
 @router.get("/{learning_path_id}", response_model=schemas.LearningPathResponse)
-def get_learning_path(learning_path_id: int, db: Session = Depends(get_db)):
+def get_learning_path(learning_path_id: int, db: Session = Depends(get_read_db)):
     lp = crud.get_learning_path_with_details(db, learning_path_id)
     if not lp:
         raise HTTPException(status_code=404, detail="Learning path not found")
@@ -41,6 +118,7 @@ def update_learning_path(learning_path_id: int, lp: schemas.LearningPathCreate,
     db_lp = crud.update_learning_path_with_courses(db, learning_path_id, lp)
     if not db_lp:
         raise HTTPException(status_code=404, detail="Learning path not found")
+    user_cache.invalidate()
     return db_lp
 
 @router.delete("/{learning_path_id}", response_model=schemas.LearningPathResponse)
@@ -48,6 +126,7 @@ def delete_learning_path(learning_path_id: int, db: Session = Depends(get_db)):
     db_lp = crud.delete_learning_path(db, learning_path_id)
     if not db_lp:
         raise HTTPException(status_code=404, detail="Learning path not found")
+    user_cache.invalidate()
     return db_lp
 
 @router.post("/{learning_path_id}/register", response_model=schemas.UserLearningPathResponse)
@@ -58,7 +137,7 @@ def register_user_to_learning_path(
 ):
     user_id = current_user.id
     # Check if already registered
-    existing = db.query(models.UserLearningPath).filter_by(user_id=user_id, learning_path_id=learning_path_id).first()
+    existing = crud.get_user_learning_path(db, user_id, learning_path_id)
     if existing:
         raise HTTPException(status_code=400, detail="User already registered to this learning path")
     # Check if learning path exists
@@ -70,6 +149,7 @@ def register_user_to_learning_path(
     db.add(ulp)
     db.commit()
     db.refresh(ulp)
+    user_cache.invalidate(user_id)
     # Return full response
     resp = schemas.UserLearningPathResponse.model_validate(ulp, from_attributes=True)
     resp = resp.model_dump()
@@ -5,13 +5,15 @@ import app.models.models as models
 import app.schemas.schemas as schemas
 import app.crud.crud as crud
 from app.api.auth import get_current_admin_user
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.reference_data import reference_data
+from app.core.cache import user_cache
 
 router = APIRouter(prefix="/admin/proficiency-levels", tags=["admin-proficiency-levels"])
 
 @router.get("/", response_model=List[schemas.ProficiencyLevelResponse])
 async def get_proficiency_levels(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     current_admin_user: Annotated[models.User, Depends(get_current_admin_user)],
     skip: int = 0, limit: int = 100
 ):
@@ -28,7 +30,7 @@ async def create_proficiency_level(
 @router.get("/{proficiency_level_id}", response_model=schemas.ProficiencyLevelResponse)
 async def get_proficiency_level_by_id(
     proficiency_level_id: int,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     current_admin_user: Annotated[models.User, Depends(get_current_admin_user)]
 ):
     db_proficiency = crud.get_proficiency_level(db, proficiency_level_id=proficiency_level_id)
@@ -47,4 +49,6 @@ async def delete_proficiency_level(
         raise HTTPException(status_code=404, detail="Proficiency level not found")
     db.delete(db_proficiency)
     db.commit()
+    reference_data.invalidate()
+    user_cache.invalidate()
     return db_proficiency
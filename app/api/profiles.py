@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response
+from typing import Annotated
+import app.models.models as models
+from app.api.auth import get_current_admin_user
+from app.core.profiling import profile_store
+import logging
+
+logger = logging.getLogger("lms_backend.api.profiles")
+
+router = APIRouter(prefix="/admin/profiles", tags=["admin-profiles"])
+
+@router.get("/")
+async def list_profiles(current_admin_user: Annotated[models.User, Depends(get_current_admin_user)]):
+    logger.debug("Listing stored request profiles.")
+    return {"items": [profile.summary() for profile in profile_store.list()]}
+
+@router.get("/{profile_id}")
+async def get_profile(
+    profile_id: int,
+    current_admin_user: Annotated[models.User, Depends(get_current_admin_user)]
+):
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return {**profile.summary(), "report": profile.report}
+
+@router.get("/{profile_id}/pstats")
+async def download_profile(
+    profile_id: int,
+    current_admin_user: Annotated[models.User, Depends(get_current_admin_user)]
+):
+    """
+    Raw pstats dump, loadable with pstats.Stats, snakeviz or flameprof.
+    """
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return Response(
+        content=profile.raw_stats,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'}
+    )
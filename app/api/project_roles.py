@@ -5,13 +5,19 @@ import app.models.models as models
 import app.schemas.schemas as schemas
 import app.crud.crud as crud
 from app.api.auth import get_current_admin_user
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.reference_data import reference_data
+from app.core.cache import user_cache
+from app.services.staffing import Slot, SlotRequirement, staff
+import logging
+
+logger = logging.getLogger("lms_backend.api.project_roles")
 
 router = APIRouter(prefix="/admin/project-roles", tags=["admin-project-roles"])
 
 @router.get("/", response_model=List[schemas.ProjectRoleResponse])
 async def get_project_roles(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     current_admin_user: Annotated[models.User, Depends(get_current_admin_user)],
     skip: int = 0, limit: int = 100
 ):
@@ -25,10 +31,44 @@ async def create_project_role(
 ):
     return crud.create_project_role(db, role)
 
+@router.post("/staffing", response_model=schemas.StaffingResponse)
+def assign_project_staff(
+    request: schemas.StaffingRequest,
+    db: Annotated[Session, Depends(get_read_db)],
+    current_admin_user: Annotated[models.User, Depends(get_current_admin_user)]
+):
+    """
+    Fill project role slots from a candidate pool with the smallest total
+    skill gap, mandatory requirements first (see app.services.staffing).
+    Nothing is saved.
+    """
+    snapshot = reference_data.get()
+    slots = []
+    for index, slot in enumerate(request.slots):
+        if slot.project_role_id not in snapshot.project_roles:
+            raise HTTPException(status_code=404, detail=f"Project role not found for slot {index}")
+        if slot.requirements is None:
+            requirements = [SlotRequirement(r.skill_id, r.min_proficiency_level_id, r.is_mandatory)
+                            for r in snapshot.requirements_for_role(slot.project_role_id)]
+        else:
+            requirements = [SlotRequirement(r.skill_id, r.min_proficiency_level_id, r.is_mandatory)
+                            for r in slot.requirements]
+        for requirement in requirements:
+            if requirement.skill_id not in snapshot.skills or requirement.min_proficiency_level_id not in snapshot.proficiency_levels:
+                raise HTTPException(status_code=400, detail=f"Unknown skill or proficiency level in slot {index}")
+        slots.append(Slot(slot.project_role_id, slot.headcount, requirements, slot.label))
+    criteria = ([models.User.id.in_(request.candidate_ids)] if request.candidate_ids is not None
+                else [models.User.role != "Admin"])
+    result = staff(db, snapshot, slots, *criteria)
+    logger.info("Staffed %s of %s seats from %s candidates (mandatory gap %s, optional gap %s)",
+                len(result["assignments"]), result["seats"], result["candidates"],
+                result["mandatory_gap"], result["optional_gap"])
+    return result
+
 @router.get("/{role_id}", response_model=schemas.ProjectRoleResponse)
 async def get_project_role_by_id(
     role_id: int,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     current_admin_user: Annotated[models.User, Depends(get_current_admin_user)]
 ):
     db_role = crud.get_project_role(db, role_id=role_id)
@@ -47,4 +87,6 @@ async def delete_project_role(
         raise HTTPException(status_code=404, detail="Project role not found")
     db.delete(db_role)
     db.commit()
+    reference_data.invalidate()
+    user_cache.invalidate()
     return db_role
@@ -0,0 +1,211 @@
+import json
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Annotated, Callable, Iterable, Iterator, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.orm import Session
+import app.models.models as models
+import app.schemas.schemas as schemas
+import app.crud.crud as crud
+from app.api.auth import get_current_admin_user
+from app.core.config import (
+    REPORT_BATCH_SIZE, LAGGING_GRACE_DAYS, LAGGING_COURSE_DAYS, LAGGING_MIN_DAYS, COMPLIANCE_REPORT_REFRESH_SECONDS,
+)
+from app.core.database import ReadSessionLocal, get_db, get_read_db, replica_router
+from app.core.reference_data import reference_data
+from app.core.report_snapshots import report_snapshots
+from app.services.recommendations import recommend
+from app.services.role_swaps import suggest_role_swaps
+import logging
+
+logger = logging.getLogger("lms_backend.api.reports")
+
+router = APIRouter(prefix="/admin/reports", tags=["admin-reports"])
+
+report_snapshots.register("compliance", "compliance_data", crud.get_compliance_by_designation,
+                          COMPLIANCE_REPORT_REFRESH_SECONDS)
+
+
+def stream_report(items_key: str, produce: Callable, batch_size: int = REPORT_BATCH_SIZE,
+                  report_date: Optional[datetime] = None) -> Iterator[str]:
+    """
+    Report JSON ``{"report_date": ..., "<items_key>": [...]}`` written batch by
+    batch, so the whole result set is never held in memory. ``produce(db)``
+    yields the items already JSON-encoded. ``report_date`` defaults to now.
+
+    The session is opened here rather than taken from get_read_db because
+    the body is produced after the endpoint has returned. If the query fails
+    mid-stream the connection is closed and the client gets truncated JSON.
+    """
+    report_date = (report_date or datetime.now(timezone.utc)).isoformat()
+    yield f'{{"report_date": {json.dumps(report_date)}, {json.dumps(items_key)}: ['
+    with ReadSessionLocal(bind=replica_router.get_engine()) as db:
+        items: Iterable[str] = produce(db)
+        separator = ""
+        count = 0
+        try:
+            while batch := list(islice(items, batch_size)):
+                yield separator + ", ".join(batch)
+                separator = ", "
+                count += len(batch)
+        except Exception:
+            logger.exception("Report %s failed after %s items", items_key, count)
+            raise
+    logger.info("Report %s streamed %s items", items_key, count)
+    yield "]}"
+
+
+@router.get(
+    "/skill-gaps",
+    response_class=StreamingResponse,
+    responses={200: {"model": schemas.SkillGapReportResponse, "content": {"application/json": {}}}},
+)
+def get_skill_gap_report(
+    current_admin_user: Annotated[models.User, Depends(get_current_admin_user)],
+    project_role_id: Optional[int] = Query(None, description="Only developers in this project role"),
+    skill_id: Optional[int] = Query(None, description="Only requirements for this skill"),
+    mandatory_only: bool = Query(False, description="Only mandatory requirements"),
+    gaps_only: bool = Query(True, description="Leave out requirements that are already met"),
+):
+    """
+    Required vs. current proficiency for every requirement of each developer's
+    project role, streamed from the materialized skill_gaps table.
+    """
+    logger.debug("Skill gap report: role=%s skill=%s mandatory_only=%s gaps_only=%s",
+                 project_role_id, skill_id, mandatory_only, gaps_only)
+
+    def produce(db):
+        snapshot = reference_data.get()
+        skills, levels, roles = snapshot.skills, snapshot.proficiency_levels, snapshot.project_roles
+        # Rows come ordered by user, and the role/skill/level part of an item
+        # takes few distinct values: encode each developer and each
+        # requirement outcome once, not once per row.
+        tails = {}
+        current_user_id, head = None, ""
+        rows = crud.iter_skill_gaps(db, project_role_id=project_role_id, skill_id=skill_id,
+                                    mandatory_only=mandatory_only, gaps_only=gaps_only)
+        for user_id, first_name, last_name, role_id, requirement_skill_id, required_id, current_id, _, gap in rows:
+            if user_id != current_user_id:
+                current_user_id = user_id
+                head = f'{{"developer_id": {user_id}, "developer_name": {json.dumps(f"{first_name} {last_name}")}, '
+            key = (role_id, requirement_skill_id, required_id, current_id, gap)
+            tail = tails.get(key)
+            if tail is None:
+                role, skill = roles.get(role_id), skills.get(requirement_skill_id)
+                required, current = levels.get(required_id), levels.get(current_id)
+                tail = tails[key] = json.dumps({
+                    "role_name": role.name if role else "",
+                    "required_skill": skill.name if skill else "",
+                    "required_proficiency": required.name if required else "",
+                    "current_proficiency": current.name if current else "None",
+                    "gap_identified": bool(gap),
+                })[1:]
+            yield head + tail
+
+    return StreamingResponse(stream_report("skill_gaps", produce), media_type="application/json")
+
+
+@router.get(
+    "/lagging-progress",
+    response_class=StreamingResponse,
+    responses={200: {"model": schemas.LaggingProgressReportResponse, "content": {"application/json": {}}}},
+)
+def get_lagging_progress_report(
+    current_admin_user: Annotated[models.User, Depends(get_current_admin_user)],
+    learning_path_id: Optional[int] = Query(None, description="Only assignments of this learning path"),
+    min_days_lagging: int = Query(LAGGING_MIN_DAYS, ge=0, description="Days behind schedule before a course is reported"),
+    grace_days: int = Query(LAGGING_GRACE_DAYS, ge=0, description="Days after assignment before the first course is due"),
+    course_days: int = Query(LAGGING_COURSE_DAYS, ge=1, description="Days expected per course of a learning path"),
+):
+    """
+    Courses of assigned learning paths that are behind the expected pace
+    (see crud.iter_lagging_progress for the schedule), with days_lagging computed
+    in the database, streamed in user order.
+    """
+    logger.debug("Lagging progress report: path=%s min_days=%s grace=%s course_days=%s",
+                 learning_path_id, min_days_lagging, grace_days, course_days)
+    report_date = datetime.now(timezone.utc)
+
+    def produce(db):
+        # As in the skill gap report: rows of one assignment share the user
+        # and the date, and courses and statuses repeat, so each is encoded
+        # once.
+        courses, statuses = {}, {}
+        current, head = None, ""
+        rows = crud.iter_lagging_progress(db, report_date.replace(tzinfo=None), learning_path_id=learning_path_id,
+                                          grace_days=grace_days, course_days=course_days,
+                                          min_days_lagging=min_days_lagging)
+        for user_id, first_name, last_name, course_name, percentage, status, assigned_date, days_lagging in rows:
+            if (user_id, assigned_date) != current:
+                current = (user_id, assigned_date)
+                head = (f'{{"user_id": {user_id}, "user_name": {json.dumps(f"{first_name} {last_name}")}, '
+                        f'"assigned_date": {json.dumps(assigned_date.isoformat())}, "course_name": ')
+            course = courses.get(course_name)
+            if course is None:
+                course = courses[course_name] = json.dumps(course_name)
+            status_json = statuses.get(status)
+            if status_json is None:
+                status_json = statuses[status] = json.dumps(status)
+            yield (f'{head}{course}, "progress_percentage": {percentage}, "status": {status_json}, '
+                   f'"days_lagging": {days_lagging}}}')
+
+    return StreamingResponse(stream_report("lagging_individuals", produce, report_date=report_date),
+                             media_type="application/json")
+
+
+@router.get(
+    "/compliance",
+    response_class=Response,
+    responses={200: {"model": schemas.ComplianceReportResponse, "content": {"application/json": {}}}},
+)
+def get_compliance_report(
+    db: Annotated[Session, Depends(get_db)],
+    current_admin_user: Annotated[models.User, Depends(get_current_admin_user)],
+    fresh: bool = Query(False, description="Recompute now instead of serving the latest snapshot"),
+):
+    """
+    Learning path compliance per designation. Served from the snapshot the
+    background refresher keeps (at most COMPLIANCE_REPORT_REFRESH_SECONDS
+    old, see report_date); ``fresh=true`` recomputes and stores a new one.
+    """
+    if fresh:
+        snapshot = report_snapshots.recompute(db, "compliance")
+    else:
+        snapshot = report_snapshots.get(db, "compliance")
+    return Response(content=snapshot.body, media_type="application/json")
+
+
+@router.get("/role-swaps", response_model=List[schemas.RoleSkillSwapSuggestion])
+def get_role_swap_suggestions(
+    db: Annotated[Session, Depends(get_read_db)],
+    current_admin_user: Annotated[models.User, Depends(get_current_admin_user)],
+    limit: int = Query(10, ge=1, le=100),
+):
+    """
+    Pairs of employees in different project roles whose exchange of roles
+    most reduces the combined proficiency gap to the roles' requirements,
+    best first.
+    """
+    return suggest_role_swaps(db, limit)
+
+
+@router.get("/recommendations", response_model=schemas.RoleRecommendationsResponse)
+def get_role_recommendations(
+    db: Annotated[Session, Depends(get_read_db)],
+    current_admin_user: Annotated[models.User, Depends(get_current_admin_user)],
+    project_role_id: int = Query(..., description="Recommend for every user currently in this project role"),
+    limit: int = Query(5, ge=1, le=50, description="Courses per user"),
+):
+    """
+    Ranked course recommendations for every user in a project role,
+    computed in one pass over the role (see app.services.recommendations).
+    """
+    snapshot = reference_data.get()
+    role = snapshot.project_roles.get(project_role_id)
+    if role is None:
+        raise HTTPException(status_code=404, detail="Project role not found")
+    users = recommend(db, snapshot, project_role_id, limit)
+    logger.info("Recommendations for role %s: %s users", project_role_id, len(users))
+    return {"project_role_id": project_role_id, "project_role_name": role.name, "users": users}
@@ -5,13 +5,14 @@ import app.models.models as models
 import app.schemas.schemas as schemas
 import app.crud.crud as crud
 from app.api.auth import get_current_admin_user
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.reference_data import reference_data
 
 router = APIRouter(prefix="/admin/role-skill-requirements", tags=["admin-role-skill-requirements"])
 
 @router.get("/", response_model=List[schemas.RoleSkillRequirementResponse])
 async def get_role_skill_requirements(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     current_admin_user: Annotated[models.User, Depends(get_current_admin_user)],
     skip: int = 0, limit: int = 100
 ):
@@ -28,7 +29,7 @@ async def create_role_skill_requirement(
 @router.get("/{req_id}", response_model=schemas.RoleSkillRequirementResponse)
 async def get_role_skill_requirement_by_id(
     req_id: int,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     current_admin_user: Annotated[models.User, Depends(get_current_admin_user)]
 ):
     db_req = crud.get_role_skill_requirement(db, req_id=req_id)
@@ -47,4 +48,5 @@ async def delete_role_skill_requirement(
         raise HTTPException(status_code=404, detail="Role skill requirement not found")
     db.delete(db_req)
     db.commit()
+    reference_data.invalidate()
     return db_req
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api import ai, auth, courses, health, learning_paths, proficiency_levels, project_roles, role_skill_requirements, skills, users, userupload, chatbot
+from app.api import ai, auth, courses, health, learning_paths, metrics, profiles, proficiency_levels, project_roles, reports, role_skill_requirements, skills, users, userupload, chatbot
 
 router = APIRouter()
 
@@ -7,6 +7,8 @@ router = APIRouter()
 router.include_router(ai.router)
 router.include_router(auth.router)
 router.include_router(health.router)
+router.include_router(metrics.router)
+router.include_router(profiles.router)
 router.include_router(courses.router)
 router.include_router(learning_paths.router)
 router.include_router(users.router)
@@ -15,5 +17,6 @@ router.include_router(proficiency_levels.router)
 router.include_router(project_roles.router)
 router.include_router(role_skill_requirements.router)
 router.include_router(userupload.router)
+router.include_router(reports.router)
 router.include_router(chatbot.router)
 
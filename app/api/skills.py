@@ -1,11 +1,15 @@
+import time
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List, Annotated
+from typing import List, Annotated, Optional
 import app.models.models as models
 import app.schemas.schemas as schemas
 import app.crud.crud as crud
 from app.api.auth import get_current_admin_user
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.reference_data import reference_data, ReferenceSnapshot
+from app.core.cache import user_cache
+from app.core.skill_matrix import skill_matrix
 import logging
 from fastapi.responses import JSONResponse
 from app.schemas.schemas import PaginatedResponse
@@ -16,17 +20,17 @@ router = APIRouter(prefix="/admin/skills", tags=["admin-skills"])
 
 @router.get("/", response_model=List[schemas.SkillResponse])
 async def get_skills(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     current_admin_user: Annotated[models.User, Depends(get_current_admin_user)],
     skip: int = 0, limit: int = 100
 ):
-    logger.debug(f"Fetching skills with skip={skip}, limit={limit}")
+    logger.debug("Fetching skills with skip=%s, limit=%s", skip, limit)
     try:
         skills = crud.get_skills(db, skip=skip, limit=limit)
-        logger.info(f"Fetched {len(skills)} skills.")
+        logger.info("Fetched %s skills.", len(skills))
         return skills
     except Exception as e:
-        logger.error(f"Error fetching skills: {e}")
+        logger.error("Error fetching skills: %s", e)
         raise
 
 @router.get("/", response_model=PaginatedResponse[schemas.SkillResponse])
@@ -36,7 +40,7 @@ def get_skills(
     search: str = Query(None, description="Search by skill name or description"),
     sort_by: str = Query("id", description="Sort by field name"),
     sort_order: str = Query("asc", description="Sort order: asc or desc"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     total = crud.count_skills(db, search=search)
     items = crud.get_skills(db, skip=skip, limit=limit, search=search, sort_by=sort_by, sort_order=sort_order)
@@ -48,27 +52,89 @@ async def create_skill(
     db: Annotated[Session, Depends(get_db)],
     current_admin_user: Annotated[models.User, Depends(get_current_admin_user)]
 ):
-    logger.debug(f"Creating skill: {skill.name}")
+    logger.debug("Creating skill: %s", skill.name)
     try:
         created_skill = crud.create_skill(db, skill)
-        logger.info(f"Skill created: {created_skill.name}")
+        logger.info("Skill created: %s", created_skill.name)
         return created_skill
     except Exception as e:
-        logger.error(f"Error creating skill: {e}")
+        logger.error("Error creating skill: %s", e)
         raise
 
+def _parse_condition(condition: str, snapshot: ReferenceSnapshot):
+    """
+    ``<skill>:<minimum level>``, each given by name or id.
+    """
+    skill_part, _, level_part = condition.rpartition(":")
+    skill = (snapshot.skills.get(int(skill_part)) if skill_part.strip().isdigit()
+             else snapshot.skills_by_name.get(skill_part.strip()))
+    level = (snapshot.proficiency_levels.get(int(level_part)) if level_part.strip().isdigit()
+             else snapshot.proficiency_levels_by_name.get(level_part.strip()))
+    if not skill_part or skill is None or level is None:
+        raise HTTPException(status_code=400, detail=f"Unknown skill or proficiency level in {condition!r}; "
+                                                    "expected <skill>:<minimum level>")
+    return skill, level
+
+@router.get("/search", response_model=schemas.SkillSearchResponse)
+def search_users_by_skills(
+    db: Annotated[Session, Depends(get_read_db)],
+    current_admin_user: Annotated[models.User, Depends(get_current_admin_user)],
+    skill: List[str] = Query(..., description="<skill>:<minimum level> by name or id, e.g. SQL:Proficient; "
+                                              "repeat for more skills (all must hold)"),
+    project_role_id: Optional[int] = Query(None, description="Only users currently in this project role"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """
+    Users meeting every skill threshold, answered from the in-memory skill
+    matrix (app.core.skill_matrix) rather than the database.
+    """
+    snapshot = reference_data.get()
+    conditions = [_parse_condition(condition, snapshot) for condition in skill]
+    start = time.perf_counter()
+    result = skill_matrix.search([(s.id, level.id) for s, level in conditions], project_role_id,
+                                 offset=skip, limit=limit)
+    elapsed = (time.perf_counter() - start) * 1e6
+    logger.debug("Skill search %s role=%s: %s match(es) in %.0f us", skill, project_role_id, result.total, elapsed)
+
+    users = {user.id: user for user in db.query(models.User).filter(models.User.id.in_(result.user_ids.tolist()))}
+    items = []
+    for user_id, role_id, levels in zip(result.user_ids.tolist(), result.roles.tolist(), result.levels.tolist()):
+        user = users.get(user_id)
+        if user is None:
+            continue
+        role = snapshot.project_roles.get(role_id)
+        items.append({
+            "user_id": user_id, "first_name": user.first_name, "last_name": user.last_name, "email": user.email,
+            "current_project_role": role.name if role else None,
+            "skills": [
+                {"skill_id": s.id, "skill_name": s.name, "proficiency_level_id": level_id,
+                 "proficiency_level_name": getattr(snapshot.proficiency_levels.get(level_id), "name", None)}
+                for (s, _), level_id in zip(conditions, levels)
+            ],
+        })
+    stats = skill_matrix.stats()
+    return {
+        "total": result.total,
+        "conditions": [{"skill_id": s.id, "skill_name": s.name, "proficiency_level_id": level.id,
+                        "proficiency_level_name": level.name} for s, level in conditions],
+        "items": items,
+        "search_microseconds": round(elapsed, 1),
+        "matrix": {"users": stats["users"], "skills": stats["skills"], "memory_bytes": stats["memory_bytes"]},
+    }
+
 @router.get("/{skill_id}", response_model=schemas.SkillResponse)
 async def get_skill_by_id(
     skill_id: int,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     current_admin_user: Annotated[models.User, Depends(get_current_admin_user)]
 ):
-    logger.debug(f"Fetching skill by ID: {skill_id}")
+    logger.debug("Fetching skill by ID: %s", skill_id)
     db_skill = crud.get_skill(db, skill_id=skill_id)
     if not db_skill:
-        logger.warning(f"Skill not found: {skill_id}")
+        logger.warning("Skill not found: %s", skill_id)
         raise HTTPException(status_code=404, detail="Skill not found")
-    logger.info(f"Skill found: {db_skill.name}")
+    logger.info("Skill found: %s", db_skill.name)
     return db_skill
 
 @router.delete("/{skill_id}", response_model=schemas.SkillResponse)
@@ -77,16 +143,18 @@ async def delete_skill(
     db: Annotated[Session, Depends(get_db)],
     current_admin_user: Annotated[models.User, Depends(get_current_admin_user)]
 ):
-    logger.debug(f"Deleting skill ID: {skill_id}")
+    logger.debug("Deleting skill ID: %s", skill_id)
     db_skill = crud.get_skill(db, skill_id=skill_id)
     if not db_skill:
-        logger.warning(f"Skill not found for deletion: {skill_id}")
+        logger.warning("Skill not found for deletion: %s", skill_id)
         raise HTTPException(status_code=404, detail="Skill not found")
     try:
         db.delete(db_skill)
         db.commit()
-        logger.info(f"Skill deleted: {db_skill.name}")
+        reference_data.invalidate()
+        user_cache.invalidate()
+        logger.info("Skill deleted: %s", db_skill.name)
         return db_skill
     except Exception as e:
-        logger.error(f"Error deleting skill: {e}")
+        logger.error("Error deleting skill: %s", e)
         raise
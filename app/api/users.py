@@ -1,12 +1,16 @@
+import time
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from typing import List, Annotated
+from typing import List, Annotated, Optional
 import app.models.models as models
 import app.schemas.schemas as schemas
 import app.crud.crud as crud
 from app.api.auth import get_current_admin_user
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.reference_data import reference_data, ReferenceSnapshot
+from app.core.cache import user_cache
+from app.core.skill_matrix import skill_matrix
 from app.schemas.schemas import PaginatedResponse
 import logging
 
@@ -14,9 +18,48 @@ logger = logging.getLogger("lms_backend.api.users")
 
 router = APIRouter(prefix="/admin/users", tags=["admin-users"])
 
+def _user_skill_display(us, snapshot: ReferenceSnapshot) -> dict:
+    skill = snapshot.skills.get(us.skill_id)
+    proficiency_level = snapshot.proficiency_levels.get(us.proficiency_level_id)
+    return {
+        "id": us.id,
+        "user_id": us.user_id,
+        "skill_id": us.skill_id,
+        "skill_name": skill.name if skill else None,
+        "proficiency_level_id": us.proficiency_level_id,
+        "proficiency_level_name": proficiency_level.name if proficiency_level else None
+    }
+
+def _serialize_user(user, snapshot: ReferenceSnapshot) -> dict:
+    """
+    User with role, skills, learning paths and course progress. Role, skill
+    and proficiency names come from the reference data snapshot instead of
+    a lazy load per row.
+    """
+    user_dict = user.__dict__.copy()
+    project_role = snapshot.project_roles.get(user.current_project_role_id)
+    user_dict["current_project_role"] = schemas.ProjectRoleResponse.model_validate(project_role, from_attributes=True) if project_role else None
+    # User skills with custom schema (UserSkillDisplay)
+    user_dict["user_skills"] = [_user_skill_display(us, snapshot) for us in user.user_skills]
+    # Assigned learning paths (fully serialize)
+    user_dict["user_learning_paths"] = []
+    for ulp in user.user_learning_paths:
+        lp_dict = schemas.UserLearningPathResponse.model_validate(ulp, from_attributes=True).model_dump()
+        if ulp.learning_path:
+            lp_dict["learning_path"] = schemas.LearningPathResponse.model_validate(ulp.learning_path, from_attributes=True).model_dump()
+        user_dict["user_learning_paths"].append(lp_dict)
+    # Learning progress (fully serialize)
+    user_dict["user_course_progress"] = []
+    for ucp in user.user_course_progress:
+        cp_dict = schemas.UserCourseProgressResponse.model_validate(ucp, from_attributes=True).model_dump()
+        if ucp.course:
+            cp_dict["course"] = schemas.CourseResponse.model_validate(ucp.course, from_attributes=True).model_dump()
+        user_dict["user_course_progress"].append(cp_dict)
+    return user_dict
+
 @router.get("/", response_model=PaginatedResponse[schemas.UserResponse])
 async def read_all_users(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     current_admin_user: Annotated[models.User, Depends(get_current_admin_user)],
     skip: int = 0,
     limit: int = 100,
@@ -28,49 +71,15 @@ async def read_all_users(
     try:
         total = crud.count_users(db, search=search)
         users = crud.get_users(db, skip=skip, limit=limit, search=search, sort_by=sort_by, sort_order=sort_order)
+        snapshot = reference_data.get()
         user_list = []
         for user in users:
-            user_dict = user.__dict__.copy()
-            # Project role
-            if getattr(user, "project_role", None):
-                user_dict["current_project_role"] = schemas.ProjectRoleResponse.model_validate(user.project_role, from_attributes=True)
-            else:
-                user_dict["current_project_role"] = None
-            # User skills with custom schema (UserSkillDisplay)
-            user_dict["user_skills"] = []
-            for us in getattr(user, "user_skills", []):
-                skill_id = us.skill_id
-                skill_name = us.skill.name if us.skill else None
-                proficiency_level_id = us.proficiency_level.id if us.proficiency_level else None
-                proficiency_level_name = us.proficiency_level.name if us.proficiency_level else None
-                user_dict["user_skills"].append({
-                    "id": us.id,
-                    "skill_id": skill_id,
-                    "skill_name": skill_name,
-                    "proficiency_level_id": proficiency_level_id,
-                    "proficiency_level_name": proficiency_level_name
-                })
-            # Assigned learning paths (fully serialize)
-            user_dict["user_learning_paths"] = []
-            for ulp in getattr(user, "user_learning_paths", []):
-                lp_dict = schemas.UserLearningPathResponse.model_validate(ulp, from_attributes=True).model_dump()
-                # Eagerly serialize nested learning_path if present
-                if hasattr(ulp, "learning_path") and ulp.learning_path:
-                    lp_dict["learning_path"] = schemas.LearningPathResponse.model_validate(ulp.learning_path, from_attributes=True).model_dump()
-                user_dict["user_learning_paths"].append(lp_dict)
-            # Learning progress (fully serialize)
-            user_dict["user_course_progress"] = []
-            for ucp in getattr(user, "user_course_progress", []):
-                cp_dict = schemas.UserCourseProgressResponse.model_validate(ucp, from_attributes=True).model_dump()
-                # Eagerly serialize nested course if present
-                if hasattr(ucp, "course") and ucp.course:
-                    cp_dict["course"] = schemas.CourseResponse.model_validate(ucp.course, from_attributes=True).model_dump()
-                user_dict["user_course_progress"].append(cp_dict)
+            user_dict = _serialize_user(user, snapshot)
             user_list.append(user_dict)
-        logger.info(f"Fetched {len(user_list)} users with cascading details.")
+        logger.info("Fetched %s users with cascading details.", len(user_list))
         return {"total": total, "items": user_list}
     except Exception as e:
-        logger.error(f"Error fetching users: {e}")
+        logger.error("Error fetching users: %s", e)
         raise
 
 @router.post("/", response_model=schemas.UserResponse)
@@ -79,17 +88,17 @@ async def create_new_user(
     db: Annotated[Session, Depends(get_db)],
     current_admin_user: Annotated[models.User, Depends(get_current_admin_user)]
 ):
-    logger.debug(f"Creating new user with SSO ID: {user.sso_id}")
+    logger.debug("Creating new user with SSO ID: %s", user.sso_id)
     db_user = crud.get_user_by_sso_id(db, sso_id=user.sso_id)
     if db_user:
-        logger.warning(f"Attempt to create user with existing SSO ID: {user.sso_id}")
+        logger.warning("Attempt to create user with existing SSO ID: %s", user.sso_id)
         raise HTTPException(status_code=400, detail="SSO ID already registered")
     try:
         created_user = crud.create_user(db=db, user=user)
-        logger.info(f"User created: {created_user.email}")
+        logger.info("User created: %s", created_user.email)
         return created_user
     except Exception as e:
-        logger.error(f"Error creating user: {e}")
+        logger.error("Error creating user: %s", e)
         raise
 
 @router.get("/{user_id}", response_model=schemas.UserResponse)
@@ -98,44 +107,22 @@ async def get_user_by_id(
     db: Annotated[Session, Depends(get_db)],
     current_admin_user: Annotated[models.User, Depends(get_current_admin_user)]
 ):
-    logger.debug(f"Fetching user by ID: {user_id}")
-    db_user = crud.get_user(db, user_id=user_id)
-    if db_user is None:
-        logger.warning(f"User not found: {user_id}")
+    logger.debug("Fetching user by ID: %s", user_id)
+
+    # From the primary, not a replica: whatever is loaded here is served for
+    # the cache TTL, and a lagging replica would cache a pre-write copy right
+    # after the write invalidated the entry.
+    def load():
+        db_user = crud.get_user(db, user_id=user_id)
+        if db_user is None:
+            return None
+        return schemas.UserResponse.model_validate(_serialize_user(db_user, reference_data.get())).model_dump()
+
+    user_dict = user_cache.get_or_load(user_id, load)
+    if user_dict is None:
+        logger.warning("User not found: %s", user_id)
         raise HTTPException(status_code=404, detail="User not found")
-    # Serialize user as in list endpoint
-    user = db_user
-    user_dict = user.__dict__.copy()
-    if getattr(user, "project_role", None):
-        user_dict["current_project_role"] = schemas.ProjectRoleResponse.model_validate(user.project_role, from_attributes=True)
-    else:
-        user_dict["current_project_role"] = None
-    user_dict["user_skills"] = []
-    for us in getattr(user, "user_skills", []):
-        skill_id = us.skill_id
-        skill_name = us.skill.name if us.skill else None
-        proficiency_level_id = us.proficiency_level.id if us.proficiency_level else None
-        proficiency_level_name = us.proficiency_level.name if us.proficiency_level else None
-        user_dict["user_skills"].append({
-            "id": us.id,
-            "skill_id": skill_id,
-            "skill_name": skill_name,
-            "proficiency_level_id": proficiency_level_id,
-            "proficiency_level_name": proficiency_level_name
-        })
-    user_dict["user_learning_paths"] = []
-    for ulp in getattr(user, "user_learning_paths", []):
-        lp_dict = schemas.UserLearningPathResponse.model_validate(ulp, from_attributes=True).model_dump()
-        if hasattr(ulp, "learning_path") and ulp.learning_path:
-            lp_dict["learning_path"] = schemas.LearningPathResponse.model_validate(ulp.learning_path, from_attributes=True).model_dump()
-        user_dict["user_learning_paths"].append(lp_dict)
-    user_dict["user_course_progress"] = []
-    for ucp in getattr(user, "user_course_progress", []):
-        cp_dict = schemas.UserCourseProgressResponse.model_validate(ucp, from_attributes=True).model_dump()
-        if hasattr(ucp, "course") and ucp.course:
-            cp_dict["course"] = schemas.CourseResponse.model_validate(ucp.course, from_attributes=True).model_dump()
-        user_dict["user_course_progress"].append(cp_dict)
-    logger.info(f"User found: {user.email}")
+    logger.info("User found: %s", user_dict["email"])
     return user_dict
 
 @router.put("/{user_id}", response_model=schemas.UserResponse)
@@ -145,49 +132,20 @@ async def update_existing_user(
     db: Annotated[Session, Depends(get_db)],
     current_admin_user: Annotated[models.User, Depends(get_current_admin_user)]
 ):
-    logger.debug(f"Updating user ID {user_id}")
+    logger.debug("Updating user ID %s", user_id)
     db_user = crud.get_user(db, user_id=user_id)
     if db_user is None:
-        logger.warning(f"User not found for update: {user_id}")
+        logger.warning("User not found for update: %s", user_id)
         raise HTTPException(status_code=404, detail="User not found")
     try:
         updated_user = crud.update_user(db=db, user_id=user_id, user=user_update)
-        # Serialize user as in list endpoint
+        user_cache.invalidate(user_id)
         user = updated_user
-        user_dict = user.__dict__.copy()
-        if getattr(user, "project_role", None):
-            user_dict["current_project_role"] = schemas.ProjectRoleResponse.model_validate(user.project_role, from_attributes=True)
-        else:
-            user_dict["current_project_role"] = None
-        user_dict["user_skills"] = []
-        for us in getattr(user, "user_skills", []):
-            skill_id = us.skill_id
-            skill_name = us.skill.name if us.skill else None
-            proficiency_level_id = us.proficiency_level.id if us.proficiency_level else None
-            proficiency_level_name = us.proficiency_level.name if us.proficiency_level else None
-            user_dict["user_skills"].append({
-                "id": us.id,
-                "skill_id": skill_id,
-                "skill_name": skill_name,
-                "proficiency_level_id": proficiency_level_id,
-                "proficiency_level_name": proficiency_level_name
-            })
-        user_dict["user_learning_paths"] = []
-        for ulp in getattr(user, "user_learning_paths", []):
-            lp_dict = schemas.UserLearningPathResponse.model_validate(ulp, from_attributes=True).model_dump()
-            if hasattr(ulp, "learning_path") and ulp.learning_path:
-                lp_dict["learning_path"] = schemas.LearningPathResponse.model_validate(ulp.learning_path, from_attributes=True).model_dump()
-            user_dict["user_learning_paths"].append(lp_dict)
-        user_dict["user_course_progress"] = []
-        for ucp in getattr(user, "user_course_progress", []):
-            cp_dict = schemas.UserCourseProgressResponse.model_validate(ucp, from_attributes=True).model_dump()
-            if hasattr(ucp, "course") and ucp.course:
-                cp_dict["course"] = schemas.CourseResponse.model_validate(ucp.course, from_attributes=True).model_dump()
-            user_dict["user_course_progress"].append(cp_dict)
-        logger.info(f"User updated: {user.email}")
+        user_dict = _serialize_user(user, reference_data.get())
+        logger.info("User updated: %s", user.email)
         return user_dict
     except Exception as e:
-        logger.error(f"Error updating user: {e}")
+        logger.error("Error updating user: %s", e)
         raise
 
 @router.delete("/{user_id}", response_model=schemas.UserResponse)
@@ -196,48 +154,62 @@ async def delete_user(
     db: Annotated[Session, Depends(get_db)],
     current_admin_user: Annotated[models.User, Depends(get_current_admin_user)]
 ):
-    logger.debug(f"Deleting user ID {user_id}")
+    logger.debug("Deleting user ID %s", user_id)
     # Fetch and serialize user before deletion
     db_user = crud.get_user(db, user_id=user_id)
     if db_user is None:
-        logger.warning(f"User not found for deletion: {user_id}")
+        logger.warning("User not found for deletion: %s", user_id)
         raise HTTPException(status_code=404, detail="User not found")
     user = db_user
-    user_dict = user.__dict__.copy()
-    if getattr(user, "project_role", None):
-        user_dict["current_project_role"] = schemas.ProjectRoleResponse.model_validate(user.project_role, from_attributes=True)
-    else:
-        user_dict["current_project_role"] = None
-    user_dict["user_skills"] = []
-    for us in getattr(user, "user_skills", []):
-        skill_id = us.skill_id
-        skill_name = us.skill.name if us.skill else None
-        proficiency_level_id = us.proficiency_level.id if us.proficiency_level else None
-        proficiency_level_name = us.proficiency_level.name if us.proficiency_level else None
-        user_dict["user_skills"].append({
-            "id": us.id,
-            "skill_id": skill_id,
-            "skill_name": skill_name,
-            "proficiency_level_id": proficiency_level_id,
-            "proficiency_level_name": proficiency_level_name
-        })
-    user_dict["user_learning_paths"] = []
-    for ulp in getattr(user, "user_learning_paths", []):
-        lp_dict = schemas.UserLearningPathResponse.model_validate(ulp, from_attributes=True).model_dump()
-        if hasattr(ulp, "learning_path") and ulp.learning_path:
-            lp_dict["learning_path"] = schemas.LearningPathResponse.model_validate(ulp.learning_path, from_attributes=True).model_dump()
-        user_dict["user_learning_paths"].append(lp_dict)
-    user_dict["user_course_progress"] = []
-    for ucp in getattr(user, "user_course_progress", []):
-        cp_dict = schemas.UserCourseProgressResponse.model_validate(ucp, from_attributes=True).model_dump()
-        if hasattr(ucp, "course") and ucp.course:
-            cp_dict["course"] = schemas.CourseResponse.model_validate(ucp.course, from_attributes=True).model_dump()
-        user_dict["user_course_progress"].append(cp_dict)
+    user_dict = _serialize_user(user, reference_data.get())
     # Now delete the user
     crud.delete_user(db, user_id=user_id)
-    logger.info(f"User deleted: {user.email}")
+    user_cache.invalidate(user_id)
+    logger.info("User deleted: %s", user.email)
     return user_dict
 
+@router.get("/{user_id}/similar", response_model=schemas.SimilarUsersResponse)
+def get_similar_users(
+    user_id: int,
+    db: Annotated[Session, Depends(get_read_db)],
+    current_admin_user: Annotated[models.User, Depends(get_current_admin_user)],
+    limit: int = Query(10, ge=1, le=100),
+    project_role_id: Optional[int] = Query(None, description="Only users currently in this project role"),
+):
+    """
+    Users whose skill profile is closest to this user's (cosine similarity
+    of proficiency levels), e.g. to backfill their role. Each match lists
+    its levels in this user's skills.
+    """
+    start = time.perf_counter()
+    result = skill_matrix.similar(user_id, limit, project_role_id)
+    elapsed = (time.perf_counter() - start) * 1e6
+    if result is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    logger.debug("Similar users for %s: %s match(es) in %.0f us", user_id, len(result.user_ids), elapsed)
+
+    snapshot = reference_data.get()
+    users = {user.id: user for user in db.query(models.User).filter(models.User.id.in_(result.user_ids.tolist()))}
+    items = []
+    for match_id, role_id, similarity, levels in zip(result.user_ids.tolist(), result.roles.tolist(),
+                                                     result.similarity.tolist(), result.shared.tolist()):
+        user = users.get(match_id)
+        if user is None:
+            continue
+        role = snapshot.project_roles.get(role_id)
+        items.append({
+            "user_id": match_id, "first_name": user.first_name, "last_name": user.last_name, "email": user.email,
+            "current_project_role": role.name if role else None,
+            "similarity": round(similarity, 4),
+            "skills": [
+                {"skill_id": skill_id, "skill_name": getattr(snapshot.skills.get(skill_id), "name", str(skill_id)),
+                 "proficiency_level_id": level_id,
+                 "proficiency_level_name": getattr(snapshot.proficiency_levels.get(level_id), "name", None)}
+                for skill_id, level_id in zip(result.skill_ids.tolist(), levels)
+            ],
+        })
+    return {"user_id": user_id, "items": items, "search_microseconds": round(elapsed, 1)}
+
 @router.post("/{user_id}/skills", response_model=schemas.UserSkillResponse)
 async def add_user_skill(
     user_id: int,
@@ -245,48 +217,39 @@ async def add_user_skill(
     db: Annotated[Session, Depends(get_db)],
     current_admin_user: Annotated[models.User, Depends(get_current_admin_user)]
 ):
-    logger.debug(f"Adding skill to user ID {user_id}: {user_skill.skill_id}")
+    logger.debug("Adding skill to user ID %s: %s", user_id, user_skill.skill_id)
     db_user = crud.get_user(db, user_id=user_id)
     if not db_user:
-        logger.warning(f"User not found for skill addition: {user_id}")
+        logger.warning("User not found for skill addition: %s", user_id)
         raise HTTPException(status_code=404, detail="User not found")
-    db_skill = crud.get_skill(db, skill_id=user_skill.skill_id)
+    snapshot = reference_data.get()
+    db_skill = snapshot.skills.get(user_skill.skill_id)
     if not db_skill:
-        logger.warning(f"Skill not found: {user_skill.skill_id}")
+        logger.warning("Skill not found: %s", user_skill.skill_id)
         raise HTTPException(status_code=404, detail="Skill not found")
-    db_proficiency = crud.get_proficiency_level(db, proficiency_level_id=user_skill.proficiency_level_id)
+    db_proficiency = snapshot.proficiency_levels.get(user_skill.proficiency_level_id)
     if not db_proficiency:
-        logger.warning(f"Proficiency level not found: {user_skill.proficiency_level_id}")
+        logger.warning("Proficiency level not found: %s", user_skill.proficiency_level_id)
         raise HTTPException(status_code=404, detail="Proficiency level not found")
     existing_user_skill = db.query(models.UserSkill).filter(
         models.UserSkill.user_id == user_id,
         models.UserSkill.skill_id == user_skill.skill_id
     ).first()
     if existing_user_skill:
-        logger.info(f"Updating existing skill for user ID {user_id}: {user_skill.skill_id}")
+        logger.info("Updating existing skill for user ID %s: %s", user_id, user_skill.skill_id)
         existing_user_skill.proficiency_level_id = user_skill.proficiency_level_id
         db.add(existing_user_skill)
         db.commit()
         db.refresh(existing_user_skill)
+        user_cache.invalidate(user_id)
         # Serialize response
-        return {
-            "id": existing_user_skill.id,
-            "skill_id": existing_user_skill.skill_id,
-            "skill_name": existing_user_skill.skill.name if existing_user_skill.skill else None,
-            "proficiency_level_id": existing_user_skill.proficiency_level_id,
-            "proficiency_level_name": existing_user_skill.proficiency_level.name if existing_user_skill.proficiency_level else None
-        }
+        return _user_skill_display(existing_user_skill, snapshot)
     else:
-        logger.info(f"Adding new skill for user ID {user_id}: {user_skill.skill_id}")
+        logger.info("Adding new skill for user ID %s: %s", user_id, user_skill.skill_id)
         new_user_skill = models.UserSkill(**user_skill.dict())
         db.add(new_user_skill)
         db.commit()
         db.refresh(new_user_skill)
+        user_cache.invalidate(user_id)
         # Serialize response
-        return {
-            "id": new_user_skill.id,
-            "skill_id": new_user_skill.skill_id,
-            "skill_name": new_user_skill.skill.name if new_user_skill.skill else None,
-            "proficiency_level_id": new_user_skill.proficiency_level_id,
-            "proficiency_level_name": new_user_skill.proficiency_level.name if new_user_skill.proficiency_level else None
-        }
+        return _user_skill_display(new_user_skill, snapshot)
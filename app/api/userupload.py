@@ -3,24 +3,37 @@ from fastapi.responses import JSONResponse
 import logging
 import tempfile
 import shutil
+import time
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.services.developer_processing import process_employees_excel_and_insert
+from app.core.cache import user_cache
+from app.core.metrics import upload_jobs_total, upload_rows_total, upload_job_duration_seconds
 
 router = APIRouter(prefix="/admin/userupload", tags=["admin-userupload"])
 
 @router.post("/")
 def upload_users(file: UploadFile = File(...), db: Session = Depends(get_db)):
     logger = logging.getLogger("uvicorn.error")
+    start = time.perf_counter()
     try:
         with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp:
             shutil.copyfileobj(file.file, tmp)
             tmp_path = tmp.name
         summary = process_employees_excel_and_insert(tmp_path, db)
         if isinstance(summary, dict) and summary.get("error"):
-            logger.error(f"Excel processing error: {summary['error']}")
+            logger.error("Excel processing error: %s", summary['error'])
+            upload_jobs_total.labels("rejected").inc()
             return JSONResponse(status_code=400, content={"error": summary["error"]})
+        # Roles and skills of many users may have changed
+        user_cache.invalidate()
+        for result in ("created", "updated", "errors"):
+            upload_rows_total.labels(result).inc(len(summary.get(result, [])))
+        upload_jobs_total.labels("completed").inc()
         return {"summary": summary}
     except Exception as e:
-        logger.exception(f"File upload failed: {str(e)}")
+        logger.exception("File upload failed: %s", str(e))
+        upload_jobs_total.labels("failed").inc()
         return JSONResponse(status_code=500, content={"error": str(e)})
+    finally:
+        upload_job_duration_seconds.observe(time.perf_counter() - start)
@@ -0,0 +1,406 @@
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.engine.url import make_url
+
+from app.core.config import (
+    CACHE_LOCAL_MAX_ENTRIES, CACHE_SHARED_URL, CACHE_BUS_URL, CACHE_BUS_POLL_SECONDS, CACHE_BUS_RETENTION_SECONDS,
+    USER_CACHE_TTL_SECONDS,
+)
+from app.core.metrics import cache_requests_total
+import logging
+
+logger = logging.getLogger("lms_backend.core.cache")
+
+_MISSING = object()
+
+
+# --- storage tiers -------------------------------------------------------------
+
+class CacheBackend(ABC):
+    """
+    Key/value store used as a cache tier. Keys are strings, ``ttl`` is in
+    seconds (None or 0: no expiry). ``get`` returns ``default`` on a miss.
+    """
+
+    @abstractmethod
+    def get(self, key: str, default=None):
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str):
+        ...
+
+
+class LRUCache(CacheBackend):
+    """
+    In-process tier: bounded, least recently used entries are evicted first.
+    """
+
+    def __init__(self, max_entries: int = CACHE_LOCAL_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _connect_sqlite(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Shared tier for the workers of one machine, stored in a SQLite file.
+    Values are pickled, so only this application should write to the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = _connect_sqlite(self.path)
+        return connection
+
+    def get(self, key: str, default=None):
+        row = self._connection().execute(
+            "SELECT value FROM cache_entries WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return pickle.loads(row[0]) if row else default
+
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), time.time() + ttl if ttl else None),
+        )
+
+    def delete(self, key: str):
+        self._connection().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def delete_prefix(self, prefix: str):
+        # Keys are "<namespace>:<key>", namespaces contain no LIKE wildcards
+        self._connection().execute("DELETE FROM cache_entries WHERE key LIKE ?", (f"{prefix}%",))
+
+
+def create_backend(url: Optional[str]) -> Optional[CacheBackend]:
+    """
+    Shared tier for CACHE_SHARED_URL: ``sqlite:////path/cache.db`` or none.
+    """
+    if not url:
+        return None
+    parsed = make_url(url)
+    if parsed.drivername == "sqlite" and parsed.database:
+        return SQLiteCache(parsed.database)
+    raise ValueError(f"Unsupported cache backend URL: {url}")
+
+
+# --- invalidation bus ----------------------------------------------------------
+
+Subscriber = Callable[[Optional[str]], None]
+
+
+class InvalidationBus:
+    """
+    Publish/subscribe channel for cache invalidations. A message names a
+    namespace and either a key or None for "everything in the namespace".
+
+    This base class only delivers within the process, which is all a single
+    worker needs. Subclasses also deliver to the other workers; subscribers
+    are not called again for messages their own process published.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Subscriber]] = {}
+
+    def subscribe(self, namespace: str, callback: Subscriber):
+        self._subscribers.setdefault(namespace, []).append(callback)
+
+    def publish(self, namespace: str, key: Optional[str] = None):
+        self._deliver(namespace, key)
+
+    def _deliver(self, namespace: str, key: Optional[str]):
+        for callback in self._subscribers.get(namespace, ()):
+            try:
+                callback(key)
+            except Exception as e:
+                logger.error("Cache invalidation handler for %s failed: %s", namespace, e)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class SQLiteInvalidationBus(InvalidationBus):
+    """
+    Cross-process bus for the workers of one machine: messages are rows in a
+    SQLite file, and every worker polls for rows newer than the last one it
+    has seen every ``poll_interval`` seconds. Rows older than ``retention``
+    seconds are pruned.
+    """
+
+    def __init__(self, path: str, poll_interval: float = CACHE_BUS_POLL_SECONDS,
+                 retention: float = CACHE_BUS_RETENTION_SECONDS):
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._connection = _connect_sqlite(path)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        with self._lock:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache_invalidations (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "origin TEXT NOT NULL, namespace TEXT NOT NULL, key TEXT, created_at REAL NOT NULL)"
+            )
+            self.last_id = self._connection.execute("SELECT COALESCE(MAX(id), 0) FROM cache_invalidations").fetchone()[0]
+
+    def publish(self, namespace: str, key: Optional[str] = None):
+        self._deliver(namespace, key)
+        try:
+            with self._lock:
+                self._connection.execute(
+                    "INSERT INTO cache_invalidations (origin, namespace, key, created_at) VALUES (?, ?, ?, ?)",
+                    (self.origin, namespace, key, time.time()),
+                )
+        except sqlite3.Error as e:
+            # Other workers still converge through the cache TTLs
+            logger.error("Publishing invalidation %s:%s failed: %s", namespace, key, e)
+
+    def poll(self) -> int:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, origin, namespace, key FROM cache_invalidations WHERE id > ? ORDER BY id",
+                (self.last_id,),
+            ).fetchall()
+        for row_id, origin, namespace, key in rows:
+            self.last_id = row_id
+            if origin != self.origin:
+                self._deliver(namespace, key)
+        return len(rows)
+
+    def prune(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM cache_invalidations WHERE created_at < ?",
+                                     (time.time() - self.retention,))
+
+    def _run(self):
+        last_prune = 0.0
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+                if time.time() - last_prune > self.retention:
+                    self.prune()
+                    last_prune = time.time()
+            except Exception as e:
+                logger.error("Polling cache invalidations failed: %s", e)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-invalidation-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def create_bus(url: Optional[str]) -> InvalidationBus:
+    """
+    Bus for CACHE_BUS_URL: ``sqlite:////path/bus.db`` for the workers of one
+    machine, or in-process only when unset.
+    """
+    if not url:
+        return InvalidationBus()
+    parsed = make_url(url)
+    if parsed.drivername == "sqlite" and parsed.database:
+        return SQLiteInvalidationBus(parsed.database)
+    raise ValueError(f"Unsupported cache bus URL: {url}")
+
+
+invalidation_bus = create_bus(CACHE_BUS_URL)
+_shared_backend = create_backend(CACHE_SHARED_URL)
+
+
+# --- caches --------------------------------------------------------------------
+
+class Cache:
+    """
+    Namespaced two-tier cache: a per-process LRU in front of the optional
+    shared tier (CACHE_SHARED_URL). ``invalidate`` removes a key from both
+    tiers and publishes it on the bus, which drops it from the LRU of every
+    other worker.
+
+    Every invalidation also changes the namespace's generation: a counter
+    in this process and, with a shared tier, a token in it for the other
+    workers, whose bus messages may arrive late. ``get_or_load`` keeps a
+    loaded value only if the generation did not change while it loaded.
+    """
+
+    def __init__(self, namespace: str, ttl: Optional[float] = None, max_entries: int = CACHE_LOCAL_MAX_ENTRIES,
+                 shared: Optional[CacheBackend] = _MISSING, bus: Optional[InvalidationBus] = None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = LRUCache(max_entries)
+        self.shared = _shared_backend if shared is _MISSING else shared
+        self.bus = bus or invalidation_bus
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+        self.bus.subscribe(namespace, self._on_invalidation)
+        caches[namespace] = self
+
+    def _key(self, key) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key, default=None):
+        full_key = self._key(key)
+        value = self.local.get(full_key, _MISSING)
+        if value is not _MISSING:
+            cache_requests_total.labels(self.namespace, "hit").inc()
+            return value
+        if self.shared is not None:
+            value = self.shared.get(full_key, _MISSING)
+            if value is not _MISSING:
+                cache_requests_total.labels(self.namespace, "shared_hit").inc()
+                self.local.set(full_key, value, self.ttl)
+                return value
+        cache_requests_total.labels(self.namespace, "miss").inc()
+        return default
+
+    def set(self, key, value):
+        full_key = self._key(key)
+        self.local.set(full_key, value, self.ttl)
+        if self.shared is not None:
+            self.shared.set(full_key, value, self.ttl)
+
+    def get_or_load(self, key, loader: Callable[[], Any]):
+        """
+        Cached value of ``key``, calling ``loader`` on a miss. A None result
+        is not cached.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            generation = self._generations()
+            value = loader()
+            if value is not None and self._generations() == generation:
+                self.set(key, value)
+                # An invalidation between the check and the set would not
+                # delete the value it missed; check again after storing it
+                if self._generations() != generation:
+                    self._drop(str(key))
+        return value
+
+    def _generation_key(self) -> str:
+        # Outside the "<namespace>:" prefix, so namespace deletes keep it
+        return f"{self.namespace}#generation"
+
+    def _generations(self) -> Tuple[int, Any]:
+        shared = self.shared.get(self._generation_key()) if self.shared is not None else None
+        return self._generation, shared
+
+    def _bump_generation(self):
+        with self._generation_lock:
+            self._generation += 1
+
+    def invalidate(self, key=None):
+        """
+        Drop ``key`` (or the whole namespace) here, in the shared tier and in
+        every other worker. Call after the write has been committed.
+        """
+        key = None if key is None else str(key)
+        self._bump_generation()
+        if self.shared is not None:
+            self.shared.set(self._generation_key(), uuid.uuid4().hex)
+        self._drop(key)
+        self.bus.publish(self.namespace, key)
+
+    def _drop(self, key: Optional[str]):
+        self._drop_local(key)
+        if self.shared is not None:
+            if key is None:
+                self.shared.delete_prefix(self._key(""))
+            else:
+                self.shared.delete(self._key(key))
+
+    def _drop_local(self, key: Optional[str]):
+        if key is None:
+            self.local.delete_prefix(self._key(""))
+        else:
+            self.local.delete(self._key(key))
+
+    def _on_invalidation(self, key: Optional[str]):
+        self._bump_generation()
+        self._drop_local(key)
+
+
+caches: Dict[str, Cache] = {}
+
+# Serialized GET /admin/users/{id} responses, keyed by user id. Invalidated by
+# writes to the user, their skills, learning paths and progress, and in full
+# by course/learning path edits and roster uploads.
+user_cache = Cache("users", ttl=USER_CACHE_TTL_SECONDS)
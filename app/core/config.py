@@ -8,6 +8,108 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Logging pipeline: "json" or "text" output, per-logger levels
+# ("lms_backend.crud=WARNING,sqlalchemy.pool=DEBUG") and the fraction of DEBUG
+# records that are kept.
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", 1.0))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+
+# Connection pool settings (QueuePool). Recycle below MySQL's wait_timeout.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Optional read replicas (comma separated). GET list/detail and report reads are
+# spread over them; writes always go to DATABASE_URL.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_EJECT_SECONDS = int(os.getenv("REPLICA_EJECT_SECONDS", 30))
+
+# Read-only engine used by the AI/chatbot SQL agents, with its own small pool.
+# Point AI_DATABASE_URL at a read-only MySQL user where available.
+AI_DATABASE_URL = os.getenv("AI_DATABASE_URL") or (DATABASE_REPLICA_URLS[0] if DATABASE_REPLICA_URLS else DATABASE_URL)
+AI_DB_POOL_SIZE = int(os.getenv("AI_DB_POOL_SIZE", 2))
+AI_DB_MAX_OVERFLOW = int(os.getenv("AI_DB_MAX_OVERFLOW", 2))
+
+# SQL instrumentation. DB_ECHO turns SQLAlchemy's statement echo back on for
+# local debugging; in normal operation only slow statements are logged.
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 200))
+SLOW_QUERY_PARAMS_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_PARAMS_SAMPLE_RATE", 0.1))
+DB_TIMING_HEADERS = os.getenv("DB_TIMING_HEADERS", "false").lower() in ("1", "true", "yes")
+
+# N+1 query detection for development and CI. NPLUSONE_RAISE turns warnings
+# into request failures so tests catch regressions.
+NPLUSONE_DETECTION = os.getenv("NPLUSONE_DETECTION", "false").lower() in ("1", "true", "yes")
+NPLUSONE_THRESHOLD = int(os.getenv("NPLUSONE_THRESHOLD", 5))
+NPLUSONE_RAISE = os.getenv("NPLUSONE_RAISE", "false").lower() in ("1", "true", "yes")
+
+# Prometheus metrics. Set METRICS_MULTIPROC_DIR to a directory shared by all
+# uvicorn workers so that /metrics reports the whole server.
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR") or None
+METRICS_FLUSH_SECONDS = int(os.getenv("METRICS_FLUSH_SECONDS", 5))
+
+# On-demand profiling: admins send "X-Profile: 1"; PROFILE_SAMPLE_RATE also
+# profiles a random fraction of all requests. Results stay in a per-worker ring buffer.
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", 50))
+
+# AI agents are built in a background thread after startup (or on first use
+# when AI_WARMUP is off); a failed build is retried after AI_INIT_RETRY_SECONDS.
+AI_WARMUP = os.getenv("AI_WARMUP", "true").lower() in ("1", "true", "yes")
+AI_INIT_RETRY_SECONDS = int(os.getenv("AI_INIT_RETRY_SECONDS", 60))
+
+# Skills, roles, proficiency levels and role requirements are served from an
+# in-memory snapshot. Other workers drop it when the invalidation bus delivers
+# a write (CACHE_BUS_URL), and in any case reload it after this many seconds.
+REFERENCE_DATA_TTL_SECONDS = int(os.getenv("REFERENCE_DATA_TTL_SECONDS", 300))
+
+# Caches: per-worker LRU tier, optional shared tier and the bus that carries
+# invalidations to the other workers (unset: this process only). Both take
+# sqlite:////path/file.db, a file every worker on the machine can open.
+CACHE_LOCAL_MAX_ENTRIES = int(os.getenv("CACHE_LOCAL_MAX_ENTRIES", 1024))
+CACHE_SHARED_URL = os.getenv("CACHE_SHARED_URL") or None
+CACHE_BUS_URL = os.getenv("CACHE_BUS_URL") or None
+CACHE_BUS_POLL_SECONDS = float(os.getenv("CACHE_BUS_POLL_SECONDS", 0.5))
+CACHE_BUS_RETENTION_SECONDS = int(os.getenv("CACHE_BUS_RETENTION_SECONDS", 3600))
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+
+# Admin reports stream their rows; this many are fetched from the database per
+# keyset-paged query and serialized per batch.
+REPORT_BATCH_SIZE = int(os.getenv("REPORT_BATCH_SIZE", 5000))
+
+# Users whose skill_gaps rows are replaced per statement by incremental
+# maintenance, and per transaction by `python -m app.core.skill_gaps rebuild`.
+SKILL_GAPS_BATCH_SIZE = int(os.getenv("SKILL_GAPS_BATCH_SIZE", 1000))
+
+# Expected pace for the lagging-progress report: a learning path's courses are
+# due one after another, LAGGING_COURSE_DAYS each, starting LAGGING_GRACE_DAYS
+# after the path was assigned. A course is reported once it is at least
+# LAGGING_MIN_DAYS behind that schedule.
+LAGGING_GRACE_DAYS = int(os.getenv("LAGGING_GRACE_DAYS", 7))
+LAGGING_COURSE_DAYS = int(os.getenv("LAGGING_COURSE_DAYS", 30))
+LAGGING_MIN_DAYS = int(os.getenv("LAGGING_MIN_DAYS", 1))
+
+# Precomputed admin reports (app.core.report_snapshots): seconds between
+# recomputations of the compliance report, and stored snapshots kept per report.
+COMPLIANCE_REPORT_REFRESH_SECONDS = int(os.getenv("COMPLIANCE_REPORT_REFRESH_SECONDS", 900))
+REPORT_SNAPSHOT_RETENTION = int(os.getenv("REPORT_SNAPSHOT_RETENTION", 96))
+
+# In-process users x skills matrix behind /admin/skills/search. Writes refresh
+# the affected users in every worker through the invalidation bus; the whole
+# matrix is reloaded after this many seconds in case a message was lost.
+SKILL_MATRIX_TTL_SECONDS = int(os.getenv("SKILL_MATRIX_TTL_SECONDS", 3600))
+
+# POST /project-roles/staffing request limits: seats over all slots and listed
+# candidates. The assignment is O(seats^2 x candidates), so these bound the
+# work one request can ask for.
+STAFFING_MAX_SEATS = int(os.getenv("STAFFING_MAX_SEATS", 1000))
+STAFFING_MAX_CANDIDATES = int(os.getenv("STAFFING_MAX_CANDIDATES", 20000))
+
+TOKEN_REVOCATION_SYNC_SECONDS = int(os.getenv("TOKEN_REVOCATION_SYNC_SECONDS", 30))
 
 # Ensure SECRET_KEY is set
 if not SECRET_KEY:
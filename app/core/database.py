@@ -2,21 +2,36 @@ from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import text
-from app.core.config import DATABASE_URL
+from app.core.config import (
+    DATABASE_URL, DB_ECHO, AI_DATABASE_URL, AI_DB_POOL_SIZE, AI_DB_MAX_OVERFLOW, DATABASE_REPLICA_URLS, REPLICA_EJECT_SECONDS
+)
+from app.core.engines import engine_registry
+from app.core.replicas import ReplicaRouter
 from app.core.logger import logger
 import logging
 
 logger.debug("Create all database tables with error handling")
 
-engine = create_engine(
-    DATABASE_URL, 
-    echo=True
+# One pool per purpose for the whole process: "oltp" serves the API sessions,
+# "ai" is the read-only pool shared by the LangChain SQL agents.
+engine_registry.register("oltp", DATABASE_URL, echo=DB_ECHO)
+engine_registry.register(
+    "ai", AI_DATABASE_URL, read_only=True,
+    pool_size=AI_DB_POOL_SIZE, max_overflow=AI_DB_MAX_OVERFLOW, echo=DB_ECHO
 )
 
-# Add SQL logging handler for more verbose output
-logging.getLogger('sqlalchemy.engine').setLevel(logging.DEBUG)
+for index, replica_url in enumerate(DATABASE_REPLICA_URLS):
+    engine_registry.register(f"replica-{index}", replica_url, read_only=True, echo=DB_ECHO)
+
+engine = engine_registry.get("oltp")
+replica_router = ReplicaRouter(
+    engine_registry,
+    [f"replica-{index}" for index in range(len(DATABASE_REPLICA_URLS))],
+    eject_seconds=REPLICA_EJECT_SECONDS
+)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
 Base = declarative_base()
 
 def create_all_tables(engine, Base):
@@ -25,7 +40,7 @@ def create_all_tables(engine, Base):
         Base.metadata.create_all(bind=engine)
         logger.debug("Database tables created or verified successfully.")
     except Exception as e:
-        logger.error(f"Database connection or table creation failed: {e}")
+        logger.error("Database connection or table creation failed: %s", e)
         print("[ERROR] Could not connect to the database or create tables. Please check your database settings and ensure the server is running.")
 
 
@@ -35,17 +50,26 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    """
+    Session on a read replica (or the primary when none is available).
+    Only for read-only endpoints that can tolerate replication lag; anything
+    that writes or must read its own writes uses get_db.
+    """
+    db = ReadSessionLocal(bind=replica_router.get_engine())
+    try:
+        yield db
+    finally:
+        db.close()
         
 def get_mysql_engine():
     """
-    Returns a SQLAlchemy engine for MySQL with the configured DATABASE_URL.
+    Returns the shared read-only "ai" engine from the engine registry.
     """
     try:
-        return create_engine(
-            DATABASE_URL, 
-            echo=True
-        )
+        return engine_registry.get("ai")
     except Exception as e:
-        logger.error(f"Failed to create MySQL engine: {e}")
+        logger.error("Failed to create MySQL engine: %s", e)
         raise
     
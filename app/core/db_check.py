@@ -10,8 +10,8 @@ def check_database_connectivity():
         db.close()
         logger.info("Database connectivity check at startup: SUCCESS")
     except OperationalError as e:
-        logger.error(f"Database connectivity check at startup: FAILED - {e}")
+        logger.error("Database connectivity check at startup: FAILED - %s", e)
         raise
     except Exception as e:
-        logger.error(f"Unexpected error during DB connectivity check at startup: {e}")
+        logger.error("Unexpected error during DB connectivity check at startup: %s", e)
         raise
@@ -0,0 +1,104 @@
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
+
+from app.core.config import DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+from app.core.pool_metrics import InstrumentedQueuePool
+from app.core.sql_instrumentation import instrument_engine
+import logging
+
+logger = logging.getLogger("lms_backend.core.engines")
+
+
+def get_engine_options(url: str, pool_size: int = DB_POOL_SIZE, max_overflow: int = DB_MAX_OVERFLOW) -> dict:
+    """
+    Pool options for create_engine. In-memory SQLite keeps its single
+    connection pool, everything else gets an instrumented QueuePool.
+    """
+    if make_url(url).database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def _enforce_read_only(engine: Engine):
+    """
+    Make every connection of ``engine`` reject writes at the database level.
+    """
+    @event.listens_for(engine, "connect")
+    def _set_read_only(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            if engine.dialect.name == "sqlite":
+                cursor.execute("PRAGMA query_only = ON")
+            elif engine.dialect.name == "mysql":
+                cursor.execute("SET SESSION TRANSACTION READ ONLY")
+        finally:
+            cursor.close()
+
+
+class EngineRegistry:
+    """
+    Process-wide set of named engines. Each name owns one bounded pool which
+    every subsystem shares; engines are created on first use.
+    """
+
+    def __init__(self):
+        self._configs: Dict[str, dict] = {}
+        self._engines: Dict[str, Engine] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, url: str, read_only: bool = False,
+                 pool_size: int = DB_POOL_SIZE, max_overflow: int = DB_MAX_OVERFLOW, **engine_kwargs):
+        self._configs[name] = {
+            "url": url,
+            "read_only": read_only,
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "engine_kwargs": engine_kwargs,
+        }
+
+    def get(self, name: str) -> Engine:
+        engine = self._engines.get(name)
+        if engine is not None:
+            return engine
+        with self._lock:
+            engine = self._engines.get(name)
+            if engine is None:
+                config = self._configs.get(name)
+                if config is None:
+                    raise KeyError(f"No engine registered under '{name}'")
+                engine = create_engine(
+                    config["url"],
+                    **get_engine_options(config["url"], config["pool_size"], config["max_overflow"]),
+                    **config["engine_kwargs"]
+                )
+                if config["read_only"]:
+                    _enforce_read_only(engine)
+                instrument_engine(engine, name)
+                self._engines[name] = engine
+                logger.debug("Created engine '%s' (read_only=%s, pool_size=%s)", name, config['read_only'], config['pool_size'])
+        return engine
+
+    def created(self) -> Dict[str, Engine]:
+        return dict(self._engines)
+
+    def dispose(self, name: Optional[str] = None):
+        with self._lock:
+            names = [name] if name else list(self._engines)
+            for engine_name in names:
+                engine = self._engines.pop(engine_name, None)
+                if engine is not None:
+                    engine.dispose()
+
+
+engine_registry = EngineRegistry()
@@ -0,0 +1,104 @@
+import threading
+import time
+from typing import Callable, Dict, Generic, Optional, TypeVar
+
+from app.core.config import AI_INIT_RETRY_SECONDS
+import logging
+
+logger = logging.getLogger("lms_backend.core.lazy_resource")
+
+T = TypeVar("T")
+
+
+class ResourceNotReady(Exception):
+    """
+    Raised by LazyResource.get when the resource is still being built or its
+    last build failed less than ``retry_seconds`` ago.
+    """
+
+    def __init__(self, name: str, state: str, error: Optional[str] = None):
+        self.name = name
+        self.state = state
+        self.error = error
+        super().__init__(f"{name} is {state}" + (f": {error}" if error else ""))
+
+
+class LazyResource(Generic[T]):
+    """
+    An expensive object (LLM client, SQL agent, ...) built by ``factory`` on
+    first use or by a background warm-up, never at import time.
+
+    Only one thread runs the factory. Callers arriving meanwhile get
+    ResourceNotReady instead of queueing behind a slow DB or LLM. A failed
+    build is retried on the next use after ``retry_seconds``.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T], retry_seconds: int = AI_INIT_RETRY_SECONDS):
+        self.name = name
+        self.factory = factory
+        self.retry_seconds = retry_seconds
+        self._value: Optional[T] = None
+        self._state = "pending"
+        self._error: Optional[str] = None
+        self._failed_at = 0.0
+        self._init_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+        lazy_resources[name] = self
+
+    @property
+    def ready(self) -> bool:
+        return self._state == "ready"
+
+    def get(self) -> T:
+        if self._state == "ready":
+            return self._value
+        if not self._lock.acquire(blocking=False):
+            raise ResourceNotReady(self.name, "initializing")
+        try:
+            if self._state == "ready":
+                return self._value
+            if self._state == "failed" and time.monotonic() - self._failed_at < self.retry_seconds:
+                raise ResourceNotReady(self.name, "failed", self._error)
+            self._build()
+            if self._state != "ready":
+                raise ResourceNotReady(self.name, "failed", self._error)
+            return self._value
+        finally:
+            self._lock.release()
+
+    def _build(self):
+        self._state = "initializing"
+        start = time.perf_counter()
+        try:
+            self._value = self.factory()
+        except Exception as e:
+            self._state = "failed"
+            self._error = str(e)
+            self._failed_at = time.monotonic()
+            logger.error("Initializing %s failed: %s", self.name, e)
+            return
+        self._init_seconds = time.perf_counter() - start
+        self._error = None
+        self._state = "ready"
+        logger.info("%s initialized in %.2fs", self.name, self._init_seconds)
+
+    def warm_in_background(self) -> threading.Thread:
+        def _warm():
+            try:
+                self.get()
+            except ResourceNotReady:
+                pass
+
+        thread = threading.Thread(target=_warm, name=f"warmup-{self.name}", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self) -> dict:
+        return {
+            "state": self._state,
+            "error": self._error,
+            "init_seconds": round(self._init_seconds, 3) if self._init_seconds is not None else None,
+        }
+
+
+lazy_resources: Dict[str, LazyResource] = {}
@@ -1,26 +1,136 @@
+import atexit
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
-from datetime import datetime
-from app.core.config import LOG_LEVEL
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from datetime import datetime, timezone
+from app.core.config import LOG_LEVEL, LOG_FORMAT, LOG_LEVELS, LOG_DEBUG_SAMPLE_RATE, LOG_QUEUE_SIZE
 
 LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.logs')
 # Add timestamp to log file name for each server start
 log_timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 LOG_FILE = os.path.join(LOG_DIR, f'lms_backend_{log_timestamp}.log')
 
+TEXT_FORMAT = '%(asctime)s | %(levelname)s | %(name)s | %(message)s'
+
+# Attributes every LogRecord has; anything else was passed via ``extra=``
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
 if not os.path.exists(LOG_DIR):
     os.makedirs(LOG_DIR)
 
-# Configure root logger
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL, logging.INFO),
-    format='%(asctime)s | %(levelname)s | %(name)s | %(message)s',
-    handlers=[
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: timestamp, level, logger, message, source
+    location, any ``extra=`` fields and the formatted exception.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "thread": record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """
+    Keeps only a ``rate`` fraction of DEBUG records. Runs before the record is
+    queued, so dropped records are never formatted.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno != logging.DEBUG or self.rate >= 1.0 or random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the QueueListener thread. The caller only merges the
+    message arguments; JSON/text formatting and file I/O happen on the
+    listener thread. When the queue is full the record is dropped rather
+    than blocking the request.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _parse_levels(spec: str) -> dict:
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def _configure() -> QueueListener:
+    formatter = JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers = [
         RotatingFileHandler(LOG_FILE, maxBytes=5*1024*1024, backupCount=5),
         logging.StreamHandler()
     ]
-)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    if LOG_DEBUG_SAMPLE_RATE < 1.0:
+        queue_handler.addFilter(DebugSampler(LOG_DEBUG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+    for name, level in _parse_levels(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(getattr(logging, level, logging.INFO))
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+log_listener = _configure()
+# Drain the queue on interpreter shutdown so the last records are not lost
+atexit.register(log_listener.stop)
 
 logger = logging.getLogger('lms-backend')
 
@@ -0,0 +1,356 @@
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from app.core.config import METRICS_MULTIPROC_DIR, METRICS_FLUSH_SECONDS
+import logging
+
+logger = logging.getLogger("lms_backend.core.metrics")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+# Updates are plain attribute/list writes without locks. Under the GIL a
+# concurrent increment can very rarely be lost, which is fine for metrics and
+# keeps the request path free of lock contention.
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable[[], Dict[tuple, float]]] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self._children: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        return _Value()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            # Only the first sighting of a label set takes the lock
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def samples(self) -> Dict[tuple, object]:
+        if self.collect is not None:
+            return self.collect()
+        return {labels: child.value for labels, child in list(self._children.items())}
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def samples(self) -> Dict[tuple, object]:
+        return {
+            labels: {"counts": list(child.counts), "sum": child.sum}
+            for labels, child in list(self._children.items())
+        }
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    Holds the process's metrics and renders them in the Prometheus text
+    exposition format.
+
+    With METRICS_MULTIPROC_DIR set, every worker periodically writes its
+    samples to ``<dir>/<pid>.json`` and ``render`` merges all files, so any
+    worker can answer a scrape for the whole server. Counters and histograms
+    are summed across every file; gauges only across workers that have
+    written recently.
+    """
+
+    def __init__(self, multiproc_dir: Optional[str] = METRICS_MULTIPROC_DIR,
+                 flush_interval: int = METRICS_FLUSH_SECONDS):
+        self._metrics: Dict[str, Metric] = {}
+        self.multiproc_dir = multiproc_dir
+        self.flush_interval = flush_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=(), collect=None) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, collect))
+
+    def gauge(self, name, documentation, labelnames=(), collect=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, collect))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self) -> dict:
+        snapshot = {}
+        for metric in list(self._metrics.values()):
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                logger.error("Collecting metric %s failed: %s", metric.name, e)
+                continue
+            snapshot[metric.name] = {
+                "type": metric.type,
+                "documentation": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "buckets": list(getattr(metric, "buckets", ())),
+                "samples": [[list(labels), value] for labels, value in samples.items()],
+            }
+        return snapshot
+
+    # --- multi-worker support -------------------------------------------------
+
+    def flush(self):
+        if not self.multiproc_dir:
+            return
+        os.makedirs(self.multiproc_dir, exist_ok=True)
+        path = os.path.join(self.multiproc_dir, f"{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Flushing metrics failed: %s", e)
+
+    def start(self):
+        if not self.multiproc_dir or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error("Flushing metrics failed: %s", e)
+
+    def _merged_snapshot(self) -> dict:
+        self.flush()
+        merged: dict = {}
+        live_after = time.time() - 3 * self.flush_interval
+        for path in glob.glob(os.path.join(self.multiproc_dir, "*.json")):
+            try:
+                is_live = os.path.getmtime(path) >= live_after
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, metric in snapshot.items():
+                if metric["type"] == "gauge" and not is_live:
+                    continue
+                target = merged.setdefault(name, {**metric, "samples": {}})
+                for labels, value in metric["samples"]:
+                    key = tuple(labels)
+                    current = target["samples"].get(key)
+                    if metric["type"] == "histogram":
+                        if current is None:
+                            target["samples"][key] = {"counts": list(value["counts"]), "sum": value["sum"]}
+                        else:
+                            current["counts"] = [a + b for a, b in zip(current["counts"], value["counts"])]
+                            current["sum"] += value["sum"]
+                    else:
+                        target["samples"][key] = (current or 0) + value
+        for metric in merged.values():
+            metric["samples"] = [[list(labels), value] for labels, value in metric["samples"].items()]
+        return merged
+
+    # --- exposition -------------------------------------------------------------
+
+    def render(self) -> str:
+        snapshot = self._merged_snapshot() if self.multiproc_dir else self.snapshot()
+        lines = []
+        for name, metric in snapshot.items():
+            lines.append(f"# HELP {name} {metric['documentation']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            labelnames = metric["labelnames"]
+            for labels, value in metric["samples"]:
+                if metric["type"] == "histogram":
+                    cumulative = 0
+                    bounds = list(metric["buckets"]) + [float("inf")]
+                    for bound, count in zip(bounds, value["counts"]):
+                        cumulative += count
+                        le = f'le="{_format_number(bound)}"'
+                        lines.append(f"{name}_bucket{_format_labels(labelnames, labels, le)} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labelnames, labels)} {_format_number(value['sum'])}")
+                    lines.append(f"{name}_count{_format_labels(labelnames, labels)} {cumulative}")
+                else:
+                    lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def _pool_samples(attribute: str) -> Dict[tuple, float]:
+    from app.core.engines import engine_registry
+    from app.core.pool_metrics import get_pool_status
+    samples = {}
+    for name, engine in engine_registry.created().items():
+        value = get_pool_status(engine).get(attribute)
+        if value is not None:
+            samples[(name,)] = value
+    return samples
+
+
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served.")
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template and status.",
+    ("method", "route", "status"))
+db_pool_checked_out = registry.gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool.", ("engine",),
+    collect=lambda: _pool_samples("checked_out"))
+db_pool_overflow = registry.gauge(
+    "db_pool_overflow", "Current pool overflow (negative while below pool_size).", ("engine",),
+    collect=lambda: _pool_samples("overflow"))
+db_pool_checkouts_total = registry.counter(
+    "db_pool_checkouts_total", "Connection checkouts.", ("engine",),
+    collect=lambda: _pool_samples("checkouts"))
+db_pool_timeouts_total = registry.counter(
+    "db_pool_timeouts_total", "Checkouts that gave up waiting for a connection.", ("engine",),
+    collect=lambda: _pool_samples("timeouts"))
+cache_requests_total = registry.counter(
+    "cache_requests_total", "Cache lookups by cache and result (hit/miss).", ("cache", "result"))
+upload_jobs_total = registry.counter(
+    "upload_jobs_total", "Roster upload jobs by outcome.", ("outcome",))
+upload_rows_total = registry.counter(
+    "upload_rows_total", "Roster upload rows by result.", ("result",))
+upload_job_duration_seconds = registry.histogram(
+    "upload_job_duration_seconds", "Roster upload processing time.",
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0))
+skill_matrix_bytes = registry.gauge(
+    "skill_matrix_bytes", "Memory held by the in-process skill matrix (arrays and id maps).")
+llm_call_duration_seconds = registry.histogram(
+    "llm_call_duration_seconds", "Latency of LLM agent calls.", ("agent", "outcome"), buckets=LLM_BUCKETS)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording in-flight requests and per-route latency.
+    The route label is the matched path template, never the raw URL.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        in_flight = http_requests_in_flight.labels()
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            route = scope.get("route")
+            http_request_duration_seconds.labels(
+                scope["method"], route.path if route is not None else "unmatched", status[0]
+            ).observe(time.perf_counter() - start)
@@ -0,0 +1,122 @@
+import argparse
+import importlib
+import pkgutil
+import re
+from datetime import datetime, timezone
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import Index
+
+import logging
+
+logger = logging.getLogger("lms_backend.core.migrations")
+
+MIGRATIONS_PACKAGE = "app.migrations"
+_MODULE_NAME = re.compile(r"^v(\d{4})_(\w+)$")
+
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+def discover() -> List[Migration]:
+    """
+    Migrations are modules ``app/migrations/vNNNN_<name>.py`` defining
+    ``upgrade(connection)``; they run in version order.
+    """
+    package = importlib.import_module(MIGRATIONS_PACKAGE)
+    migrations = []
+    for module_info in pkgutil.iter_modules(package.__path__):
+        match = _MODULE_NAME.match(module_info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{MIGRATIONS_PACKAGE}.{module_info.name}")
+        migrations.append(Migration(int(match.group(1)), match.group(2), module.upgrade))
+    return sorted(migrations, key=lambda migration: migration.version)
+
+
+def applied_versions(connection: Connection) -> List[int]:
+    schema_migrations.create(connection, checkfirst=True)
+    return [row.version for row in connection.execute(select(schema_migrations.c.version))]
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> List[Migration]:
+    """
+    Apply every pending migration up to ``target`` (default: latest), each
+    in its own transaction, and record it in schema_migrations.
+    """
+    with engine.begin() as connection:
+        done = set(applied_versions(connection))
+    applied = []
+    for migration in discover():
+        if migration.version in done or (target is not None and migration.version > target):
+            continue
+        logger.info("Applying migration %04d_%s", migration.version, migration.name)
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=migration.version, name=migration.name,
+                applied_at=datetime.now(timezone.utc).replace(tzinfo=None),
+            ))
+        applied.append(migration)
+    return applied
+
+
+def status(engine: Engine) -> List[dict]:
+    with engine.begin() as connection:
+        done = set(applied_versions(connection))
+    return [
+        {"version": migration.version, "name": migration.name, "applied": migration.version in done}
+        for migration in discover()
+    ]
+
+
+def create_index_if_missing(connection: Connection, index: Index) -> bool:
+    """
+    Create ``index`` unless the table already has it, or has an index or
+    unique key whose leading columns are the same (e.g. the UNIQUE keys of
+    scripts/create_database.sql, or the index MySQL adds for a foreign key).
+    """
+    table_name = index.table.name
+    columns = [column.name for column in index.columns]
+    inspector = inspect(connection)
+    existing = inspector.get_indexes(table_name) + inspector.get_unique_constraints(table_name)
+    for other in existing:
+        if other["name"] == index.name or other["column_names"][:len(columns)] == columns:
+            logger.info("Index %s on %s%s already covered by %s", index.name, table_name, columns, other["name"])
+            return False
+    index.create(connection)
+    return True
+
+
+def main():
+    from app.core.database import engine
+
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations (app/migrations).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = subparsers.add_parser("upgrade", help="Apply pending migrations")
+    upgrade_parser.add_argument("--target", type=int, help="Stop after this version")
+    subparsers.add_parser("status", help="List migrations and whether they are applied")
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        applied = upgrade(engine, args.target)
+        print(f"Applied {len(applied)} migration(s)" + "".join(f"\n  {m.version:04d} {m.name}" for m in applied))
+    else:
+        for row in status(engine):
+            print(f"{row['version']:04d} {row['name']:<40} {'applied' if row['applied'] else 'pending'}")
+
+
+if __name__ == "__main__":
+    main()
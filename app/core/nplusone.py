@@ -0,0 +1,143 @@
+import os
+import re
+import traceback
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, List
+
+from app.core.config import NPLUSONE_THRESHOLD, NPLUSONE_RAISE
+from app.core.sql_instrumentation import RequestQueryStats, query_stats_scope
+import logging
+
+logger = logging.getLogger("lms_backend.sql.nplusone")
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_CORE_DIR = os.path.join(_APP_DIR, "core")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:[^()]*)\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Raised when a request (or an assert_max_queries block) issues repeated
+    same-shape statements or more statements than its declared budget.
+    """
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """
+    Shape of a SQL statement: literals, IN-lists and whitespace normalised so
+    that the lazy load of ``user.skill`` for two different users compares equal.
+    """
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _IN_LIST.sub("IN (...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def _app_stack(limit: int = 8) -> List[str]:
+    stack = traceback.extract_stack()
+    frames = [
+        frame for frame in stack
+        if frame.filename.startswith(_APP_DIR) and not frame.filename.startswith(_CORE_DIR)
+    ]
+    if not frames:
+        # Lazy loads fired while FastAPI serialises the response have no app
+        # frame on the stack; show the innermost non-SQLAlchemy frames instead.
+        frames = [
+            frame for frame in stack
+            if os.sep + "sqlalchemy" + os.sep not in frame.filename and not frame.filename.startswith(_CORE_DIR)
+        ]
+    return [f"{os.path.relpath(f.filename, os.path.dirname(_APP_DIR))}:{f.lineno} in {f.name}" for f in frames[-limit:]]
+
+
+def query_budget(max_queries: int):
+    """
+    Declare the maximum number of statements a route may issue, e.g.::
+
+        @router.get("/{course_id}")
+        @query_budget(3)
+        def get_course(...): ...
+
+    Enforced only while N+1 detection is enabled.
+    """
+    def decorator(func):
+        func.query_budget = max_queries
+        return func
+    return decorator
+
+
+class RequestQueryLog:
+    """
+    Per-request statement counter keyed by fingerprint. The call stack is
+    captured when a fingerprint reaches the threshold, which is the site of
+    the repeated query.
+    """
+
+    def __init__(self, threshold: int):
+        self.threshold = threshold
+        self.counts: Dict[str, int] = {}
+        self.stacks: Dict[str, List[str]] = {}
+
+    def __call__(self, statement: str):
+        key = fingerprint(statement)
+        count = self.counts.get(key, 0) + 1
+        self.counts[key] = count
+        if count == self.threshold:
+            self.stacks[key] = _app_stack()
+
+    def repeated(self) -> Dict[str, int]:
+        return {key: count for key, count in self.counts.items() if count >= self.threshold}
+
+
+class NPlusOneDetector:
+    """
+    Flags requests that run the same statement shape ``threshold`` times or
+    more, or that exceed the ``query_budget`` declared on their endpoint.
+    With ``raise_on_violation`` the request fails with QueryBudgetExceeded,
+    which TestClient re-raises so CI fails on regressions.
+    """
+
+    def __init__(self, threshold: int = NPLUSONE_THRESHOLD, raise_on_violation: bool = NPLUSONE_RAISE):
+        self.threshold = threshold
+        self.raise_on_violation = raise_on_violation
+
+    def start_request(self) -> RequestQueryLog:
+        return RequestQueryLog(self.threshold)
+
+    def finish_request(self, scope, stats: RequestQueryStats, query_log: RequestQueryLog):
+        route = scope.get("route")
+        endpoint_name = f"{scope.get('method', '')} {getattr(route, 'path', scope.get('path', ''))}"
+        problems = []
+        for key, count in query_log.repeated().items():
+            stack = "\n    ".join(query_log.stacks.get(key, []))
+            message = f"N+1 suspected on {endpoint_name}: {count}x {key[:300]}\n    {stack}"
+            logger.warning(message)
+            problems.append(message)
+        budget = getattr(scope.get("endpoint"), "query_budget", None)
+        if budget is not None and stats.count > budget:
+            message = f"Query budget exceeded on {endpoint_name}: {stats.count} statements, budget {budget}"
+            logger.error(message)
+            problems.append(message)
+        if problems and self.raise_on_violation:
+            raise QueryBudgetExceeded("\n".join(problems))
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, threshold: int = NPLUSONE_THRESHOLD):
+    """
+    Fail a block of code (typically a test calling crud functions) that issues
+    more than ``max_queries`` statements or repeats a statement shape.
+    """
+    query_log = RequestQueryLog(threshold)
+    with query_stats_scope(query_log) as stats:
+        yield stats
+    problems = [f"{count}x {key[:300]}" for key, count in query_log.repeated().items()]
+    if stats.count > max_queries:
+        problems.insert(0, f"{stats.count} statements, budget {max_queries}")
+    if problems:
+        raise QueryBudgetExceeded("; ".join(problems))
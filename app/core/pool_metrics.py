@@ -0,0 +1,86 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStats:
+    """
+    Counters for one connection pool. Plain attribute updates: a lost increment
+    under contention is acceptable for monitoring numbers.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float):
+        self.checkouts += 1
+        self.wait_total += seconds
+        if seconds > self.wait_max:
+            self.wait_max = seconds
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long callers wait for a connection and how
+    often they give up with a pool timeout.
+    """
+
+    def __init__(self, *args, stats: PoolStats = None, **kw):
+        # A recreated pool inherits the listeners of the old one via _dispatch
+        inherits_listeners = "_dispatch" in kw
+        super().__init__(*args, **kw)
+        self.stats = stats or PoolStats()
+        if not inherits_listeners:
+            event.listen(self, "invalidate", self._on_invalidate)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.stats.invalidations += 1
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        # Keep counters across dispose()/recreate() so totals stay monotonic
+        new_pool = super().recreate()
+        new_pool.stats = self.stats
+        return new_pool
+
+
+def get_pool_status(engine) -> dict:
+    """
+    Snapshot of the pool behind ``engine`` for the health endpoints.
+    """
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "pool_size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update({
+            "checkouts": stats.checkouts,
+            "timeouts": stats.timeouts,
+            "invalidations": stats.invalidations,
+            "wait_avg_ms": round(stats.wait_total / stats.checkouts * 1000, 3) if stats.checkouts else 0.0,
+            "wait_max_ms": round(stats.wait_max * 1000, 3),
+        })
+    return status
@@ -0,0 +1,194 @@
+import cProfile
+import io
+import itertools
+import marshal
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from jose import JWTError, jwt
+
+from app.core.config import SECRET_KEY, ALGORITHM, PROFILE_SAMPLE_RATE, PROFILE_BUFFER_SIZE
+from app.core.sql_instrumentation import current_request_stats
+from app.core.token_revocation import revocation_registry
+import logging
+
+logger = logging.getLogger("lms_backend.core.profiling")
+
+PROFILE_HEADER = b"x-profile"
+
+# Functions whose cumulative time counts as response serialisation
+_SERIALIZATION_FUNCTIONS = {
+    ("fastapi/routing.py", "serialize_response"),
+    ("fastapi/encoders.py", "jsonable_encoder"),
+    ("starlette/responses.py", "render"),
+}
+
+
+class RequestProfile:
+    def __init__(self, profile_id: int, method: str, path: str, route: Optional[str], status: int,
+                 trigger: str, wall_time: float, sql_time: float, sql_count: int, stats: pstats.Stats):
+        self.id = profile_id
+        self.created_at = datetime.now(timezone.utc)
+        self.method = method
+        self.path = path
+        self.route = route
+        self.status = status
+        self.trigger = trigger
+        self.wall_time = wall_time
+        self.sql_time = sql_time
+        self.sql_count = sql_count
+        self.serialization_time = _serialization_time(stats)
+        self.raw_stats = marshal.dumps(stats.stats)
+        text = io.StringIO()
+        stats.stream = text
+        stats.sort_stats("cumulative").print_stats(40)
+        self.report = text.getvalue()
+
+    def summary(self) -> dict:
+        python_time = max(0.0, self.wall_time - self.sql_time - self.serialization_time)
+        return {
+            "id": self.id,
+            "created_at": self.created_at,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "trigger": self.trigger,
+            "wall_ms": round(self.wall_time * 1000, 2),
+            "sql_ms": round(self.sql_time * 1000, 2),
+            "sql_statements": self.sql_count,
+            # Includes lazy loads fired while serialising, which also count as SQL
+            "serialization_ms": round(self.serialization_time * 1000, 2),
+            "python_ms": round(python_time * 1000, 2),
+        }
+
+
+def _serialization_time(stats: pstats.Stats) -> float:
+    total = 0.0
+    for (filename, _, function), (_, _, _, cumulative, _) in stats.stats.items():
+        for suffix, name in _SERIALIZATION_FUNCTIONS:
+            if function == name and filename.replace("\\", "/").endswith(suffix):
+                total = max(total, cumulative)
+    return total
+
+
+class ProfileStore:
+    """
+    Bounded ring buffer of the most recent request profiles of this worker.
+    """
+
+    def __init__(self, size: int = PROFILE_BUFFER_SIZE):
+        self._profiles = deque(maxlen=size)
+        self._ids = itertools.count(1)
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def add(self, profile: RequestProfile):
+        self._profiles.append(profile)
+
+    def list(self) -> List[RequestProfile]:
+        return list(reversed(self._profiles))
+
+    def get(self, profile_id: int) -> Optional[RequestProfile]:
+        for profile in self._profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+
+profile_store = ProfileStore()
+
+
+def _is_admin_request(scope) -> bool:
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return False
+            try:
+                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            except JWTError:
+                return False
+            return payload.get("role") == "Admin" and not revocation_registry.is_revoked(payload.get("jti"))
+    return False
+
+
+class ProfilingMiddleware:
+    """
+    Runs selected requests under cProfile and keeps the result in
+    ``profile_store``. A request is profiled when an admin sends
+    ``X-Profile: 1`` or when it is picked by PROFILE_SAMPLE_RATE.
+
+    On Python 3.12+ cProfile observes every thread, so sync handlers running in
+    the threadpool are included. Only one profiler can be active per process:
+    while one request is being profiled, other candidates run unprofiled.
+    """
+
+    def __init__(self, app, sample_rate: float = PROFILE_SAMPLE_RATE, store: ProfileStore = profile_store):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.store = store
+        self._busy = threading.Lock()
+
+    def _trigger(self, scope) -> Optional[str]:
+        for name, value in scope.get("headers", []):
+            if name == PROFILE_HEADER and value not in (b"", b"0", b"false"):
+                return "header" if _is_admin_request(scope) else None
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trigger = self._trigger(scope)
+        if trigger is None or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        profile_id = self.store.next_id()
+        status = [500]
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if trigger == "header":
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", str(profile_id).encode())]
+            await send(message)
+
+        stats_before = current_request_stats()
+        sql_time_before = stats_before.total_time if stats_before else 0.0
+        sql_count_before = stats_before.count if stats_before else 0
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiling tool (e.g. a debugger) is active
+            self._busy.release()
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.disable()
+            wall_time = time.perf_counter() - start
+            self._busy.release()
+            stats = current_request_stats()
+            route = scope.get("route")
+            try:
+                self.store.add(RequestProfile(
+                    profile_id, scope["method"], scope["path"], getattr(route, "path", None), status[0], trigger,
+                    wall_time,
+                    (stats.total_time - sql_time_before) if stats else 0.0,
+                    (stats.count - sql_count_before) if stats else 0,
+                    pstats.Stats(profiler),
+                ))
+            except Exception as e:
+                logger.error("Storing request profile failed: %s", e)
@@ -0,0 +1,74 @@
+import re
+from contextlib import contextmanager
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+
+@contextmanager
+def capture_statements(engine: Engine):
+    """
+    Collect the (statement, parameters) pairs ``engine`` sends to the DBAPI
+    while the block runs, so that they can be EXPLAINed afterwards.
+    """
+    captured: List[Tuple[str, object]] = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+
+def explain(connection: Connection, statement: str, parameters=None) -> List[str]:
+    """
+    Query plan of ``statement`` as one line per plan step: SQLite's
+    EXPLAIN QUERY PLAN details, or table/access type/key/Extra from MySQL's
+    EXPLAIN. Row estimates are left out so that plans can be compared
+    across runs.
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters or ()).fetchall()
+        return [row[3] for row in rows]
+    if dialect == "mysql":
+        result = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters or ())
+        return [
+            f"{row['table']}: type={row['type']} key={row['key']} extra={row['Extra'] or ''}"
+            for row in result.mappings()
+        ]
+    raise NotImplementedError(f"EXPLAIN is not supported for dialect {dialect}")
+
+
+def uses_index(plan: List[str], index_name: str) -> bool:
+    return any(index_name in step for step in plan)
+
+
+def sorts_without_index(plan: List[str]) -> bool:
+    """
+    True when the plan sorts rows itself instead of reading them in index order.
+    """
+    return any("TEMP B-TREE FOR ORDER BY" in step or "Using filesort" in step for step in plan)
+
+
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)")
+_MYSQL_SCAN = re.compile(r"^(\w+): type=(ALL|index) ")
+
+
+def full_scans(plan: List[str], tables: Iterable[str]) -> List[str]:
+    """
+    Plan steps that read all of one of ``tables`` (table or full index scan).
+    ORM aliases such as ``users_1`` count as the table.
+    """
+    tables = set(tables)
+    scans = []
+    for step in plan:
+        match = _SQLITE_SCAN.match(step) or _MYSQL_SCAN.match(step)
+        if match and re.sub(r"_\d+$", "", match.group(1)) in tables:
+            scans.append(step)
+    return scans
@@ -0,0 +1,204 @@
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Mapping, Optional, Tuple
+
+import numpy as np
+
+from app.core.cache import InvalidationBus, invalidation_bus
+from app.core.config import REFERENCE_DATA_TTL_SECONDS
+from app.core.metrics import cache_requests_total
+import logging
+
+logger = logging.getLogger("lms_backend.core.reference_data")
+
+
+@dataclass(frozen=True, slots=True)
+class SkillRef:
+    id: int
+    name: str
+    description: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class ProficiencyLevelRef:
+    id: int
+    name: str
+    description: Optional[str]
+    rank: int
+
+
+@dataclass(frozen=True, slots=True)
+class ProjectRoleRef:
+    id: int
+    name: str
+    description: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class RoleSkillRequirementRef:
+    id: int
+    project_role_id: int
+    skill_id: int
+    min_proficiency_level_id: int
+    is_mandatory: bool
+
+
+@dataclass(frozen=True, slots=True)
+class CourseRef:
+    id: int
+    name: str
+    skill_id: Optional[int]
+    recommended_proficiency_level_id: Optional[int]
+    duration_hours: Optional[int]
+    provider: Optional[str]
+
+
+def _course_order(course: CourseRef, level_ranks: Mapping[int, int]):
+    # Lowest level first, then shortest; courses without a level or duration last
+    rank = level_ranks.get(course.recommended_proficiency_level_id)
+    return (rank is None, rank or 0, course.duration_hours is None, course.duration_hours or 0, course.id)
+
+
+class ReferenceSnapshot:
+    """
+    Immutable view of skills, proficiency levels, project roles, role skill
+    requirements and the course catalogue with id and name maps. Never
+    modified after construction; a write produces a new snapshot with a
+    higher version.
+    """
+
+    def __init__(self, version: int, skills, proficiency_levels, project_roles, role_skill_requirements,
+                 courses=()):
+        self.version = version
+        self.loaded_at = time.time()
+        self.skills: Mapping[int, SkillRef] = MappingProxyType({s.id: s for s in skills})
+        self.skills_by_name: Mapping[str, SkillRef] = MappingProxyType({s.name: s for s in skills})
+        self.proficiency_levels: Mapping[int, ProficiencyLevelRef] = MappingProxyType({p.id: p for p in proficiency_levels})
+        self.proficiency_levels_by_name: Mapping[str, ProficiencyLevelRef] = MappingProxyType({p.name: p for p in proficiency_levels})
+        # level id -> 1-based position of its rank among the distinct ranks,
+        # so that rank differences count levels even if the stored ranks skip
+        positions = {rank: position for position, rank in enumerate(sorted({p.rank for p in proficiency_levels}), 1)}
+        self.level_ranks: Mapping[int, int] = MappingProxyType({p.id: positions[p.rank] for p in proficiency_levels})
+        self._rank_table = np.zeros(max(self.level_ranks, default=0) + 1, dtype=np.int8)
+        self._rank_table[list(self.level_ranks)] = list(self.level_ranks.values())
+        self.project_roles: Mapping[int, ProjectRoleRef] = MappingProxyType({r.id: r for r in project_roles})
+        self.project_roles_by_name: Mapping[str, ProjectRoleRef] = MappingProxyType({r.name: r for r in project_roles})
+        self.role_skill_requirements: Mapping[int, RoleSkillRequirementRef] = MappingProxyType(
+            {r.id: r for r in role_skill_requirements})
+        by_role = {}
+        for requirement in role_skill_requirements:
+            by_role.setdefault(requirement.project_role_id, []).append(requirement)
+        self.requirements_by_role: Mapping[int, Tuple[RoleSkillRequirementRef, ...]] = MappingProxyType(
+            {role_id: tuple(requirements) for role_id, requirements in by_role.items()})
+        self.courses: Mapping[int, CourseRef] = MappingProxyType({c.id: c for c in courses})
+        by_skill = {}
+        for course in sorted(courses, key=lambda course: _course_order(course, self.level_ranks)):
+            if course.skill_id is not None:
+                by_skill.setdefault(course.skill_id, []).append(course)
+        # skill id -> its courses by level rank, then duration
+        self.courses_by_skill: Mapping[int, Tuple[CourseRef, ...]] = MappingProxyType(
+            {skill_id: tuple(skill_courses) for skill_id, skill_courses in by_skill.items()})
+
+    def level_rank(self, proficiency_level_id: Optional[int]) -> int:
+        """
+        Position of a level in the scale, 1 = lowest; 0 for none or an
+        unknown id. Compare levels by this, never by id.
+        """
+        return self.level_ranks.get(proficiency_level_id, 0)
+
+    def level_ranks_of(self, proficiency_level_ids: np.ndarray) -> np.ndarray:
+        """
+        level_rank of each id in an integer array, as int8.
+        """
+        ids = np.asarray(proficiency_level_ids)
+        known = (ids >= 0) & (ids < len(self._rank_table))
+        return np.where(known, self._rank_table[np.where(known, ids, 0)], 0).astype(np.int8)
+
+    def requirements_for_role(self, project_role_id: int) -> Tuple[RoleSkillRequirementRef, ...]:
+        return self.requirements_by_role.get(project_role_id, ())
+
+    def courses_for_skill(self, skill_id: int) -> Tuple[CourseRef, ...]:
+        return self.courses_by_skill.get(skill_id, ())
+
+
+def load_snapshot(db, version: int) -> ReferenceSnapshot:
+    import app.models.models as models
+    return ReferenceSnapshot(
+        version,
+        [SkillRef(s.id, s.name, s.description) for s in db.query(models.Skill).order_by(models.Skill.id)],
+        [ProficiencyLevelRef(p.id, p.name, p.description, p.rank)
+         for p in db.query(models.ProficiencyLevel).order_by(models.ProficiencyLevel.id)],
+        [ProjectRoleRef(r.id, r.name, r.description) for r in db.query(models.ProjectRole).order_by(models.ProjectRole.id)],
+        [RoleSkillRequirementRef(r.id, r.project_role_id, r.skill_id, r.min_proficiency_level_id, r.is_mandatory)
+         for r in db.query(models.RoleSkillRequirement).order_by(models.RoleSkillRequirement.id)],
+        [CourseRef(c.id, c.name, c.skill_id, c.recommended_proficiency_level_id, c.duration_hours, c.provider)
+         for c in db.query(models.Course).order_by(models.Course.id)],
+    )
+
+
+class ReferenceDataCache:
+    """
+    Process-local holder of the current ReferenceSnapshot. Readers take the
+    snapshot reference once and use it without locking; ``refresh`` builds
+    a complete new snapshot and swaps it in with a single assignment, so a
+    reader never sees a half-updated state.
+
+    Admin writes to these tables call ``invalidate`` after their commit:
+    this worker rebuilds at once, the others drop their snapshot when the
+    invalidation bus delivers the message and reload on next use. ``ttl``
+    bounds the staleness if a message is lost.
+    """
+
+    namespace = "reference_data"
+
+    def __init__(self, session_factory: Optional[Callable] = None, ttl: int = REFERENCE_DATA_TTL_SECONDS,
+                 bus: InvalidationBus = invalidation_bus):
+        self._session_factory = session_factory
+        self.ttl = ttl
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._versions = itertools.count(1)
+        self._lock = threading.Lock()
+        self.bus = bus
+        self.bus.subscribe(self.namespace, lambda key: self.clear())
+
+    def _new_session(self):
+        if self._session_factory is None:
+            # Always read the primary so a refresh right after a write sees it
+            from app.core.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def get(self) -> ReferenceSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and (not self.ttl or time.time() - snapshot.loaded_at < self.ttl):
+            cache_requests_total.labels("reference_data", "hit").inc()
+            return snapshot
+        cache_requests_total.labels("reference_data", "miss").inc()
+        with self._lock:
+            if self._snapshot is not snapshot and self._snapshot is not None:
+                return self._snapshot
+            return self._load()
+
+    def refresh(self) -> ReferenceSnapshot:
+        with self._lock:
+            return self._load()
+
+    def invalidate(self) -> ReferenceSnapshot:
+        self.bus.publish(self.namespace)
+        return self.refresh()
+
+    def _load(self) -> ReferenceSnapshot:
+        with self._new_session() as db:
+            snapshot = load_snapshot(db, next(self._versions))
+        self._snapshot = snapshot
+        logger.debug("Loaded reference data snapshot v%s", snapshot.version)
+        return snapshot
+
+    def clear(self):
+        self._snapshot = None
+
+
+reference_data = ReferenceDataCache()
@@ -0,0 +1,75 @@
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.engines import EngineRegistry
+import logging
+
+logger = logging.getLogger("lms_backend.core.replicas")
+
+
+class ReplicaRouter:
+    """
+    Round-robin selection over the replica engines of an EngineRegistry.
+
+    A replica whose connections fail is ejected for ``eject_seconds`` and
+    skipped until then. With no replicas configured, or none healthy, reads
+    fall back to the primary engine.
+    """
+
+    def __init__(self, registry: EngineRegistry, replica_names: List[str], primary_name: str = "oltp",
+                 eject_seconds: int = 30):
+        self.registry = registry
+        self.replica_names = list(replica_names)
+        self.primary_name = primary_name
+        self.eject_seconds = eject_seconds
+        self._counter = itertools.count()
+        self._ejected_until: Dict[str, float] = {}
+        self._instrumented = set()
+        self._lock = threading.Lock()
+
+    def eject(self, name: str):
+        logger.warning("Ejecting replica '%s' for %ss", name, self.eject_seconds)
+        self._ejected_until[name] = time.monotonic() + self.eject_seconds
+
+    def healthy(self) -> List[str]:
+        now = time.monotonic()
+        return [name for name in self.replica_names if self._ejected_until.get(name, 0) <= now]
+
+    def choose(self) -> str:
+        healthy = self.healthy()
+        if not healthy:
+            return self.primary_name
+        return healthy[next(self._counter) % len(healthy)]
+
+    def get_engine(self) -> Engine:
+        name = self.choose()
+        engine = self.registry.get(name)
+        if name != self.primary_name and name not in self._instrumented:
+            self._watch(name, engine)
+        return engine
+
+    def _watch(self, name: str, engine: Engine):
+        with self._lock:
+            if name in self._instrumented:
+                return
+            self._instrumented.add(name)
+
+        @event.listens_for(engine, "handle_error")
+        def _eject_on_failure(context):
+            if context.is_disconnect or context.connection is None:
+                self.eject(name)
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        return {
+            name: {
+                "healthy": self._ejected_until.get(name, 0) <= now,
+                "ejected_for_s": max(0.0, round(self._ejected_until.get(name, 0) - now, 1)),
+            }
+            for name in self.replica_names
+        }
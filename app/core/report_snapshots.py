@@ -0,0 +1,161 @@
+import json
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+import app.models.models as models
+from app.core.config import REPORT_SNAPSHOT_RETENTION
+from app.core.database import SessionLocal
+import logging
+
+logger = logging.getLogger("lms_backend.core.report_snapshots")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    report: str
+    computed_at: datetime  # naive UTC, as stored
+    body: bytes            # the JSON response, ready to send
+
+
+@dataclass(frozen=True)
+class ScheduledReport:
+    name: str
+    items_key: str
+    compute: Callable[[Session], List[dict]]
+    interval: int
+
+
+class ReportSnapshotter:
+    """
+    Precomputed admin reports. Each registered report is recomputed every
+    ``interval`` seconds by a background thread and stored in
+    ``report_snapshots`` with its timestamp; the endpoint serves the latest
+    one from memory as ready-encoded JSON.
+
+    Workers share the table: before recomputing, a worker adopts a snapshot
+    another worker stored within the interval, so the work is usually done
+    once per interval, not once per worker. ``recompute`` is the live path
+    behind ``fresh=true``.
+    """
+
+    def __init__(self, retention: int = REPORT_SNAPSHOT_RETENTION):
+        self.retention = retention
+        self._reports: Dict[str, ScheduledReport] = {}
+        self._latest: Dict[str, Snapshot] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, items_key: str, compute: Callable[[Session], List[dict]], interval: int):
+        self._reports[name] = ScheduledReport(name, items_key, compute, interval)
+
+    def get(self, db: Session, name: str) -> Snapshot:
+        """
+        Latest snapshot: from memory, else the newest stored one, else
+        computed now (e.g. right after startup).
+        """
+        snapshot = self._latest.get(name)
+        if snapshot is None:
+            snapshot = self.load(db, name) or self.recompute(db, name)
+        return snapshot
+
+    def load(self, db: Session, name: str) -> Optional[Snapshot]:
+        row = (
+            db.query(models.ReportSnapshot)
+            .filter(models.ReportSnapshot.report == name)
+            .order_by(models.ReportSnapshot.computed_at.desc())
+            .first()
+        )
+        if row is None:
+            return None
+        return self._keep(Snapshot(name, row.computed_at, row.payload.encode()))
+
+    def recompute(self, db: Session, name: str) -> Snapshot:
+        report = self._reports[name]
+        start = time.perf_counter()
+        computed_at = _utcnow()
+        items = report.compute(db)
+        payload = json.dumps({
+            "report_date": computed_at.replace(tzinfo=timezone.utc).isoformat(),
+            report.items_key: items,
+        })
+        db.add(models.ReportSnapshot(report=name, computed_at=computed_at, payload=payload))
+        db.flush()
+        self._prune(db, name)
+        db.commit()
+        logger.info("Report %s recomputed in %.1f ms (%s items)", name, (time.perf_counter() - start) * 1000, len(items))
+        return self._keep(Snapshot(name, computed_at, payload.encode()))
+
+    def _keep(self, snapshot: Snapshot) -> Snapshot:
+        with self._lock:
+            current = self._latest.get(snapshot.report)
+            if current is None or current.computed_at <= snapshot.computed_at:
+                self._latest[snapshot.report] = snapshot
+            return self._latest[snapshot.report]
+
+    def _prune(self, db: Session, name: str):
+        keep = (
+            db.query(models.ReportSnapshot.computed_at)
+            .filter(models.ReportSnapshot.report == name)
+            .order_by(models.ReportSnapshot.computed_at.desc())
+            .offset(self.retention - 1)
+            .limit(1)
+            .scalar()
+        )
+        if keep is not None:
+            db.query(models.ReportSnapshot).filter(
+                models.ReportSnapshot.report == name, models.ReportSnapshot.computed_at < keep
+            ).delete(synchronize_session=False)
+
+    def refresh_due(self, db: Session) -> float:
+        """
+        Recompute every report whose newest stored snapshot is older than its
+        interval; adopt the stored one otherwise. Returns the seconds until
+        the next one is due.
+        """
+        next_due = min(report.interval for report in self._reports.values())
+        for report in self._reports.values():
+            snapshot = self.load(db, report.name)
+            if snapshot is None or snapshot.computed_at <= _utcnow() - timedelta(seconds=report.interval):
+                snapshot = self.recompute(db, report.name)
+            due = snapshot.computed_at + timedelta(seconds=report.interval) - _utcnow()
+            next_due = min(next_due, due.total_seconds())
+        return max(next_due, 1.0)
+
+    def _run(self):
+        while not self._stop.is_set():
+            wait = min(report.interval for report in self._reports.values())
+            db = SessionLocal()
+            try:
+                wait = self.refresh_due(db)
+            except Exception as e:
+                db.rollback()
+                logger.error("Report snapshot refresh failed: %s", e)
+            finally:
+                db.close()
+            self._stop.wait(wait)
+
+    def start(self):
+        if not self._reports or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="report-snapshots", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+report_snapshots = ReportSnapshotter()
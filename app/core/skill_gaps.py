@@ -0,0 +1,238 @@
+"""
+Maintenance of the materialized skill_gaps table (models.SkillGap).
+
+A row holds one requirement of a user's current project role next to the
+user's proficiency in that skill. The rows of a user depend on their
+current_project_role_id, their user_skills and their role's
+role_skill_requirements; whenever a flush changes one of those, the rows of
+the affected users (or of every user in an affected role) are replaced in
+the same transaction, so a committed write and its gap rows are never seen
+apart. Bulk Core statements bypass the flush and need a ``rebuild``.
+
+    python -m app.core.skill_gaps rebuild
+    python -m app.core.skill_gaps check [--fix] [--limit 20]
+"""
+import argparse
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+from sqlalchemy import and_, delete, event, func, inspect, insert, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session, aliased
+
+import app.models.models as models
+from app.core.config import SKILL_GAPS_BATCH_SIZE
+import logging
+
+logger = logging.getLogger("lms_backend.core.skill_gaps")
+
+COLUMNS = ("user_id", "requirement_id", "project_role_id", "skill_id", "required_level_id", "current_level_id",
+           "is_mandatory", "gap")
+
+_PENDING = "skill_gaps_pending"
+
+
+def computed_rows(*criteria):
+    """
+    SELECT of the rows skill_gaps should hold for the users matching
+    ``criteria``. Proficiency levels compare by rank, not id; a missing user
+    skill ranks below every level.
+    """
+    user_skill = models.UserSkill
+    requirement = models.RoleSkillRequirement
+    required_level = aliased(models.ProficiencyLevel)
+    current_level = aliased(models.ProficiencyLevel)
+    return (
+        select(
+            models.User.id,
+            requirement.id,
+            requirement.project_role_id,
+            requirement.skill_id,
+            requirement.min_proficiency_level_id,
+            user_skill.proficiency_level_id,
+            requirement.is_mandatory,
+            current_level.rank.is_(None) | (current_level.rank < required_level.rank),
+        )
+        .select_from(models.User)
+        .join(requirement, requirement.project_role_id == models.User.current_project_role_id)
+        .join(required_level, required_level.id == requirement.min_proficiency_level_id)
+        .outerjoin(user_skill, and_(user_skill.user_id == models.User.id, user_skill.skill_id == requirement.skill_id))
+        .outerjoin(current_level, current_level.id == user_skill.proficiency_level_id)
+        .where(*criteria)
+    )
+
+
+def _replace(connection: Connection, stored_criterion, user_criterion) -> int:
+    table = models.SkillGap.__table__
+    connection.execute(delete(table).where(stored_criterion))
+    result = connection.execute(insert(table).from_select(COLUMNS, computed_rows(user_criterion)))
+    return max(result.rowcount, 0)
+
+
+def _chunks(ids: Iterable[int], size: int) -> Iterator[List[int]]:
+    ids = sorted(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def refresh_users(connection: Connection, user_ids: Iterable[int], batch_size: int = SKILL_GAPS_BATCH_SIZE) -> int:
+    count = 0
+    for chunk in _chunks(user_ids, batch_size):
+        count += _replace(connection, models.SkillGap.user_id.in_(chunk), models.User.id.in_(chunk))
+    return count
+
+
+def refresh_roles(connection: Connection, project_role_ids: Iterable[int]) -> int:
+    """
+    Rows of every user currently in one of the roles, after a change to the
+    roles' requirements.
+    """
+    project_role_ids = sorted(project_role_ids)
+    return _replace(connection, models.SkillGap.project_role_id.in_(project_role_ids),
+                    models.User.current_project_role_id.in_(project_role_ids))
+
+
+def _user_id_ranges(connection: Connection, batch_size: int) -> Iterator[Tuple[int, int]]:
+    low, high = connection.execute(select(func.min(models.User.id), func.max(models.User.id))).one()
+    stored_low, stored_high = connection.execute(
+        select(func.min(models.SkillGap.user_id), func.max(models.SkillGap.user_id))).one()
+    bounds = [value for value in (low, high, stored_low, stored_high) if value is not None]
+    if not bounds:
+        return
+    for start in range(min(bounds), max(bounds) + 1, batch_size):
+        yield start, start + batch_size - 1
+
+
+def rebuild(bind: Union[Engine, Connection], batch_size: int = SKILL_GAPS_BATCH_SIZE) -> int:
+    """
+    Recompute the whole table, ``batch_size`` user ids at a time. Given an
+    Engine every batch commits on its own, so readers keep seeing complete
+    rows for all other users; given a Connection it runs in the caller's
+    transaction. Returns the number of rows written.
+    """
+    if isinstance(bind, Engine):
+        with bind.connect() as connection:
+            ranges = list(_user_id_ranges(connection, batch_size))
+    else:
+        ranges = list(_user_id_ranges(bind, batch_size))
+    count = 0
+    for low, high in ranges:
+        if isinstance(bind, Engine):
+            with bind.begin() as connection:
+                count += _replace(connection, models.SkillGap.user_id.between(low, high), models.User.id.between(low, high))
+        else:
+            count += _replace(bind, models.SkillGap.user_id.between(low, high), models.User.id.between(low, high))
+    logger.info("Rebuilt skill_gaps: %s rows", count)
+    return count
+
+
+class Mismatch(NamedTuple):
+    user_id: int
+    requirement_id: int
+    stored: Optional[tuple]
+    expected: Optional[tuple]
+
+
+def _normalize(row) -> tuple:
+    values = tuple(row)
+    return values[:6] + (bool(values[6]), bool(values[7]))
+
+
+def check(connection: Connection, batch_size: int = SKILL_GAPS_BATCH_SIZE) -> Iterator[Mismatch]:
+    """
+    Compare the stored rows with a fresh computation, one range of user ids
+    at a time. Yields a Mismatch per missing, extra or differing row
+    (``stored`` or ``expected`` is None for a missing or extra row).
+    """
+    table = models.SkillGap.__table__
+    for low, high in list(_user_id_ranges(connection, batch_size)):
+        stored: Dict[tuple, tuple] = {
+            row[:2]: row for row in map(_normalize, connection.execute(
+                select(*(table.c[column] for column in COLUMNS)).where(table.c.user_id.between(low, high))))
+        }
+        expected: Dict[tuple, tuple] = {
+            row[:2]: row for row in map(_normalize, connection.execute(
+                computed_rows(models.User.id.between(low, high))))
+        }
+        for key in sorted(stored.keys() | expected.keys()):
+            if stored.get(key) != expected.get(key):
+                yield Mismatch(key[0], key[1], stored.get(key), expected.get(key))
+
+
+# --- incremental maintenance ---------------------------------------------------
+
+def _values(obj, attribute: str) -> Set[int]:
+    """
+    Current and, if the flush changed it, previous value of ``attribute``.
+    """
+    history = inspect(obj).attrs[attribute].history
+    return {value for value in chain(history.added, history.unchanged, history.deleted) if value is not None}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context):
+    # new/dirty/deleted and the attribute history still describe this flush
+    users: Set[int] = set()
+    roles: Set[int] = set()
+    dirty = [obj for obj in session.dirty if session.is_modified(obj)]
+    for obj in chain(session.new, dirty, session.deleted):
+        if isinstance(obj, models.UserSkill):
+            users.update(_values(obj, "user_id"))
+        elif isinstance(obj, models.RoleSkillRequirement):
+            roles.update(_values(obj, "project_role_id"))
+    for obj in chain(session.new, session.deleted):
+        if isinstance(obj, models.User):
+            users.add(obj.id)
+    for obj in dirty:
+        if isinstance(obj, models.User) and inspect(obj).attrs.current_project_role_id.history.has_changes():
+            users.add(obj.id)
+    if users or roles:
+        session.info[_PENDING] = (users, roles)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _apply_changes(session: Session, flush_context):
+    users, roles = session.info.pop(_PENDING, (set(), set()))
+    if not users and not roles:
+        return
+    connection = session.connection()
+    if roles:
+        refresh_roles(connection, roles)
+    if users:
+        refresh_users(connection, users)
+    logger.debug("Refreshed skill_gaps for %s user(s) and %s role(s)", len(users), len(roles))
+
+
+def main():
+    from app.core.database import engine
+
+    parser = argparse.ArgumentParser(description="Rebuild or verify the materialized skill_gaps table.")
+    parser.add_argument("--batch-size", type=int, default=SKILL_GAPS_BATCH_SIZE, help="User ids per transaction")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild", help="Recompute every row")
+    check_parser = subparsers.add_parser("check", help="Compare the stored rows with a fresh computation")
+    check_parser.add_argument("--fix", action="store_true", help="Refresh the users with differences")
+    check_parser.add_argument("--limit", type=int, default=20, help="Differences to print")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        print(f"Rebuilt skill_gaps: {rebuild(engine, args.batch_size)} rows")
+        return
+
+    with engine.connect() as connection:
+        mismatches = list(check(connection, args.batch_size))
+    for mismatch in mismatches[:args.limit]:
+        print(f"user {mismatch.user_id} requirement {mismatch.requirement_id}: "
+              f"stored {mismatch.stored} expected {mismatch.expected}")
+    users = {mismatch.user_id for mismatch in mismatches}
+    print(f"{len(mismatches)} difference(s) for {len(users)} user(s)")
+    if mismatches and args.fix:
+        with engine.begin() as connection:
+            refresh_users(connection, users, args.batch_size)
+        print(f"Refreshed {len(users)} user(s)")
+        return
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
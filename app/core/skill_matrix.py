@@ -0,0 +1,417 @@
+"""
+In-process users x skills proficiency matrix for capability queries such as
+"SQL >= Proficient and Angular >= Intermediate in role X".
+
+Levels are stored skill-major as int8 (``levels[skill_row, user_slot]``,
+the level's rank from the reference snapshot, 1 = lowest, 0 = no such
+skill), so each condition of a query is one
+contiguous comparison ANDed into a boolean mask over all users: a few
+microseconds per condition for 100k users, against a multi-join query.
+
+The same rows serve as a sparse index for cosine similarity between users'
+level vectors: a user's dot products with everyone only read the rows of
+the skills that user has, and per-user norms are kept next to the levels.
+Results give level ids again.
+
+The matrix is loaded on first use. A committed flush that touches
+user_skills or users publishes the affected user ids on the invalidation bus;
+every worker, this one included, marks them dirty and reloads their rows in
+one query before its next search. Bulk Core statements bypass the flush;
+SKILL_MATRIX_TTL_SECONDS bounds how long such a change goes unnoticed. A
+change to the ranks of the levels reloads the whole matrix.
+"""
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Callable, Dict, Iterable, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+import app.models.models as models
+from app.core.cache import InvalidationBus, invalidation_bus
+from app.core.config import SKILL_MATRIX_TTL_SECONDS
+from app.core.metrics import cache_requests_total, skill_matrix_bytes
+from app.core.reference_data import ReferenceDataCache, reference_data
+import logging
+
+logger = logging.getLogger("lms_backend.core.skill_matrix")
+
+_PENDING = "skill_matrix_pending"
+_RELOAD = "*"
+_QUERY_CHUNK = 1000
+
+
+@dataclass
+class _State:
+    """
+    Arrays of one load. ``refresh_users`` updates them in place; when a new
+    user or skill does not fit, a grown copy replaces the whole state, so a
+    reader holding the previous one keeps consistent shapes.
+    """
+    levels: np.ndarray      # (skills, capacity) int8 level rank
+    roles: np.ndarray       # (capacity,) int32 project role id, 0 = none
+    active: np.ndarray      # (capacity,) bool, False for unused and deleted slots
+    user_ids: np.ndarray    # (capacity,) int64
+    norms: np.ndarray       # (capacity,) float32 Euclidean norm of each user's levels
+    size: int               # slots in use
+    level_ranks: Mapping[int, int]  # level id -> rank, as of the load
+    rank_levels: np.ndarray  # rank -> level id (the lowest of equal ranks), 0 -> 0
+    user_index: Dict[int, int] = field(default_factory=dict)
+    skill_index: Dict[int, int] = field(default_factory=dict)
+    loaded_at: float = field(default_factory=time.time)
+
+    @property
+    def nbytes(self) -> int:
+        # Dicts: the table plus two small ints per entry (keys above 256 are not shared)
+        maps = sum(sys.getsizeof(index) + len(index) * 2 * sys.getsizeof(1 << 20)
+                   for index in (self.user_index, self.skill_index))
+        arrays = (self.levels, self.roles, self.active, self.user_ids, self.norms, self.rank_levels)
+        return sum(array.nbytes for array in arrays) + maps
+
+
+def _positions(sorted_ids: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Index of each of ``values`` in ``sorted_ids`` and whether it is there.
+    """
+    if not len(sorted_ids):
+        return np.zeros(len(values), dtype=np.intp), np.zeros(len(values), dtype=bool)
+    positions = np.searchsorted(sorted_ids, values).clip(max=len(sorted_ids) - 1)
+    return positions, sorted_ids[positions] == values
+
+
+def _rank_levels(level_ranks: Mapping[int, int]) -> np.ndarray:
+    """
+    Level id of each rank (the lowest id among equal ranks), index 0 = 0.
+    """
+    rank_levels = np.zeros(max(level_ranks.values(), default=0) + 1, dtype=np.int64)
+    for level_id, rank in sorted(level_ranks.items(), reverse=True):
+        rank_levels[rank] = level_id
+    return rank_levels
+
+
+def _page(mask: np.ndarray, offset: int, limit: int, chunk: int = 8192) -> np.ndarray:
+    """
+    Positions offset..offset+limit of the set entries of ``mask``. Scans in
+    chunks and stops once the page is complete: listing every match of a
+    broad query costs more than all the comparisons together.
+    """
+    found, skipped = [], 0
+    for start in range(0, len(mask), chunk):
+        part = mask[start:start + chunk]
+        count = int(np.count_nonzero(part))
+        if skipped + count <= offset:
+            skipped += count
+            continue
+        positions = np.flatnonzero(part) + start
+        found.append(positions[max(offset - skipped, 0):])
+        skipped += count
+        if sum(len(f) for f in found) >= limit:
+            break
+    return np.concatenate(found)[:limit] if found else np.zeros(0, dtype=np.intp)
+
+
+class SkillSearchResult(NamedTuple):
+    total: int
+    user_ids: np.ndarray    # the requested page, in slot order
+    roles: np.ndarray       # their project role ids, 0 = none
+    levels: np.ndarray      # (page, conditions) their level id in each queried skill, 0 = none
+
+
+class SimilarUsers(NamedTuple):
+    user_ids: np.ndarray    # best first
+    roles: np.ndarray
+    similarity: np.ndarray  # cosine of the level vectors, 0..1
+    shared: np.ndarray      # (k, skills of the reference user) their level ids in those skills, 0 = none
+    skill_ids: np.ndarray   # the reference user's skills, columns of ``shared``
+
+
+class SkillMatrix:
+    def __init__(self, session_factory: Optional[Callable] = None, ttl: int = SKILL_MATRIX_TTL_SECONDS,
+                 bus: InvalidationBus = invalidation_bus, reference: ReferenceDataCache = reference_data):
+        self._session_factory = session_factory
+        self.ttl = ttl
+        self.reference = reference
+        self._state: Optional[_State] = None
+        self._dirty: Set[int] = set()
+        self._lock = threading.Lock()
+        self.bus = bus
+        self.bus.subscribe(self.namespace, self._on_invalidation)
+
+    namespace = "skill_matrix"
+
+    def _new_session(self):
+        if self._session_factory is None:
+            # The primary, so a refresh right after a write sees it
+            from app.core.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    # --- maintenance -----------------------------------------------------------
+
+    def _on_invalidation(self, key: Optional[str]):
+        if key is None or key == _RELOAD:
+            self.clear()
+        else:
+            self._dirty.update(int(user_id) for user_id in key.split(","))
+
+    def invalidate_users(self, user_ids: Iterable[int]):
+        user_ids = sorted(set(user_ids))
+        for start in range(0, len(user_ids), _QUERY_CHUNK):
+            self.bus.publish(self.namespace, ",".join(map(str, user_ids[start:start + _QUERY_CHUNK])))
+
+    def clear(self):
+        self._state = None
+
+    def _load(self) -> _State:
+        start = time.perf_counter()
+        snapshot = self.reference.get()
+        with self._new_session() as db:
+            connection = db.connection()
+            users = connection.execute(
+                select(models.User.id, models.User.current_project_role_id).order_by(models.User.id)).all()
+            skill_ids = connection.execute(select(models.Skill.id).order_by(models.Skill.id)).scalars().all()
+            rows = np.fromiter(chain.from_iterable(connection.execute(
+                select(models.UserSkill.skill_id, models.UserSkill.user_id, models.UserSkill.proficiency_level_id)
+            )), dtype=np.int64).reshape(-1, 3)
+        size = len(users)
+        skill_array = np.array(skill_ids, dtype=np.int64)
+        state = _State(
+            levels=np.zeros((len(skill_ids), size), dtype=np.int8),
+            roles=np.fromiter((role or 0 for _, role in users), dtype=np.int32, count=size),
+            active=np.ones(size, dtype=bool),
+            user_ids=np.fromiter((user_id for user_id, _ in users), dtype=np.int64, count=size),
+            norms=np.zeros(size, dtype=np.float32),
+            size=size,
+            level_ranks=snapshot.level_ranks,
+            rank_levels=_rank_levels(snapshot.level_ranks),
+            user_index={user_id: slot for slot, (user_id, _) in enumerate(users)},
+            skill_index={skill_id: row for row, skill_id in enumerate(skill_ids)},
+        )
+        # Both id lists are sorted, so user_skills rows map to cells by binary search
+        skill_rows, skill_known = _positions(skill_array, rows[:, 0])
+        slots, user_known = _positions(state.user_ids, rows[:, 1])
+        known = skill_known & user_known
+        state.levels[skill_rows[known], slots[known]] = snapshot.level_ranks_of(rows[known, 2])
+        state.norms[:] = np.sqrt(np.einsum("su,su->u", state.levels, state.levels, dtype=np.float32))
+        self._state = state
+        skill_matrix_bytes.set(state.nbytes)
+        logger.info("Loaded skill matrix: %s users x %s skills, %.1f MB in %.0f ms", size, len(skill_ids),
+                    state.nbytes / 1e6, (time.perf_counter() - start) * 1000)
+        return state
+
+    def _grown(self, state: _State, users: int, skills: int) -> _State:
+        capacity = max(len(state.user_ids), 1)
+        while capacity < state.size + users:
+            capacity *= 2
+        grown = _State(
+            levels=np.zeros((len(state.skill_index) + skills, capacity), dtype=np.int8),
+            roles=np.zeros(capacity, dtype=np.int32),
+            active=np.zeros(capacity, dtype=bool),
+            user_ids=np.zeros(capacity, dtype=np.int64),
+            norms=np.zeros(capacity, dtype=np.float32),
+            size=state.size,
+            level_ranks=state.level_ranks,
+            rank_levels=state.rank_levels,
+            user_index=dict(state.user_index),
+            skill_index=dict(state.skill_index),
+            loaded_at=state.loaded_at,
+        )
+        grown.levels[:state.levels.shape[0], :state.size] = state.levels[:, :state.size]
+        for name in ("roles", "active", "user_ids", "norms"):
+            getattr(grown, name)[:state.size] = getattr(state, name)[:state.size]
+        return grown
+
+    def refresh_users(self, user_ids: Iterable[int]):
+        """
+        Re-read the role and skills of ``user_ids`` (deleted users drop out of
+        every result). Caller holds the lock.
+        """
+        user_ids = sorted(set(user_ids))
+        with self._new_session() as db:
+            connection = db.connection()
+            users, skills = {}, {}
+            for start in range(0, len(user_ids), _QUERY_CHUNK):
+                chunk = user_ids[start:start + _QUERY_CHUNK]
+                users.update(connection.execute(
+                    select(models.User.id, models.User.current_project_role_id).where(models.User.id.in_(chunk))).all())
+                for user_id, skill_id, level in connection.execute(
+                        select(models.UserSkill.user_id, models.UserSkill.skill_id, models.UserSkill.proficiency_level_id)
+                        .where(models.UserSkill.user_id.in_(chunk))):
+                    skills.setdefault(user_id, []).append((skill_id, level))
+
+        state = self._state
+        new_users = [user_id for user_id in users if user_id not in state.user_index]
+        new_skills = {skill_id for rows in skills.values() for skill_id, _ in rows} - state.skill_index.keys()
+        if state.size + len(new_users) > len(state.user_ids) or new_skills:
+            state = self._grown(state, len(new_users), len(new_skills))
+            for skill_id in sorted(new_skills):
+                state.skill_index[skill_id] = len(state.skill_index)
+        for user_id in new_users:
+            state.user_index[user_id] = state.size
+            state.user_ids[state.size] = user_id
+            state.size += 1
+
+        for user_id in user_ids:
+            slot = state.user_index.get(user_id)
+            if slot is None:
+                continue
+            column = np.zeros(state.levels.shape[0], dtype=np.int8)
+            for skill_id, level in skills.get(user_id, ()):
+                column[state.skill_index[skill_id]] = state.level_ranks.get(level, 0)
+            state.levels[:, slot] = column
+            state.norms[slot] = np.linalg.norm(column.astype(np.float32))
+            state.roles[slot] = users.get(user_id) or 0
+            state.active[slot] = user_id in users
+        self._state = state
+        skill_matrix_bytes.set(state.nbytes)
+        logger.debug("Refreshed %s user(s) in the skill matrix", len(user_ids))
+
+    def _current(self) -> _State:
+        state = self._state
+        level_ranks = self.reference.get().level_ranks
+        if (state is not None and (not self.ttl or time.time() - state.loaded_at < self.ttl) and not self._dirty
+                and state.level_ranks == level_ranks):
+            cache_requests_total.labels("skill_matrix", "hit").inc()
+            return state
+        cache_requests_total.labels("skill_matrix", "miss").inc()
+        with self._lock:
+            state = self._state
+            if (state is None or (self.ttl and time.time() - state.loaded_at >= self.ttl)
+                    or state.level_ranks != level_ranks):
+                self._dirty.clear()
+                return self._load()
+            if self._dirty:
+                # set.pop is atomic, so ids the bus adds meanwhile stay for next time
+                dirty = {self._dirty.pop() for _ in range(len(self._dirty))}
+                try:
+                    self.refresh_users(dirty)
+                except Exception:
+                    self._dirty.update(dirty)
+                    raise
+            return self._state
+
+    # --- queries -----------------------------------------------------------------
+
+    def search(self, conditions: Sequence[Tuple[int, int]], project_role_id: Optional[int] = None,
+               offset: int = 0, limit: int = 50) -> SkillSearchResult:
+        """
+        Users holding every ``(skill_id, min_level_id)`` of ``conditions``
+        (at that level's rank or above), optionally only those currently in
+        ``project_role_id``.
+        """
+        state = self._current()
+        size = state.size
+        mask = state.active[:size].copy()
+        if project_role_id is not None:
+            np.logical_and(mask, state.roles[:size] == project_role_id, out=mask)
+        rows = []
+        for skill_id, min_level_id in conditions:
+            min_level = state.level_ranks.get(min_level_id, 0)
+            row = state.skill_index.get(skill_id)
+            rows.append(row)
+            if row is None:
+                # Nobody holds the skill at any level
+                if min_level > 0:
+                    mask[:] = False
+                continue
+            np.logical_and(mask, state.levels[row, :size] >= min_level, out=mask)
+        total = int(np.count_nonzero(mask))
+        page = _page(mask, offset, limit)
+        levels = np.zeros((len(page), len(rows)), dtype=np.int8)
+        for column, row in enumerate(rows):
+            if row is not None:
+                levels[:, column] = state.levels[row, page]
+        return SkillSearchResult(total, state.user_ids[page], state.roles[page], state.rank_levels[levels])
+
+    def similar(self, user_id: int, k: int = 10, project_role_id: Optional[int] = None) -> Optional[SimilarUsers]:
+        """
+        The ``k`` users whose skill levels are most similar (cosine) to those
+        of ``user_id``, optionally only among users currently in
+        ``project_role_id``. Users sharing no skill are left out. None if
+        the user is unknown.
+        """
+        state = self._current()
+        slot = state.user_index.get(user_id)
+        if slot is None or not state.active[slot]:
+            return None
+        size = state.size
+        skill_rows = np.flatnonzero(state.levels[:, slot])
+        if not len(skill_rows):
+            return SimilarUsers(*(np.zeros(0, dtype=dtype) for dtype in (np.int64, np.int32, np.float32)),
+                                np.zeros((0, 0), dtype=np.int8), np.zeros(0, dtype=np.int64))
+        query = state.levels[skill_rows, slot].astype(np.float32)
+        if project_role_id is None:
+            candidates = np.arange(size)
+            levels, norms = state.levels[skill_rows, :size], state.norms[:size]
+            weights = state.active[:size].astype(np.float32)
+        else:
+            # A role is a small slice of the users: score only its members
+            candidates = np.flatnonzero(state.active[:size] & (state.roles[:size] == project_role_id))
+            levels, norms = state.levels[np.ix_(skill_rows, candidates)], state.norms[candidates]
+            weights = np.ones(len(candidates), dtype=np.float32)
+        weights[candidates == slot] = 0
+        # Only the reference user's skill rows contribute to the dot products
+        scores = query @ levels.astype(np.float32)
+        norms = norms * state.norms[slot]
+        np.divide(scores, norms, out=scores, where=norms > 0)
+        scores *= weights
+        top = np.argpartition(scores, -k)[-k:] if len(scores) > k else np.arange(len(scores))
+        top = top[scores[top] > 0]
+        # Best first, then by slot for a stable order among equal scores
+        top = top[np.lexsort((top, -scores[top]))]
+        slots, scores = candidates[top], scores[top]
+        skill_of_row = {row: skill_id for skill_id, row in state.skill_index.items()}
+        skill_ids = np.array([skill_of_row[row] for row in skill_rows], dtype=np.int64)
+        return SimilarUsers(state.user_ids[slots], state.roles[slots], np.minimum(scores, 1.0),
+                            state.rank_levels[state.levels[np.ix_(skill_rows, slots)].T], skill_ids)
+
+    def stats(self) -> dict:
+        state = self._current()
+        return {
+            "users": int(state.active[:state.size].sum()),
+            "skills": len(state.skill_index),
+            "memory_bytes": state.nbytes,
+            "loaded_at": state.loaded_at,
+        }
+
+
+skill_matrix = SkillMatrix()
+
+
+# --- change tracking ---------------------------------------------------------------
+
+def _user_ids(obj, attribute: str) -> Set[int]:
+    history = inspect(obj).attrs[attribute].history
+    return {value for value in chain(history.added, history.unchanged, history.deleted) if value is not None}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context):
+    users: Set[int] = set()
+    dirty = [obj for obj in session.dirty if session.is_modified(obj)]
+    for obj in chain(session.new, dirty, session.deleted):
+        if isinstance(obj, models.UserSkill):
+            users.update(_user_ids(obj, "user_id"))
+        elif isinstance(obj, models.User) and (obj in session.new or obj in session.deleted or
+                                               inspect(obj).attrs.current_project_role_id.history.has_changes()):
+            users.add(obj.id)
+        elif isinstance(obj, models.Skill) and obj in session.deleted:
+            users.add(_RELOAD)
+    if users:
+        # Kept until a commit; a rolled back change only costs a needless refresh
+        session.info.setdefault(_PENDING, set()).update(users)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session: Session):
+    users = session.info.pop(_PENDING, None)
+    if not users:
+        return
+    if _RELOAD in users:
+        skill_matrix.bus.publish(skill_matrix.namespace, _RELOAD)
+    else:
+        skill_matrix.invalidate_users(users)
@@ -0,0 +1,113 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_PARAMS_SAMPLE_RATE, DB_TIMING_HEADERS
+import logging
+
+slow_query_logger = logging.getLogger("lms_backend.sql.slow")
+
+
+class RequestQueryStats:
+    """
+    Statement count and cumulative DB time of the current request.
+    ``on_statement`` is an optional per-statement hook (see app.core.nplusone).
+    """
+    __slots__ = ("count", "total_time", "on_statement")
+
+    def __init__(self, on_statement: Optional[Callable[[str], None]] = None):
+        self.count = 0
+        self.total_time = 0.0
+        self.on_statement = on_statement
+
+
+_request_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestQueryStats]:
+    return _request_stats.get()
+
+
+@contextmanager
+def query_stats_scope(on_statement: Optional[Callable[[str], None]] = None):
+    """
+    Collect statement stats for a block of code outside of an HTTP request,
+    e.g. a script or a test calling crud functions directly.
+    """
+    stats = RequestQueryStats(on_statement)
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+def instrument_engine(engine: Engine, name: str):
+    """
+    Time every statement on ``engine``: add it to the current request's stats
+    and log it when it is slower than SLOW_QUERY_THRESHOLD_MS.
+    """
+    threshold = SLOW_QUERY_THRESHOLD_MS / 1000.0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("query_start", time.perf_counter())
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.total_time += elapsed
+            if stats.on_statement is not None:
+                stats.on_statement(statement)
+        if elapsed >= threshold:
+            if SLOW_QUERY_PARAMS_SAMPLE_RATE and random.random() < SLOW_QUERY_PARAMS_SAMPLE_RATE:
+                slow_query_logger.warning(
+                    "Slow query on %s (%.1f ms): %s | params=%r", name, elapsed * 1000, statement[:2000], parameters
+                )
+            else:
+                slow_query_logger.warning("Slow query on %s (%.1f ms): %s", name, elapsed * 1000, statement[:2000])
+
+
+class SQLTimingMiddleware:
+    """
+    ASGI middleware that opens a RequestQueryStats scope per HTTP request and,
+    when DB_TIMING_HEADERS is on, reports it as X-DB-Queries / X-DB-Time (ms).
+    An optional N+1 ``detector`` sees every statement and checks the request
+    once the handler has finished.
+    """
+
+    def __init__(self, app, add_headers: bool = DB_TIMING_HEADERS, detector=None):
+        self.app = app
+        self.add_headers = add_headers
+        self.detector = detector
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        query_log = self.detector.start_request() if self.detector else None
+        stats = RequestQueryStats(query_log)
+        token = _request_stats.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.count).encode()))
+                headers.append((b"x-db-time", f"{stats.total_time * 1000:.1f}".encode()))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers if self.add_headers else send)
+        finally:
+            _request_stats.reset(token)
+        if query_log is not None:
+            self.detector.finish_request(scope, stats, query_log)
@@ -0,0 +1,109 @@
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+import app.models.models as models
+from app.core.config import TOKEN_REVOCATION_SYNC_SECONDS
+from app.core.database import SessionLocal
+import logging
+
+logger = logging.getLogger("lms_backend.core.token_revocation")
+
+
+def _to_epoch(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class TokenRevocationRegistry:
+    """
+    Process-local set of revoked token ids (``jti``) mapped to their expiry.
+
+    The ``revoked_tokens`` table is the source of truth; every worker keeps a
+    copy in memory so that ``is_revoked`` is a dict lookup, never a query.
+    Revocations made by this worker are visible immediately, revocations made
+    by other workers show up after the next ``sync``.
+    """
+
+    def __init__(self, sync_interval: int = TOKEN_REVOCATION_SYNC_SECONDS):
+        self.sync_interval = sync_interval
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_sync: Optional[float] = None
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        if not jti:
+            return False
+        return jti in self._revoked
+
+    def revoke(self, db: Session, jti: str, sso_id: str, expires_at: datetime):
+        logger.debug("Revoking token jti=%s for %s", jti, sso_id)
+        db.merge(models.RevokedToken(jti=jti, sso_id=sso_id, expires_at=expires_at))
+        db.commit()
+        with self._lock:
+            self._revoked[jti] = _to_epoch(expires_at)
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        now = now if now is not None else time.time()
+        with self._lock:
+            expired = [jti for jti, exp in self._revoked.items() if exp <= now]
+            for jti in expired:
+                del self._revoked[jti]
+        return len(expired)
+
+    def sync(self, db: Session):
+        """
+        Reload the unexpired revocations from the database and drop rows whose
+        tokens can no longer be presented anyway.
+        """
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        rows = db.query(models.RevokedToken.jti, models.RevokedToken.expires_at).filter(
+            models.RevokedToken.expires_at > now
+        ).all()
+        fresh = {jti: _to_epoch(expires_at) for jti, expires_at in rows}
+        db.query(models.RevokedToken).filter(models.RevokedToken.expires_at <= now).delete(synchronize_session=False)
+        db.commit()
+        with self._lock:
+            # Keep local revocations that raced with the reload.
+            for jti, exp in self._revoked.items():
+                fresh.setdefault(jti, exp)
+            self._revoked = fresh
+        self.purge_expired()
+        self.last_sync = time.time()
+        logger.debug("Token revocation registry synced: %s active entries", len(self._revoked))
+
+    def _run(self):
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                self.sync(db)
+            except Exception as e:
+                logger.error("Token revocation sync failed: %s", e)
+            finally:
+                db.close()
+            self._stop.wait(self.sync_interval)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="token-revocation-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def __len__(self):
+        return len(self._revoked)
+
+
+revocation_registry = TokenRevocationRegistry()
@@ -2,9 +2,18 @@ from sqlalchemy.orm import Session
 import app.models.models as models
 import app.schemas.schemas as schemas
 from datetime import datetime, timedelta
+import uuid
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from sqlalchemy import DateTime, Integer, and_, case, func, literal, or_, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from app.core.config import (
+    SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, REPORT_BATCH_SIZE, LAGGING_GRACE_DAYS, LAGGING_COURSE_DAYS,
+    LAGGING_MIN_DAYS,
+)
+from app.core.reference_data import reference_data
+import app.core.skill_gaps  # noqa: F401 keeps skill_gaps in step with every flush
 import logging
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -22,20 +31,20 @@ def create_access_token(data: dict):
     logger.debug("Creating access token.")
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 def get_user_by_sso_id(db: Session, sso_id: str):
-    logger.debug(f"Fetching user by SSO ID: {sso_id}")
+    logger.debug("Fetching user by SSO ID: %s", sso_id)
     return db.query(models.User).filter(models.User.sso_id == sso_id).first()
 
 def get_user(db: Session, user_id: int):
-    logger.debug(f"Fetching user by ID: {user_id}")
+    logger.debug("Fetching user by ID: %s", user_id)
     return db.query(models.User).filter(models.User.id == user_id).first()
 
 def get_users(db: Session, skip: int = 0, limit: int = 100, search=None, sort_by="id", sort_order="asc"):
-    logger.debug(f"Fetching users with skip={skip}, limit={limit}, search={search}, sort_by={sort_by}, sort_order={sort_order}")
+    logger.debug("Fetching users with skip=%s, limit=%s, search=%s, sort_by=%s, sort_order=%s", skip, limit, search, sort_by, sort_order)
     query = db.query(models.User)
     if search:
         query = query.filter(
@@ -51,7 +60,7 @@ def get_users(db: Session, skip: int = 0, limit: int = 100, search=None, sort_by
     return query.offset(skip).limit(limit).all()
 
 def create_user(db: Session, user: schemas.UserCreate):
-    logger.debug(f"Creating user: {user.email}")
+    logger.debug("Creating user: %s", user.email)
     hashed_password = hash_password(user.password)
     db_user = models.User(
         sso_id=user.sso_id,
@@ -67,7 +76,7 @@ def create_user(db: Session, user: schemas.UserCreate):
     return db_user
 
 def update_user(db: Session, user_id: int, user: schemas.UserUpdate):
-    logger.debug(f"Updating user ID: {user_id}")
+    logger.debug("Updating user ID: %s", user_id)
     db_user = db.query(models.User).filter(models.User.id == user_id).first()
     if db_user:
         update_data = user.dict(exclude_unset=True)
@@ -79,7 +88,7 @@ def update_user(db: Session, user_id: int, user: schemas.UserUpdate):
     return db_user
 
 def delete_user(db: Session, user_id: int):
-    logger.debug(f"Deleting user ID: {user_id}")
+    logger.debug("Deleting user ID: %s", user_id)
     db_user = db.query(models.User).filter(models.User.id == user_id).first()
     if db_user:
         db.delete(db_user)
@@ -87,15 +96,15 @@ def delete_user(db: Session, user_id: int):
     return db_user
 
 def get_skill_by_name(db: Session, skill_name: str):
-    logger.debug(f"Fetching skill by name: {skill_name}")
-    return db.query(models.Skill).filter(models.Skill.name == skill_name).first()
+    logger.debug("Fetching skill by name: %s", skill_name)
+    return reference_data.get().skills_by_name.get(skill_name)
 
 def get_skill(db: Session, skill_id: int):
-    logger.debug(f"Fetching skill by ID: {skill_id}")
+    logger.debug("Fetching skill by ID: %s", skill_id)
     return db.query(models.Skill).filter(models.Skill.id == skill_id).first()
 
 def get_skills(db: Session, skip: int = 0, limit: int = 100, search=None, sort_by="id", sort_order="asc"):
-    logger.debug(f"Fetching skills with skip={skip}, limit={limit}, search={search}, sort_by={sort_by}, sort_order={sort_order}")
+    logger.debug("Fetching skills with skip=%s, limit=%s, search=%s, sort_by=%s, sort_order=%s", skip, limit, search, sort_by, sort_order)
     query = db.query(models.Skill)
     if search:
         query = query.filter(
@@ -118,23 +127,74 @@ def count_skills(db, search=None):
     return query.count()
 
 def create_skill(db: Session, skill: schemas.SkillCreate):
-    logger.debug(f"Creating skill: {skill.name}")
+    logger.debug("Creating skill: %s", skill.name)
     db_skill = models.Skill(name=skill.name, description=skill.description)
     db.add(db_skill)
     db.commit()
     db.refresh(db_skill)
+    reference_data.invalidate()
     return db_skill
 
+# REFERENCE DATA CRUD
+# Reads come from the in-memory snapshot (app.core.reference_data) and return
+# immutable *Ref objects; writes go to the database and then invalidate it in
+# every worker.
+
 def get_project_role_by_name(db: Session, role_name: str):
-    logger.debug(f"Fetching project role by name: {role_name}")
-    return db.query(models.ProjectRole).filter(models.ProjectRole.name == role_name).first()
+    logger.debug("Fetching project role by name: %s", role_name)
+    return reference_data.get().project_roles_by_name.get(role_name)
 
 def get_proficiency_level_by_level(db: Session, level: int):
-    logger.debug(f"Fetching proficiency level by level: {level}")
-    return db.query(models.ProficiencyLevel).filter(models.ProficiencyLevel.id == level).first()
+    logger.debug("Fetching proficiency level by level: %s", level)
+    return reference_data.get().proficiency_levels.get(level)
+
+def get_project_roles(db: Session, skip: int = 0, limit: int = 100):
+    return list(reference_data.get().project_roles.values())[skip:skip + limit]
+
+def get_project_role(db: Session, role_id: int):
+    return reference_data.get().project_roles.get(role_id)
+
+def create_project_role(db: Session, role: schemas.ProjectRoleCreate):
+    db_role = models.ProjectRole(name=role.name, description=role.description)
+    db.add(db_role)
+    db.commit()
+    db.refresh(db_role)
+    reference_data.invalidate()
+    return db_role
+
+def get_proficiency_levels(db: Session, skip: int = 0, limit: int = 100):
+    return list(reference_data.get().proficiency_levels.values())[skip:skip + limit]
+
+def get_proficiency_level(db: Session, proficiency_level_id: int):
+    return reference_data.get().proficiency_levels.get(proficiency_level_id)
+
+def create_proficiency_level(db: Session, proficiency: schemas.ProficiencyLevelCreate):
+    rank = proficiency.rank
+    if rank is None:
+        rank = (db.scalar(select(func.max(models.ProficiencyLevel.rank))) or 0) + 1
+    db_proficiency = models.ProficiencyLevel(name=proficiency.name, description=proficiency.description, rank=rank)
+    db.add(db_proficiency)
+    db.commit()
+    db.refresh(db_proficiency)
+    reference_data.invalidate()
+    return db_proficiency
+
+def get_role_skill_requirements(db: Session, skip: int = 0, limit: int = 100):
+    return list(reference_data.get().role_skill_requirements.values())[skip:skip + limit]
+
+def get_role_skill_requirement(db: Session, req_id: int):
+    return reference_data.get().role_skill_requirements.get(req_id)
+
+def create_role_skill_requirement(db: Session, req: schemas.RoleSkillRequirementCreate):
+    db_req = models.RoleSkillRequirement(**req.model_dump())
+    db.add(db_req)
+    db.commit()
+    db.refresh(db_req)
+    reference_data.invalidate()
+    return db_req
 
 def create_user_with_role(db: Session, user):
-    logger.debug(f"Creating user with role: {user.email}")
+    logger.debug("Creating user with role: %s", user.email)
     hashed_password = hash_password(user.password)
     db_user = models.User(
         sso_id=user.sso_id,
@@ -151,7 +211,7 @@ def create_user_with_role(db: Session, user):
     return db_user
 
 def upsert_user_skill(db: Session, user_id: int, skill_id: int, proficiency_level_id: int):
-    logger.debug(f"Upserting user skill: user_id={user_id}, skill_id={skill_id}, proficiency_level_id={proficiency_level_id}")
+    logger.debug("Upserting user skill: user_id=%s, skill_id=%s, proficiency_level_id=%s", user_id, skill_id, proficiency_level_id)
     user_skill = db.query(models.UserSkill).filter_by(user_id=user_id, skill_id=skill_id).first()
     if user_skill:
         user_skill.proficiency_level_id = proficiency_level_id
@@ -164,12 +224,15 @@ def upsert_user_skill(db: Session, user_id: int, skill_id: int, proficiency_leve
     return user_skill
 
 # COURSE CRUD
+# The reference data snapshot indexes courses by skill for recommendations,
+# so writes invalidate it like the other reference tables.
 
 def create_course(db, course: schemas.CourseCreate):
     db_course = models.Course(**course.dict())
     db.add(db_course)
     db.commit()
     db.refresh(db_course)
+    reference_data.invalidate()
     return db_course
 
 def get_courses(db, skip=0, limit=100, search=None, sort_by="id", sort_order="asc"):
@@ -196,6 +259,7 @@ def update_course(db, course_id: int, course: schemas.CourseUpdate):
         setattr(db_course, k, v)
     db.commit()
     db.refresh(db_course)
+    reference_data.invalidate()
     return db_course
 
 def delete_course(db, course_id: int):
@@ -204,6 +268,7 @@ def delete_course(db, course_id: int):
         return None
     db.delete(db_course)
     db.commit()
+    reference_data.invalidate()
     return db_course
 
 def count_courses(db, search=None):
@@ -230,6 +295,21 @@ def create_learning_path_with_courses(db, lp: schemas.LearningPathCreate):
     db.refresh(db_lp)
     return get_learning_path_with_details(db, db_lp.id)
 
+def create_learning_path_from_sequence(db, name: str, description, course_ids, assign_user_ids=()):
+    """
+    A learning path holding ``course_ids`` in that order (sequence_order
+    from 1), assigned to ``assign_user_ids`` as system-mandated, in one commit.
+    """
+    db_lp = models.LearningPath(name=name, description=description)
+    db.add(db_lp)
+    db.flush()
+    db.add_all([models.LearningPathCourse(learning_path_id=db_lp.id, course_id=course_id, sequence_order=position)
+                for position, course_id in enumerate(course_ids, 1)])
+    db.add_all([models.UserLearningPath(user_id=user_id, learning_path_id=db_lp.id, is_mandatory_by_system=True)
+                for user_id in assign_user_ids])
+    db.commit()
+    return get_learning_path_with_details(db, db_lp.id)
+
 def get_learning_paths_with_details(db, skip=0, limit=100, search=None, sort_by="id", sort_order="asc"):
     query = db.query(models.LearningPath)
     if search:
@@ -305,3 +385,210 @@ def count_users(db, search=None):
             (models.User.sso_id.ilike(f"%{search}%"))
         )
     return query.count()
+
+def get_users_by_project_role(db, project_role_id: int):
+    return db.query(models.User).filter(models.User.current_project_role_id == project_role_id).all()
+
+# PROGRESS CRUD
+
+def get_user_course_progress(db, user_id: int, status=None):
+    query = db.query(models.UserCourseProgress).filter(models.UserCourseProgress.user_id == user_id)
+    if status:
+        query = query.filter(models.UserCourseProgress.status == status)
+    return query.all()
+
+def get_user_learning_path(db, user_id: int, learning_path_id: int):
+    return db.query(models.UserLearningPath).filter(
+        models.UserLearningPath.user_id == user_id,
+        models.UserLearningPath.learning_path_id == learning_path_id
+    ).first()
+
+def get_learning_path_courses(db, learning_path_id: int):
+    return db.query(models.LearningPathCourse).filter(
+        models.LearningPathCourse.learning_path_id == learning_path_id
+    ).order_by(models.LearningPathCourse.sequence_order).all()
+
+# REPORT CRUD
+
+def _after(key, values):
+    """
+    ``key > values`` in lexicographic order, spelled out so that the leading
+    column is an index range on every database.
+    """
+    condition = key[-1] > values[-1]
+    for column, value in zip(reversed(key[:-1]), reversed(values[:-1])):
+        condition = or_(column > value, and_(column == value, condition))
+    return and_(key[0] >= values[0], condition)
+
+
+def _iter_keyset(db, query, key, batch_size: int):
+    """
+    Rows of ``query`` in the order of ``key`` (unique per row), as tuples of
+    the selected columns, ``batch_size`` per statement: each page starts
+    after the last key of the previous one. Only one page is in memory at a
+    time, whether or not the driver has server-side cursors (mysql-connector
+    buffers every result, so yield_per would not bound it).
+    """
+    width = len(query.selected_columns)
+    query = (
+        query.add_columns(*(column.label(f"key_{position}") for position, column in enumerate(key)))
+        .order_by(*key)
+        .limit(batch_size)
+    )
+    page = query
+    while True:
+        rows = db.connection().execute(page).all()
+        for row in rows:
+            yield row[:width]
+        if len(rows) < batch_size:
+            return
+        page = query.where(_after(key, rows[-1][width:]))
+
+
+def iter_skill_gaps(db, project_role_id=None, skill_id=None, mandatory_only=False, gaps_only=True,
+                    batch_size: int = REPORT_BATCH_SIZE):
+    """
+    One row per requirement of each user's current project role, read from
+    the materialized skill_gaps table (see app.core.skill_gaps) in user
+    order, ``batch_size`` rows per keyset page on (user_id, requirement_id).
+    Each filter combination is a range of one of its indexes plus a primary
+    key lookup of the user's name.
+
+    Rows are plain tuples from the session's connection: skipping the ORM
+    result layer matters at company-wide row counts.
+    """
+    gaps = models.SkillGap
+    query = (
+        select(
+            gaps.user_id,
+            models.User.first_name,
+            models.User.last_name,
+            gaps.project_role_id,
+            gaps.skill_id,
+            gaps.required_level_id,
+            gaps.current_level_id,
+            gaps.is_mandatory,
+            gaps.gap,
+        )
+        .join(models.User, models.User.id == gaps.user_id)
+    )
+    if project_role_id is not None:
+        query = query.where(gaps.project_role_id == project_role_id)
+    if skill_id is not None:
+        query = query.where(gaps.skill_id == skill_id)
+    if mandatory_only:
+        query = query.where(gaps.is_mandatory.is_(True))
+    if gaps_only:
+        query = query.where(gaps.gap == True)  # noqa: E712 "gap = 1" can use the index, "gap IS 1" may not
+    return _iter_keyset(db, query, (gaps.user_id, gaps.requirement_id), batch_size)
+
+
+class days_between(FunctionElement):
+    """
+    Calendar days from the first to the second datetime expression.
+    """
+    type = Integer()
+    name = "days_between"
+    inherit_cache = True
+
+
+@compiles(days_between)
+def _days_between(element, compiler, **kw):
+    start, end = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f"DATEDIFF({end}, {start})"
+
+
+@compiles(days_between, "sqlite")
+def _days_between_sqlite(element, compiler, **kw):
+    start, end = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f"CAST(julianday(date({end})) - julianday(date({start})) AS INTEGER)"
+
+
+def iter_lagging_progress(db, report_date: datetime, learning_path_id=None, grace_days: int = LAGGING_GRACE_DAYS,
+                          course_days: int = LAGGING_COURSE_DAYS, min_days_lagging: int = LAGGING_MIN_DAYS,
+                          batch_size: int = REPORT_BATCH_SIZE):
+    """
+    Unfinished courses of each user's assigned learning paths that are at
+    least ``min_days_lagging`` days behind the expected pace, in user order,
+    ``batch_size`` rows per keyset page. A path's courses are due one after another
+    in sequence_order (1-based), ``course_days`` each, starting
+    ``grace_days`` after assigned_date; progress made counts as the matching
+    share of a course's days:
+
+        days_lagging = days since assigned_date - grace_days
+                       - (sequence_order - 1) * course_days
+                       - progress_percentage * course_days / 100
+
+    A course without a progress row is "Not Started" at 0%. ``report_date``
+    is naive UTC, like the stored dates.
+    """
+    assignment = models.UserLearningPath
+    path_course = models.LearningPathCourse
+    progress = models.UserCourseProgress
+    percentage = func.coalesce(progress.progress_percentage, 0)
+    status = func.coalesce(progress.status, "Not Started")
+    days_lagging = (
+        days_between(assignment.assigned_date, literal(report_date, DateTime()))
+        - grace_days
+        - (path_course.sequence_order - 1) * course_days
+        - (percentage * course_days) // 100
+    )
+    query = (
+        select(
+            assignment.user_id,
+            models.User.first_name,
+            models.User.last_name,
+            models.Course.name,
+            percentage,
+            status,
+            assignment.assigned_date,
+            days_lagging,
+        )
+        .select_from(assignment)
+        .join(models.User, models.User.id == assignment.user_id)
+        .join(path_course, path_course.learning_path_id == assignment.learning_path_id)
+        .join(models.Course, models.Course.id == path_course.course_id)
+        .outerjoin(progress, and_(progress.user_id == assignment.user_id, progress.course_id == path_course.course_id))
+        # Every other term only lowers days_lagging: assignments too recent
+        # to lag are dropped before the joins
+        .where(assignment.assigned_date <= report_date - timedelta(days=grace_days + min_days_lagging))
+        .where(assignment.status != "Completed")
+        .where(status != "Completed")
+        .where(days_lagging >= min_days_lagging)
+    )
+    if learning_path_id is not None:
+        query = query.where(assignment.learning_path_id == learning_path_id)
+    # A user has a path once and a path a course once (create_database.sql)
+    key = (assignment.user_id, assignment.learning_path_id, path_course.sequence_order, path_course.course_id)
+    return _iter_keyset(db, query, key, batch_size)
+
+
+def get_compliance_by_designation(db) -> list:
+    """
+    Learning path assignments and completions per designation (the user's
+    project role, or their account role without one), from one GROUP BY.
+    """
+    assignment = models.UserLearningPath
+    designation = func.coalesce(models.ProjectRole.name, models.User.role)
+    rows = db.execute(
+        select(
+            designation,
+            func.count(assignment.id),
+            func.sum(case((assignment.status == "Completed", 1), else_=0)),
+        )
+        .select_from(assignment)
+        .join(models.User, models.User.id == assignment.user_id)
+        .outerjoin(models.ProjectRole, models.ProjectRole.id == models.User.current_project_role_id)
+        .group_by(designation)
+        .order_by(designation)
+    ).all()
+    # SUM comes back as a Decimal on MySQL
+    return [
+        {
+            "designation": name,
+            "total_assigned": total,
+            "completed": int(completed),
+            "compliance_percentage": round(int(completed) * 100 / total, 2),
+        }
+        for name, total, completed in rows
+    ]
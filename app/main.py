@@ -1,8 +1,18 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.core.database import engine, Base, create_all_tables
 import app.models.models
 from app.core.logger import logger
 from app.core.db_check import check_database_connectivity
+from app.core.token_revocation import revocation_registry
+from app.core.sql_instrumentation import SQLTimingMiddleware
+from app.core.nplusone import NPlusOneDetector
+from app.core.config import NPLUSONE_DETECTION, AI_WARMUP
+from app.core.lazy_resource import lazy_resources
+from app.core.cache import invalidation_bus
+from app.core.report_snapshots import report_snapshots
+from app.core.metrics import MetricsMiddleware, registry as metrics_registry
+from app.core.profiling import ProfilingMiddleware
 from sqlalchemy.engine.url import make_url
 from app.api.routes import router as api_router
 from app.api import chatbot
@@ -16,12 +26,32 @@ logger.debug("Starting LMS Backend API initialization...")
 # Check database connectivity at startup
 check_database_connectivity()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load revoked tokens and keep this worker in sync with the others
+    revocation_registry.start()
+    metrics_registry.start()
+    # Receive cache invalidations published by the other workers
+    invalidation_bus.start()
+    # Recompute the precomputed admin reports on their schedule
+    report_snapshots.start()
+    # Build the AI agents off the request path; routes answer 503 until ready
+    if AI_WARMUP:
+        for resource in lazy_resources.values():
+            resource.warm_in_background()
+    yield
+    report_snapshots.stop()
+    invalidation_bus.stop()
+    metrics_registry.stop()
+    revocation_registry.stop()
+
 app = FastAPI(
     title="LMS Backend API",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -37,6 +67,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(SQLTimingMiddleware, detector=NPlusOneDetector() if NPLUSONE_DETECTION else None)
+app.add_middleware(MetricsMiddleware)
+
 logger.debug("Including API routers...")
 app.include_router(api_router)
 app.include_router(chatbot.router, prefix="/chatbot", tags=["Chatbot"])
@@ -0,0 +1 @@
+# This file marks the migrations package.
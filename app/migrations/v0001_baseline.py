@@ -0,0 +1,24 @@
+"""
+Baseline: the tables of app.models as of scripts/create_database.sql.
+Only missing tables are created, so this is a no-op on existing databases.
+
+create_all would emit each table's indexes in set order, which differs
+between runs; SQLite breaks ties between equally cheap indexes by creation
+order, so the indexes are created one by one, sorted by name, to give every
+database built from the models the same plans.
+"""
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateTable
+
+
+def upgrade(connection: Connection):
+    from app.core.database import Base
+    import app.models.models  # noqa: F401 registers the tables on Base.metadata
+    existing = set(inspect(connection).get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name in existing:
+            continue
+        connection.execute(CreateTable(table))
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            index.create(connection)
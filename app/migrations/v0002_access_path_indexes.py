@@ -0,0 +1,25 @@
+"""
+Composite indexes for the hot access paths:
+
+* user_course_progress (user_id, status, course_id): a user's courses by status
+* user_learning_paths (user_id, learning_path_id): registration lookups
+* learning_path_courses (learning_path_id, sequence_order, course_id): a path's courses in order
+* users (current_project_role_id): developers of a role
+"""
+from sqlalchemy import Column, Index, MetaData, Table
+from sqlalchemy.engine import Connection
+
+from app.core.migrations import create_index_if_missing
+
+INDEXES = {
+    "idx_user_course_progress_user_status": ("user_course_progress", ("user_id", "status", "course_id")),
+    "idx_user_learning_paths_user_path": ("user_learning_paths", ("user_id", "learning_path_id")),
+    "idx_learning_path_courses_path_order": ("learning_path_courses", ("learning_path_id", "sequence_order", "course_id")),
+    "idx_users_current_project_role": ("users", ("current_project_role_id",)),
+}
+
+
+def upgrade(connection: Connection):
+    for name, (table_name, columns) in INDEXES.items():
+        table = Table(table_name, MetaData(), *(Column(column) for column in columns))
+        create_index_if_missing(connection, Index(name, *(table.c[column] for column in columns)))
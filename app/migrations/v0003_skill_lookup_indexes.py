@@ -0,0 +1,20 @@
+"""
+(user_id, skill_id) and (project_role_id, skill_id) lookups. Databases built
+from scripts/create_database.sql already have them as UNIQUE keys; databases
+created from the models did not and scanned user_skills for every user.
+"""
+from sqlalchemy import Column, Index, MetaData, Table
+from sqlalchemy.engine import Connection
+
+from app.core.migrations import create_index_if_missing
+
+INDEXES = {
+    "idx_user_skills_user_skill": ("user_skills", ("user_id", "skill_id")),
+    "idx_role_skill_requirements_role_skill": ("role_skill_requirements", ("project_role_id", "skill_id")),
+}
+
+
+def upgrade(connection: Connection):
+    for name, (table_name, columns) in INDEXES.items():
+        table = Table(table_name, MetaData(), *(Column(column) for column in columns))
+        create_index_if_missing(connection, Index(name, *(table.c[column] for column in columns)))
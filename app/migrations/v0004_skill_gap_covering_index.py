@@ -0,0 +1,20 @@
+"""
+Covering index for the skill gap report: the left join of role requirements
+to user_skills reads proficiency_level_id straight from the index instead of
+a table row per requirement. It supersedes idx_user_skills_user_skill from
+v0003, which is dropped; the UNIQUE key of scripts/create_database.sql stays.
+"""
+from sqlalchemy import Column, Index, MetaData, Table, inspect
+from sqlalchemy.engine import Connection
+
+from app.core.migrations import create_index_if_missing
+
+COLUMNS = ("user_id", "skill_id", "proficiency_level_id")
+SUPERSEDED = "idx_user_skills_user_skill"
+
+
+def upgrade(connection: Connection):
+    table = Table("user_skills", MetaData(), *(Column(column) for column in COLUMNS))
+    create_index_if_missing(connection, Index("idx_user_skills_user_skill_level", *(table.c[c] for c in COLUMNS)))
+    if any(index["name"] == SUPERSEDED for index in inspect(connection).get_indexes("user_skills")):
+        Index(SUPERSEDED, table.c.user_id, table.c.skill_id).drop(connection)
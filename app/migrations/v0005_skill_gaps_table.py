@@ -0,0 +1,27 @@
+"""
+Materialized skill gap report: creates skill_gaps with its dashboard indexes,
+empty. It is filled by v0010 once proficiency_levels.rank, which the gap
+flags compare, exists; app.core.skill_gaps queries the current schema and
+cannot run this early. From there on it keeps the table current.
+"""
+from sqlalchemy import Boolean, Column, Index, Integer, MetaData, Table
+from sqlalchemy.engine import Connection
+
+
+def upgrade(connection: Connection):
+    table = Table(
+        "skill_gaps", MetaData(),
+        Column("user_id", Integer, primary_key=True, autoincrement=False),
+        Column("requirement_id", Integer, primary_key=True, autoincrement=False),
+        Column("project_role_id", Integer, nullable=False),
+        Column("skill_id", Integer, nullable=False),
+        Column("required_level_id", Integer, nullable=False),
+        Column("current_level_id", Integer, nullable=True),
+        Column("is_mandatory", Boolean, nullable=False),
+        Column("gap", Boolean, nullable=False),
+        Index("idx_skill_gaps_gap_user", "gap", "user_id"),
+        Index("idx_skill_gaps_role_gap_user", "project_role_id", "gap", "user_id"),
+        Index("idx_skill_gaps_skill_gap_user", "skill_id", "gap", "user_id"),
+    )
+    # The baseline already creates it on a new database
+    table.create(connection, checkfirst=True)
@@ -0,0 +1,17 @@
+"""
+Covering index for the lagging-progress report: the progress of a user in
+one course, read per learning path course, comes straight from the index.
+The UNIQUE (user_id, course_id) key of scripts/create_database.sql finds the
+row but not status and progress_percentage.
+"""
+from sqlalchemy import Column, Index, MetaData, Table
+from sqlalchemy.engine import Connection
+
+from app.core.migrations import create_index_if_missing
+
+COLUMNS = ("user_id", "course_id", "status", "progress_percentage")
+
+
+def upgrade(connection: Connection):
+    table = Table("user_course_progress", MetaData(), *(Column(column) for column in COLUMNS))
+    create_index_if_missing(connection, Index("idx_user_course_progress_user_course", *(table.c[c] for c in COLUMNS)))
@@ -0,0 +1,19 @@
+"""
+report_snapshots: timestamped results of the precomputed admin reports
+(app.core.report_snapshots), starting with the compliance report.
+"""
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, Text
+from sqlalchemy.engine import Connection
+
+
+def upgrade(connection: Connection):
+    table = Table(
+        "report_snapshots", MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("report", String(100), nullable=False),
+        Column("computed_at", DateTime, nullable=False),
+        Column("payload", Text, nullable=False),
+        Index("idx_report_snapshots_report_computed", "report", "computed_at"),
+    )
+    # The baseline already creates it on a new database
+    table.create(connection, checkfirst=True)
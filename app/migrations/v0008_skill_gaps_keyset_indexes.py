@@ -0,0 +1,29 @@
+"""
+End the skill_gaps dashboard indexes with requirement_id: the reports page
+through skill_gaps by (user_id, requirement_id), and an index that stops at
+user_id leaves each page's order to a sort on SQLite. (InnoDB secondary
+indexes already end with the primary key.) The (…, user_id) indexes of v0005
+are dropped.
+"""
+from sqlalchemy import Column, Index, MetaData, Table, inspect
+from sqlalchemy.engine import Connection
+
+from app.core.migrations import create_index_if_missing
+
+# name -> leading columns; each index gets user_id, requirement_id after them
+INDEXES = {
+    "idx_skill_gaps_gap_user": ("gap",),
+    "idx_skill_gaps_role_gap_user": ("project_role_id", "gap"),
+    "idx_skill_gaps_skill_gap_user": ("skill_id", "gap"),
+}
+
+
+def upgrade(connection: Connection):
+    table = Table("skill_gaps", MetaData(),
+                  *(Column(column) for column in ("user_id", "requirement_id", "project_role_id", "skill_id", "gap")))
+    existing = {index["name"] for index in inspect(connection).get_indexes("skill_gaps")}
+    for superseded, leading in INDEXES.items():
+        columns = (*leading, "user_id", "requirement_id")
+        create_index_if_missing(connection, Index(f"{superseded}_requirement", *(table.c[c] for c in columns)))
+        if superseded in existing:
+            Index(superseded, *(table.c[c] for c in (*leading, "user_id"))).drop(connection)
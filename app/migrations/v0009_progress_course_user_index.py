@@ -0,0 +1,20 @@
+"""
+Lead the lagging-progress covering index with course_id. The
+idx_user_course_progress_user_course index of v0006 was a second index led
+by user_id next to idx_user_course_progress_user_status, and which of the
+two a plan picked came down to index order; it is dropped.
+"""
+from sqlalchemy import Column, Index, MetaData, Table, inspect
+from sqlalchemy.engine import Connection
+
+from app.core.migrations import create_index_if_missing
+
+COLUMNS = ("course_id", "user_id", "status", "progress_percentage")
+SUPERSEDED = "idx_user_course_progress_user_course"
+
+
+def upgrade(connection: Connection):
+    table = Table("user_course_progress", MetaData(), *(Column(column) for column in COLUMNS))
+    create_index_if_missing(connection, Index("idx_user_course_progress_course_user", *(table.c[c] for c in COLUMNS)))
+    if any(index["name"] == SUPERSEDED for index in inspect(connection).get_indexes("user_course_progress")):
+        Index(SUPERSEDED, table.c.user_id, table.c.course_id).drop(connection)
@@ -0,0 +1,31 @@
+"""
+proficiency_levels.rank: the order of the levels, which their ids do not
+give (scripts/create_database.sql adds Fundamental, Working Knowledge and
+Highly Proficient as 8-10, after Master). The levels of the sample data get
+their place in the scale and any other level goes above them in id order.
+skill_gaps is rebuilt, since its gap flags now compare ranks.
+"""
+from itertools import count
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection
+
+from app.core import skill_gaps
+
+SAMPLE_ORDER = ("Beginner", "Novice", "Fundamental", "Working Knowledge", "Intermediate", "Proficient",
+                "Highly Proficient", "Advanced", "Expert", "Master")
+
+
+def upgrade(connection: Connection):
+    # The baseline already creates it on a new database
+    if "rank" not in {column["name"] for column in inspect(connection).get_columns("proficiency_levels")}:
+        rank = connection.dialect.identifier_preparer.quote("rank")
+        connection.execute(text(f"ALTER TABLE proficiency_levels ADD COLUMN {rank} INTEGER NOT NULL DEFAULT 0"))
+    table = Table("proficiency_levels", MetaData(), Column("id", Integer), Column("name", String(50)),
+                  Column("rank", Integer))
+    known = {name: position for position, name in enumerate(SAMPLE_ORDER, 1)}
+    others = count(len(SAMPLE_ORDER) + 1)
+    for level_id, name in connection.execute(select(table.c.id, table.c.name).order_by(table.c.id)).all():
+        rank = known.get(name) or next(others)
+        connection.execute(table.update().where(table.c.id == level_id).values(rank=rank))
+    skill_gaps.rebuild(connection)
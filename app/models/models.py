@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -26,6 +26,10 @@ class User(Base):
     user_course_progress = relationship("UserCourseProgress", back_populates="user", cascade="all, delete-orphan")
     audit_logs = relationship("AuditLog", back_populates="admin_user", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("idx_users_current_project_role", "current_project_role_id"),
+    )
+
 class Skill(Base):
     __tablename__ = "skills"
     # logger.debug("Defining Skill model.")
@@ -43,6 +47,8 @@ class ProficiencyLevel(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(50), unique=True, nullable=False)
     description = Column(Text, nullable=True)
+    # Order of the levels, lowest first; ids are not in level order
+    rank = Column(Integer, nullable=False)
 
 class ProjectRole(Base):
     __tablename__ = "project_roles"
@@ -67,6 +73,10 @@ class UserSkill(Base):
     skill = relationship("Skill", back_populates="user_skills")
     proficiency_level = relationship("ProficiencyLevel")
 
+    __table_args__ = (
+        Index("idx_user_skills_user_skill_level", "user_id", "skill_id", "proficiency_level_id"),
+    )
+
 class RoleSkillRequirement(Base):
     __tablename__ = "role_skill_requirements"
     # logger.debug("Defining RoleSkillRequirement model.")
@@ -80,6 +90,10 @@ class RoleSkillRequirement(Base):
     skill = relationship("Skill", back_populates="role_skill_requirements")
     min_proficiency_level = relationship("ProficiencyLevel")
 
+    __table_args__ = (
+        Index("idx_role_skill_requirements_role_skill", "project_role_id", "skill_id"),
+    )
+
 class Course(Base):
     __tablename__ = "courses"
     # logger.debug("Defining Course model.")
@@ -104,7 +118,7 @@ class LearningPath(Base):
     name = Column(String(255), unique=True, nullable=False)
     description = Column(Text, nullable=True)
 
-    learning_path_courses = relationship("LearningPathCourse", back_populates="learning_path")
+    learning_path_courses = relationship("LearningPathCourse", back_populates="learning_path", order_by="LearningPathCourse.sequence_order")
     user_learning_paths = relationship("UserLearningPath", back_populates="learning_path")
 
 class LearningPathCourse(Base):
@@ -118,6 +132,11 @@ class LearningPathCourse(Base):
     learning_path = relationship("LearningPath", back_populates="learning_path_courses")
     course = relationship("Course", back_populates="learning_path_courses")
 
+    __table_args__ = (
+        # Courses of a path in order; covers the course_id lookup
+        Index("idx_learning_path_courses_path_order", "learning_path_id", "sequence_order", "course_id"),
+    )
+
 class UserLearningPath(Base):
     __tablename__ = "user_learning_paths"
     # logger.debug("Defining UserLearningPath model.")
@@ -133,6 +152,10 @@ class UserLearningPath(Base):
     user = relationship("User", back_populates="user_learning_paths")
     learning_path = relationship("LearningPath", back_populates="user_learning_paths")
 
+    __table_args__ = (
+        Index("idx_user_learning_paths_user_path", "user_id", "learning_path_id"),
+    )
+
 class UserCourseProgress(Base):
     __tablename__ = "user_course_progress"
     # logger.debug("Defining UserCourseProgress model.")
@@ -147,6 +170,13 @@ class UserCourseProgress(Base):
     user = relationship("User", back_populates="user_course_progress")
     course = relationship("Course", back_populates="user_course_progress")
 
+    __table_args__ = (
+        # A user's courses by status; covers the course_id lookup
+        Index("idx_user_course_progress_user_status", "user_id", "status", "course_id"),
+        # Progress in one course of one user; covers the lagging-progress report
+        Index("idx_user_course_progress_course_user", "course_id", "user_id", "status", "progress_percentage"),
+    )
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
     # logger.debug("Defining AuditLog model.")
@@ -157,3 +187,45 @@ class AuditLog(Base):
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
 
     admin_user = relationship("User", back_populates="audit_logs")
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    # logger.debug("Defining RevokedToken model.")
+    jti = Column(String(64), primary_key=True)
+    sso_id = Column(String(255), index=True, nullable=False)
+    expires_at = Column(DateTime, index=True, nullable=False)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# Materialized skill gap report: one row per requirement of each user's current
+# project role. Derived data kept current by app.core.skill_gaps; no foreign
+# keys, so deleting a user or requirement never depends on it.
+class SkillGap(Base):
+    __tablename__ = "skill_gaps"
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    requirement_id = Column(Integer, primary_key=True, autoincrement=False)
+    project_role_id = Column(Integer, nullable=False)
+    skill_id = Column(Integer, nullable=False)
+    required_level_id = Column(Integer, nullable=False)
+    current_level_id = Column(Integer, nullable=True)
+    is_mandatory = Column(Boolean, nullable=False)
+    gap = Column(Boolean, nullable=False)
+
+    __table_args__ = (
+        # Dashboard reads: all gaps, a role's or a skill's, in key order
+        Index("idx_skill_gaps_gap_user_requirement", "gap", "user_id", "requirement_id"),
+        Index("idx_skill_gaps_role_gap_user_requirement", "project_role_id", "gap", "user_id", "requirement_id"),
+        Index("idx_skill_gaps_skill_gap_user_requirement", "skill_id", "gap", "user_id", "requirement_id"),
+    )
+
+# Timestamped results of the precomputed admin reports (app.core.report_snapshots)
+class ReportSnapshot(Base):
+    __tablename__ = "report_snapshots"
+    id = Column(Integer, primary_key=True, index=True)
+    report = Column(String(100), nullable=False)
+    computed_at = Column(DateTime, nullable=False)
+    payload = Column(Text, nullable=False)
+
+    __table_args__ = (
+        # Latest snapshot of a report
+        Index("idx_report_snapshots_report_computed", "report", "computed_at"),
+    )
@@ -1,9 +1,11 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, model_validator
 from typing import List, Optional, TYPE_CHECKING, ForwardRef
 from datetime import datetime
 from typing import Generic, TypeVar, List, Optional
 from pydantic.generics import GenericModel
 
+from app.core.config import STAFFING_MAX_CANDIDATES, STAFFING_MAX_SEATS
+
 UserLearningPathResponse = ForwardRef('UserLearningPathResponse')
 UserCourseProgressResponse = ForwardRef('UserCourseProgressResponse')
 
@@ -63,6 +65,8 @@ class SkillResponse(SkillBase):
 class ProficiencyLevelBase(BaseModel):
     name: str
     description: Optional[str] = None
+    # Order of the levels, lowest first; a new level without one goes on top
+    rank: Optional[int] = None
 
 class ProficiencyLevelCreate(ProficiencyLevelBase):
     pass
@@ -321,6 +325,165 @@ class RoleSkillSwapSuggestion(BaseModel):
     suggested_swap_benefit: str
     skill_gaps_reduced: List[str]
 
+class CourseRecommendation(BaseModel):
+    rank: int
+    course_id: int
+    course_name: str
+    provider: Optional[str] = None
+    duration_hours: Optional[int] = None
+    skill_id: int
+    skill_name: Optional[str] = None
+    recommended_proficiency_level_id: Optional[int] = None
+    recommended_proficiency_level_name: Optional[str] = None
+    current_proficiency_level_id: Optional[int] = None
+    required_proficiency_level_id: int
+    is_mandatory: bool
+
+class UserCourseRecommendations(BaseModel):
+    user_id: int
+    user_name: str
+    recommendations: List[CourseRecommendation]
+
+class RoleRecommendationsResponse(BaseModel):
+    project_role_id: int
+    project_role_name: str
+    users: List[UserCourseRecommendations]
+
+class StaffingRequirement(BaseModel):
+    skill_id: int
+    min_proficiency_level_id: int
+    is_mandatory: bool = True
+
+class StaffingSlot(BaseModel):
+    project_role_id: int
+    headcount: int = Field(1, ge=1, le=STAFFING_MAX_SEATS)
+    label: Optional[str] = None
+    # Defaults to the project role's skill requirements
+    requirements: Optional[List[StaffingRequirement]] = None
+
+class StaffingRequest(BaseModel):
+    slots: List[StaffingSlot] = Field(max_length=STAFFING_MAX_SEATS)
+    # Defaults to every non-admin user
+    candidate_ids: Optional[List[int]] = Field(None, max_length=STAFFING_MAX_CANDIDATES)
+
+    @model_validator(mode="after")
+    def check_seats(self):
+        seats = sum(slot.headcount for slot in self.slots)
+        if seats > STAFFING_MAX_SEATS:
+            raise ValueError(f"{seats} seats requested, at most {STAFFING_MAX_SEATS} allowed")
+        return self
+
+class StaffingAssignment(BaseModel):
+    slot_index: int
+    seat: int
+    user_id: int
+    user_name: str
+    current_project_role_id: Optional[int] = None
+    mandatory_gap: int
+    optional_gap: int
+    missing_skills: List[str]
+
+class StaffingSkillGap(BaseModel):
+    skill_id: int
+    skill_name: Optional[str] = None
+    min_proficiency_level_id: int
+    is_mandatory: bool
+    assignees_below: int
+    missing_levels: int
+
+class StaffingSlotSummary(BaseModel):
+    slot_index: int
+    project_role_id: int
+    project_role_name: Optional[str] = None
+    label: Optional[str] = None
+    headcount: int
+    filled: int
+    fully_qualified: int
+    mandatory_gap: int
+    optional_gap: int
+    skill_gaps: List[StaffingSkillGap]
+
+class StaffingResponse(BaseModel):
+    candidates: int
+    seats: int
+    mandatory_gap: int
+    optional_gap: int
+    assignments: List[StaffingAssignment]
+    slots: List[StaffingSlotSummary]
+
+class GeneratedLearningPathCourse(BaseModel):
+    sequence_order: int
+    course_id: int
+    course_name: str
+    provider: Optional[str] = None
+    duration_hours: Optional[int] = None
+    skill_id: int
+    skill_name: Optional[str] = None
+    recommended_proficiency_level_id: int
+    recommended_proficiency_level_name: Optional[str] = None
+    is_mandatory: bool
+
+class UncoveredSkillGap(BaseModel):
+    skill_id: int
+    skill_name: Optional[str] = None
+    current_proficiency_level_id: Optional[int] = None
+    required_proficiency_level_id: int
+    is_mandatory: bool
+
+class GeneratedLearningPath(BaseModel):
+    user_ids: List[int]
+    project_role_id: int
+    total_hours: int
+    courses: List[GeneratedLearningPathCourse]
+    uncovered: List[UncoveredSkillGap]
+
+class LearningPathGenerate(BaseModel):
+    name: str
+    description: Optional[str] = None
+    user_ids: List[int]
+    project_role_id: Optional[int] = None
+    assign: bool = True
+
+class SkillSearchLevel(BaseModel):
+    skill_id: int
+    skill_name: str
+    proficiency_level_id: int
+    proficiency_level_name: Optional[str] = None
+
+class SkillSearchMatch(BaseModel):
+    user_id: int
+    first_name: str
+    last_name: str
+    email: str
+    current_project_role: Optional[str] = None
+    skills: List[SkillSearchLevel]
+
+class SkillMatrixStats(BaseModel):
+    users: int
+    skills: int
+    memory_bytes: int
+
+class SkillSearchResponse(BaseModel):
+    total: int
+    conditions: List[SkillSearchLevel]
+    items: List[SkillSearchMatch]
+    search_microseconds: float
+    matrix: SkillMatrixStats
+
+class SimilarUserMatch(BaseModel):
+    user_id: int
+    first_name: str
+    last_name: str
+    email: str
+    current_project_role: Optional[str] = None
+    similarity: float
+    skills: List[SkillSearchLevel]
+
+class SimilarUsersResponse(BaseModel):
+    user_id: int
+    items: List[SimilarUserMatch]
+    search_microseconds: float
+
 class UserSkillDisplay(BaseModel):
     skill_id: int
     skill_name: str
@@ -1,4 +1,3 @@
-import pandas as pd
 from typing import List, Dict, Any
 import json
 
@@ -46,6 +45,8 @@ def calculate_proficiency(role: str, skill: str) -> List[Dict[str, int]]:
         return [{"technology": tech, "proficiencyLevel": 0} for tech in ["Angular", "React", ".Net", "SQL", "Postgresql", "AWS", "Python"]]
 
 def convert_excel_to_dataframe(file_path: str):
+    # pandas/openpyxl cost ~0.3s to import; only uploads need them
+    import pandas as pd
     try:
         return pd.read_excel(file_path)
     except Exception as e:
@@ -0,0 +1,148 @@
+"""
+Learning paths generated from skill gaps.
+
+Every course teaches one skill, so covering a role's gaps with the fewest
+course hours splits into one problem per required skill, and the path is
+the union of the per-skill answers. Within a skill, as in
+app.services.recommendations, levels compare by rank, a course's
+recommended level is taken as what it teaches, and a course is a candidate
+when its level lies above the learner's and at or below the required one;
+it has no prerequisites, so it brings a learner from any lower level up to
+its own. The cheapest set of courses reaching the requirement is therefore
+a single course at the required rank: courses at lower ranks only add hours
+to it. When the catalogue has none there, the path takes a course at the
+highest candidate rank, which narrows the gap as far as it can, and the gap
+is reported as uncovered. Among equal courses the path takes the first in
+the reference snapshot's skill -> courses index (the shortest), and one the
+learner already has (a user_course_progress row) costs nothing, so none is
+added. Courses without a level cannot be placed on the scale and are left
+out.
+
+The path lists lower ranks first, mandatory requirements before optional
+ones within a rank. A cohort gets one path from its weakest member in each
+skill; a course counts as already had only when every member has it. Bulk
+generation reuses app.services.recommendations to load a whole role in
+three queries and plans each distinct (levels, courses had) profile once.
+"""
+from typing import Dict, List
+
+import numpy as np
+
+from app.core.reference_data import ReferenceSnapshot
+from app.services.recommendations import Candidates, candidates, load
+
+# Per requirement: rank -> candidate course columns at that rank, in index order
+Rungs = Dict[int, List[int]]
+
+
+def rungs(found: Candidates) -> List[Rungs]:
+    by_requirement: List[Rungs] = [{} for _ in found.requirements]
+    for column, rank in enumerate(found.course_ranks.tolist()):
+        if rank:
+            by_requirement[found.requirement_of[column]].setdefault(rank, []).append(column)
+    return by_requirement
+
+
+def plan(found: Candidates, steps: List[Rungs], current: np.ndarray, taken: np.ndarray):
+    """
+    Path for one profile: ``current`` is the rank of the level in each
+    requirement, ``taken`` marks the candidate courses already had. Returns
+    (course columns in path order, requirement columns left uncovered).
+    """
+    chosen, uncovered = [], []
+    had = set(np.flatnonzero(taken).tolist())
+    for column, requirement in enumerate(found.requirements):
+        reached = int(current[column])
+        required = int(found.required_ranks[column])
+        if reached >= required:
+            continue
+        ranks = [rank for rank in steps[column] if reached < rank <= required]
+        if ranks:
+            top = max(ranks)
+            courses = steps[column][top]
+            if had.isdisjoint(courses):
+                chosen.append((top, not requirement.is_mandatory, column, courses[0]))
+            reached = top
+        if reached < required:
+            uncovered.append(column)
+    chosen.sort()
+    return [course for *_, course in chosen], uncovered
+
+
+def _path(snapshot: ReferenceSnapshot, found: Candidates, user_ids: List[int], project_role_id: int,
+          current: np.ndarray, chosen: List[int], uncovered: List[int]) -> dict:
+    courses = []
+    for position, column in enumerate(chosen, 1):
+        course = found.courses[column]
+        requirement = found.requirements[found.requirement_of[column]]
+        skill = snapshot.skills.get(course.skill_id)
+        level = snapshot.proficiency_levels.get(course.recommended_proficiency_level_id)
+        courses.append({
+            "sequence_order": position,
+            "course_id": course.id,
+            "course_name": course.name,
+            "provider": course.provider,
+            "duration_hours": course.duration_hours,
+            "skill_id": course.skill_id,
+            "skill_name": skill.name if skill else None,
+            "recommended_proficiency_level_id": course.recommended_proficiency_level_id,
+            "recommended_proficiency_level_name": level.name if level else None,
+            "is_mandatory": requirement.is_mandatory,
+        })
+    gaps = []
+    for column in uncovered:
+        requirement = found.requirements[column]
+        skill = snapshot.skills.get(requirement.skill_id)
+        gaps.append({
+            "skill_id": requirement.skill_id,
+            "skill_name": skill.name if skill else None,
+            "current_proficiency_level_id": int(current[column]) or None,
+            "required_proficiency_level_id": requirement.min_proficiency_level_id,
+            "is_mandatory": requirement.is_mandatory,
+        })
+    return {
+        "user_ids": user_ids,
+        "project_role_id": project_role_id,
+        "total_hours": sum(course["duration_hours"] or 0 for course in courses),
+        "courses": courses,
+        "uncovered": gaps,
+    }
+
+
+def generate(db, snapshot: ReferenceSnapshot, project_role_id: int, *criteria, cohort: bool = False) -> List[dict]:
+    """
+    Paths towards ``project_role_id``'s requirements for the users matching
+    ``criteria`` (they need not currently hold the role): one per user, or
+    a single one for all of them when ``cohort``. Each path is a dict with
+    ``user_ids``, ``total_hours``, ``courses`` (with ``sequence_order``)
+    and ``uncovered``.
+    """
+    found = candidates(snapshot, project_role_id)
+    users, current, taken = load(db, found, *criteria)
+    if not users:
+        return []
+    # Plans compare ranks; ``current`` keeps the level ids for the output
+    ranks = snapshot.level_ranks_of(current)
+    steps = rungs(found)
+    user_ids = [user.id for user in users]
+    if cohort:
+        weakest = ranks.argmin(axis=0)
+        columns = np.arange(current.shape[1])
+        chosen, uncovered = plan(found, steps, ranks[weakest, columns], taken.all(axis=0))
+        return [_path(snapshot, found, user_ids, project_role_id, current[weakest, columns], chosen, uncovered)]
+
+    paths = {}
+    # Keyed by the int64 level ids, which fix both the ranks planned with and
+    # the ids reported for uncovered gaps
+    profiles = np.concatenate([current.astype(np.int64, copy=False).view(np.uint8),
+                               np.packbits(taken, axis=1)], axis=1)
+    result = []
+    for row, user_id in enumerate(user_ids):
+        key = profiles[row].tobytes()
+        path = paths.get(key)
+        if path is None:
+            path = paths[key] = _path(snapshot, found, [], project_role_id, current[row],
+                                      *plan(found, steps, ranks[row], taken[row]))
+        result.append({**path, "user_ids": [user_id]})
+    return result
+
@@ -0,0 +1,162 @@
+"""
+Course recommendations from skill gaps.
+
+A user's gaps are the requirements of their current project role they do
+not meet (levels compare by rank, ReferenceSnapshot.level_rank; a missing
+skill is 0). The candidate courses of a gap come from the reference data
+snapshot's skill -> courses index, already sorted by recommended level and
+duration. A course is
+recommended when its level lies above the user's current level and at or
+below the required one (courses without a level fit any gap of their
+skill), and the user has no user_course_progress row for it.
+
+Users are scored as a (users x candidate courses) matrix in one NumPy pass,
+so a whole role costs three queries and a few array operations rather than
+a loop per user. Ranking: mandatory requirements first, then the nearest
+next step (course level minus current level), then the larger gap, then
+the index order (lower level, shorter course).
+"""
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+
+import app.models.models as models
+from app.core.reference_data import CourseRef, ReferenceSnapshot, RoleSkillRequirementRef
+
+
+class Candidates(NamedTuple):
+    requirements: Sequence[RoleSkillRequirementRef]
+    courses: List[CourseRef]
+    requirement_of: np.ndarray  # (courses,) column of the course's requirement
+    required_ranks: np.ndarray  # (requirements,) rank of the required level
+    course_ranks: np.ndarray    # (courses,) rank of the course's level, 0 = none
+
+
+def candidates(snapshot: ReferenceSnapshot, project_role_id: int) -> Candidates:
+    requirements = snapshot.requirements_for_role(project_role_id)
+    courses, columns = [], []
+    for column, requirement in enumerate(requirements):
+        for course in snapshot.courses_for_skill(requirement.skill_id):
+            courses.append(course)
+            columns.append(column)
+    return Candidates(
+        requirements, courses, np.array(columns, dtype=np.intp),
+        np.array([snapshot.level_rank(r.min_proficiency_level_id) for r in requirements], dtype=np.int16),
+        np.array([snapshot.level_rank(c.recommended_proficiency_level_id) for c in courses], dtype=np.int16),
+    )
+
+
+def rank(found: Candidates, current: np.ndarray, taken: np.ndarray, limit: int):
+    """
+    ``current``: (users, requirements) rank of each user's level in each
+    required skill; ``taken``: (users, courses) True where the user already
+    has the course. Returns (users, limit) indexes into ``found.courses`` and a
+    mask of the valid ones; each row is that user's ranking.
+    """
+    columns = found.requirement_of
+    required = found.required_ranks[columns]
+    optional = np.array([not r.is_mandatory for r in found.requirements], dtype=bool)[columns]
+    level = found.course_ranks
+
+    levels = current[:, columns].astype(np.int16)
+    eligible = (levels < required) & ~taken & ((level == 0) | ((level > levels) & (level <= required)))
+    step = np.where(level > 0, level - levels, 1)
+    gap = required - levels
+    shape = eligible.shape
+    order = np.lexsort((
+        np.broadcast_to(np.arange(shape[1]), shape),
+        -gap,
+        step,
+        np.broadcast_to(optional, shape),
+        ~eligible,
+    ), axis=-1)[:, :limit]
+    return order, np.take_along_axis(eligible, order, axis=1)
+
+
+def load(db, found: Candidates, *criteria):
+    """
+    Users matching ``criteria`` (ordered by id), their level ids in the
+    required skills as int64 (0 = none; ids are arbitrary keys, map them
+    with ReferenceSnapshot.level_ranks_of to compare) and the candidate
+    courses they already have.
+    """
+    users = db.execute(
+        select(models.User.id, models.User.first_name, models.User.last_name).where(*criteria).order_by(models.User.id)
+    ).all()
+    user_ids = np.array([user.id for user in users], dtype=np.int64)
+    current = np.zeros((len(users), len(found.requirements)), dtype=np.int64)
+    taken = np.zeros((len(users), len(found.courses)), dtype=bool)
+    if not len(users) or not found.requirements:
+        return users, current, taken
+
+    column_of_skill = {r.skill_id: column for column, r in enumerate(found.requirements)}
+    rows = db.execute(
+        select(models.UserSkill.user_id, models.UserSkill.skill_id, models.UserSkill.proficiency_level_id)
+        .join(models.User, models.User.id == models.UserSkill.user_id)
+        .where(*criteria, models.UserSkill.skill_id.in_(column_of_skill))
+    ).all()
+    if rows:
+        current[np.searchsorted(user_ids, [row[0] for row in rows]),
+                [column_of_skill[row[1]] for row in rows]] = [row[2] for row in rows]
+
+    if found.courses:
+        column_of_course = {course.id: column for column, course in enumerate(found.courses)}
+        rows = db.execute(
+            select(models.UserCourseProgress.user_id, models.UserCourseProgress.course_id)
+            .join(models.User, models.User.id == models.UserCourseProgress.user_id)
+            .where(*criteria, models.UserCourseProgress.course_id.in_(column_of_course))
+        ).all()
+        if rows:
+            taken[np.searchsorted(user_ids, [row[0] for row in rows]),
+                  [column_of_course[row[1]] for row in rows]] = True
+    return users, current, taken
+
+
+def _recommendation(snapshot: ReferenceSnapshot, found: Candidates, course_column: int, current_level: int,
+                    position: int) -> dict:
+    course = found.courses[course_column]
+    requirement = found.requirements[found.requirement_of[course_column]]
+    skill = snapshot.skills.get(course.skill_id)
+    level = snapshot.proficiency_levels.get(course.recommended_proficiency_level_id)
+    return {
+        "rank": position,
+        "course_id": course.id,
+        "course_name": course.name,
+        "provider": course.provider,
+        "duration_hours": course.duration_hours,
+        "skill_id": course.skill_id,
+        "skill_name": skill.name if skill else None,
+        "recommended_proficiency_level_id": course.recommended_proficiency_level_id,
+        "recommended_proficiency_level_name": level.name if level else None,
+        "current_proficiency_level_id": current_level or None,
+        "required_proficiency_level_id": requirement.min_proficiency_level_id,
+        "is_mandatory": requirement.is_mandatory,
+    }
+
+
+def recommend(db, snapshot: ReferenceSnapshot, project_role_id: Optional[int], limit: int, *criteria) -> List[dict]:
+    """
+    Ranked recommendations for every user in ``project_role_id`` matching
+    ``criteria``: one ``{"user_id", "user_name", "recommendations"}`` per user.
+    """
+    if project_role_id is None:
+        return []
+    found = candidates(snapshot, project_role_id)
+    users, current, taken = load(db, found, models.User.current_project_role_id == project_role_id, *criteria)
+    if not found.courses:
+        return [{"user_id": user.id, "user_name": f"{user.first_name} {user.last_name}", "recommendations": []}
+                for user in users]
+    order, valid = rank(found, snapshot.level_ranks_of(current), taken, limit)
+    result = []
+    for row, user in enumerate(users):
+        picks = order[row][valid[row]]
+        result.append({
+            "user_id": user.id,
+            "user_name": f"{user.first_name} {user.last_name}",
+            "recommendations": [
+                _recommendation(snapshot, found, int(column), int(current[row, found.requirement_of[column]]), position)
+                for position, column in enumerate(picks, 1)
+            ],
+        })
+    return result
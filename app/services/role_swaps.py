@@ -0,0 +1,245 @@
+"""
+Role swap suggestions: pairs of employees in different project roles whose
+exchange of roles reduces the total proficiency gap against the roles'
+requirements.
+
+The gap of a user in a role is the sum, over the role's requirements, of
+the levels missing to the required proficiency, counted in level ranks
+(ReferenceSnapshot.level_rank, 1 = lowest; a missing skill is 0). Swapping A (role ra) and B (role rb)
+changes the total by
+
+    (G[A, ra] - G[A, rb]) + (G[B, rb] - G[B, ra])
+
+which is one term per employee. For a role pair the best swaps therefore
+pair the top-k employees of ra with the top-k of rb, so each of the
+r * (r - 1) / 2 role pair blocks costs one argpartition per side and a
+k x k outer sum instead of |ra| x |rb| comparisons; a heap keeps the best
+k across blocks.
+"""
+import heapq
+from itertools import chain
+from dataclasses import dataclass
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+import app.models.models as models
+from app.core.reference_data import ReferenceSnapshot, reference_data
+import logging
+
+logger = logging.getLogger("lms_backend.services.role_swaps")
+
+GAP_BLOCK_USERS = 4096
+
+
+@dataclass
+class SkillMatrices:
+    """
+    Dense views of the skill data: ``proficiency[u, s]`` is the level rank of
+    user ``user_ids[u]`` in skill ``skill_ids[s]`` (0 = none),
+    ``requirements[r, s]`` the rank of the minimum level role ``role_ids[r]``
+    requires (0 = not required) and ``user_roles[u]`` the row of the user's role.
+    """
+    user_ids: np.ndarray        # (n,) int64
+    user_names: List[str]
+    user_roles: np.ndarray      # (n,) int32 index into role_ids
+    skill_ids: np.ndarray       # (m,) int64
+    role_ids: np.ndarray        # (r,) int64
+    proficiency: np.ndarray     # (n, m) int8
+    requirements: np.ndarray    # (r, m) int8
+
+
+class SwapCandidate(NamedTuple):
+    benefit: int
+    a: int  # row of employee A, currently in role user_roles[a]
+    b: int  # row of employee B
+    gap_before: int
+    gap_after: int
+
+
+def _positions(sorted_ids: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Index of each of ``values`` in ``sorted_ids`` and whether it is there.
+    """
+    positions = np.minimum(np.searchsorted(sorted_ids, values), max(len(sorted_ids) - 1, 0))
+    if not len(sorted_ids):
+        return positions, np.zeros(len(values), dtype=bool)
+    return positions, sorted_ids[positions] == values
+
+
+def load_matrices(db, snapshot: ReferenceSnapshot) -> SkillMatrices:
+    """
+    Every user with a project role, their skills and the role requirements
+    of ``snapshot``, as dense matrices. Two plain queries; rows are scattered
+    into the matrices with NumPy indexing, not a Python loop per cell.
+    """
+    connection = db.connection()
+    users = connection.execute(
+        select(models.User.id, models.User.first_name, models.User.last_name, models.User.current_project_role_id)
+        .where(models.User.current_project_role_id.is_not(None))
+        .order_by(models.User.id)
+    ).all()
+    skill_ids = np.array(sorted(snapshot.skills), dtype=np.int64)
+    role_ids = np.array(sorted(snapshot.project_roles), dtype=np.int64)
+    user_ids = np.fromiter((row[0] for row in users), dtype=np.int64, count=len(users))
+    user_role_ids = np.fromiter((row[3] for row in users), dtype=np.int64, count=len(users))
+    known_role = np.isin(user_role_ids, role_ids)
+    users = [row for row, known in zip(users, known_role) if known]
+    user_ids, user_role_ids = user_ids[known_role], user_role_ids[known_role]
+
+    proficiency = np.zeros((len(user_ids), len(skill_ids)), dtype=np.int8)
+    # np.array() on Row objects probes each one for the array protocol;
+    # flattening the tuples first is an order of magnitude faster
+    skills = np.fromiter(chain.from_iterable(connection.execute(
+        select(models.UserSkill.user_id, models.UserSkill.skill_id, models.UserSkill.proficiency_level_id)
+    )), dtype=np.int64).reshape(-1, 3)
+    rows, user_found = _positions(user_ids, skills[:, 0])
+    columns, skill_found = _positions(skill_ids, skills[:, 1])
+    found = user_found & skill_found
+    proficiency[rows[found], columns[found]] = snapshot.level_ranks_of(skills[found, 2])
+
+    requirements = np.zeros((len(role_ids), len(skill_ids)), dtype=np.int8)
+    for requirement in snapshot.role_skill_requirements.values():
+        role = np.searchsorted(role_ids, requirement.project_role_id)
+        skill = np.searchsorted(skill_ids, requirement.skill_id)
+        if skill < len(skill_ids) and skill_ids[skill] == requirement.skill_id:
+            requirements[role, skill] = snapshot.level_rank(requirement.min_proficiency_level_id)
+
+    return SkillMatrices(
+        user_ids=user_ids,
+        user_names=[f"{row[1]} {row[2]}" for row in users],
+        user_roles=np.searchsorted(role_ids, user_role_ids).astype(np.int32),
+        skill_ids=skill_ids,
+        role_ids=role_ids,
+        proficiency=proficiency,
+        requirements=requirements,
+    )
+
+
+def level_gaps(proficiency: np.ndarray, requirements: np.ndarray, block: int = GAP_BLOCK_USERS) -> np.ndarray:
+    """
+    ``G[u, r] = sum(max(0, requirements[r] - proficiency[u]))``: levels user
+    row ``u`` is missing for requirement row ``r``.
+
+    max(0, R - P) counts the levels l with P < l <= R, so G is a sum of one
+    matrix product per level, (P < l) @ (R >= l).T, which runs in BLAS
+    instead of materializing an (n, r, m) difference. Float32 is exact for
+    these small integer sums. ``block`` users at a time bound the memory.
+    """
+    n, r = len(proficiency), len(requirements)
+    gaps = np.zeros((n, r), dtype=np.int32)
+    if not n or not r:
+        return gaps
+    top_level = int(requirements.max(initial=0))
+    required = [(requirements >= level).T.astype(np.float32) for level in range(1, top_level + 1)]
+    for start in range(0, n, block):
+        rows = proficiency[start:start + block]
+        total = np.zeros((len(rows), r), dtype=np.float32)
+        for level, needs in enumerate(required, 1):
+            total += (rows < level).astype(np.float32) @ needs
+        gaps[start:start + block] = total
+    return gaps
+
+
+def gap_matrix(matrices: SkillMatrices, block: int = GAP_BLOCK_USERS) -> np.ndarray:
+    """
+    ``G[u, r]``: levels user ``u`` is missing for role ``r``.
+    """
+    return level_gaps(matrices.proficiency, matrices.requirements, block)
+
+
+def _top(values: np.ndarray, k: int) -> np.ndarray:
+    if len(values) <= k:
+        return np.arange(len(values))
+    return np.argpartition(values, -k)[-k:]
+
+
+def top_swaps(matrices: SkillMatrices, k: int = 10, gaps: np.ndarray = None) -> List[SwapCandidate]:
+    """
+    The ``k`` swaps with the largest gap reduction (ties: lower rows first),
+    best first. Swaps that do not reduce the gap are left out.
+    """
+    if gaps is None:
+        gaps = gap_matrix(matrices)
+    members = [np.flatnonzero(matrices.user_roles == role) for role in range(len(matrices.role_ids))]
+    heap: List[tuple] = []
+    for ra in range(len(members)):
+        a_rows = members[ra]
+        if not len(a_rows):
+            continue
+        for rb in range(ra + 1, len(members)):
+            b_rows = members[rb]
+            if not len(b_rows):
+                continue
+            # Gain of each employee from moving to the other role
+            a_gain = gaps[a_rows, ra] - gaps[a_rows, rb]
+            b_gain = gaps[b_rows, rb] - gaps[b_rows, ra]
+            a_top, b_top = _top(a_gain, k), _top(b_gain, k)
+            benefit = a_gain[a_top][:, None] + b_gain[b_top][None, :]
+            if benefit.max() <= 0 or (len(heap) == k and benefit.max() <= heap[0][0]):
+                continue
+            flat = _top(benefit.ravel(), k)
+            for index in flat[benefit.ravel()[flat] > 0]:
+                i, j = divmod(int(index), len(b_top))
+                a, b = int(a_rows[a_top[i]]), int(b_rows[b_top[j]])
+                entry = (int(benefit[i, j]), -a, -b)
+                if len(heap) < k:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heappushpop(heap, entry)
+    candidates = []
+    for benefit, a, b in sorted(heap, reverse=True):
+        a, b = -a, -b
+        ra, rb = matrices.user_roles[a], matrices.user_roles[b]
+        before = int(gaps[a, ra] + gaps[b, rb])
+        candidates.append(SwapCandidate(benefit, a, b, before, before - benefit))
+    return candidates
+
+
+def closed_gaps(matrices: SkillMatrices, candidate: SwapCandidate, snapshot: ReferenceSnapshot) -> List[str]:
+    """
+    Requirements the swap fills: unmet by the role's current holder, met by
+    the employee moving in.
+    """
+    closed = []
+    for outgoing, incoming in ((candidate.a, candidate.b), (candidate.b, candidate.a)):
+        role = matrices.user_roles[outgoing]
+        required = matrices.requirements[role]
+        filled = (required > 0) & (matrices.proficiency[outgoing] < required) & (matrices.proficiency[incoming] >= required)
+        role_ref = snapshot.project_roles.get(int(matrices.role_ids[role]))
+        for skill in np.flatnonzero(filled):
+            skill_ref = snapshot.skills.get(int(matrices.skill_ids[skill]))
+            closed.append(f"{skill_ref.name if skill_ref else matrices.skill_ids[skill]} "
+                          f"({role_ref.name if role_ref else matrices.role_ids[role]})")
+    return closed
+
+
+def suggest_role_swaps(db, k: int = 10) -> List[dict]:
+    """
+    Top ``k`` role swaps as RoleSkillSwapSuggestion dicts.
+    """
+    snapshot = reference_data.get()
+    matrices = load_matrices(db, snapshot)
+    candidates = top_swaps(matrices, k)
+    logger.debug("Role swaps: %s employees, %s roles, %s suggestions",
+                 len(matrices.user_ids), len(matrices.role_ids), len(candidates))
+
+    def role_name(row: int) -> str:
+        role = snapshot.project_roles.get(int(matrices.role_ids[matrices.user_roles[row]]))
+        return role.name if role else ""
+
+    return [
+        {
+            "employee_a_id": int(matrices.user_ids[candidate.a]),
+            "employee_a_name": matrices.user_names[candidate.a],
+            "employee_a_current_role": role_name(candidate.a),
+            "employee_b_id": int(matrices.user_ids[candidate.b]),
+            "employee_b_name": matrices.user_names[candidate.b],
+            "employee_b_current_role": role_name(candidate.b),
+            "suggested_swap_benefit": (f"Reduces the combined proficiency gap from {candidate.gap_before} "
+                                       f"to {candidate.gap_after} levels"),
+            "skill_gaps_reduced": closed_gaps(matrices, candidate, snapshot),
+        }
+        for candidate in candidates
+    ]
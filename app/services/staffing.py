@@ -0,0 +1,226 @@
+"""
+Project staffing: assign a candidate pool to project role slots so that
+the total skill gap is as small as possible.
+
+Each slot asks for ``headcount`` people against a list of skill
+requirements (by default its project role's). Levels compare by rank
+(ReferenceSnapshot.level_rank), and a missing level is a step of rank. A
+candidate's cost for a slot is lexicographic: missing levels in mandatory
+requirements first, then in optional ones, folded into one integer as
+``mandatory * scale + optional`` with ``scale`` above any optional total,
+so no amount of optional gap outweighs one mandatory level. The costs for
+every candidate and slot come from two BLAS products per level
+(app.services.role_swaps.level_gaps); each slot's column is then repeated
+once per seat and the (seats x candidates) matrix goes to the Hungarian
+algorithm, which finds the optimum, not a greedy approximation. With more
+seats than candidates every candidate is placed and the remaining seats
+stay empty.
+"""
+from itertools import chain
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+import app.models.models as models
+from app.core.reference_data import ReferenceSnapshot
+from app.services.role_swaps import level_gaps
+import logging
+
+logger = logging.getLogger("lms_backend.services.staffing")
+
+
+class SlotRequirement(NamedTuple):
+    skill_id: int
+    min_proficiency_level_id: int
+    is_mandatory: bool
+
+
+class Slot(NamedTuple):
+    project_role_id: int
+    headcount: int
+    requirements: Sequence[SlotRequirement]
+    label: Optional[str] = None
+
+
+def solve_assignment(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Minimum total cost matching of rows to columns, ``min(rows, columns)``
+    pairs, each row and column used at most once; returns (rows, columns)
+    sorted by row, like scipy.optimize.linear_sum_assignment.
+
+    Shortest augmenting path Hungarian algorithm with dual potentials,
+    O(n^2 m) for n <= m: each row is added by a Dijkstra search over
+    reduced costs, and every step of that search is one vectorized pass
+    over the columns.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+    # 1-based as in the textbook formulation: column 0 is the search root
+    # and match[j] == 0 marks a free column
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    match = np.zeros(m + 1, dtype=np.intp)
+    way = np.zeros(m + 1, dtype=np.intp)
+    reduced = np.full(m + 1, np.inf)
+    for row in range(1, n + 1):
+        match[0] = row
+        column = 0
+        distance = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while match[column]:
+            used[column] = True
+            current = match[column]
+            reduced[1:] = cost[current - 1] - u[current] - v[1:]
+            closer = ~used & (reduced < distance)
+            distance[closer] = reduced[closer]
+            way[closer] = column
+            candidates = np.where(used, np.inf, distance)
+            delta = candidates.min()
+            # Among equally near columns take a free one: it ends the search
+            # at once, which matters with the many ties of small integer costs
+            nearest = np.flatnonzero(candidates == delta)
+            free = nearest[match[nearest] == 0]
+            nearest = int(free[0] if len(free) else nearest[0])
+            u[match[used]] += delta
+            v[used] -= delta
+            distance[~used] -= delta
+            column = nearest
+        while column:
+            previous = way[column]
+            match[column] = match[previous]
+            column = previous
+    columns = np.flatnonzero(match[1:])
+    rows = match[1:][columns] - 1
+    if transposed:
+        rows, columns = columns, rows
+    order = np.argsort(rows)
+    return rows[order], columns[order]
+
+
+def load_candidates(db, skill_ids: np.ndarray, *criteria):
+    """
+    Users matching ``criteria`` (ordered by id) and their level ids in
+    ``skill_ids`` (sorted) as an int64 matrix, 0 = none; level ids are
+    arbitrary keys, ReferenceSnapshot.level_ranks_of maps them to ranks.
+    """
+    users = db.execute(
+        select(models.User.id, models.User.first_name, models.User.last_name, models.User.current_project_role_id)
+        .where(*criteria).order_by(models.User.id)
+    ).all()
+    user_ids = np.fromiter((row[0] for row in users), dtype=np.int64, count=len(users))
+    proficiency = np.zeros((len(users), len(skill_ids)), dtype=np.int64)
+    if len(users) and len(skill_ids):
+        skills = np.fromiter(chain.from_iterable(db.execute(
+            select(models.UserSkill.user_id, models.UserSkill.skill_id, models.UserSkill.proficiency_level_id)
+            .join(models.User, models.User.id == models.UserSkill.user_id)
+            .where(*criteria, models.UserSkill.skill_id.in_(skill_ids.tolist()))
+        )), dtype=np.int64).reshape(-1, 3)
+        proficiency[np.searchsorted(user_ids, skills[:, 0]), np.searchsorted(skill_ids, skills[:, 1])] = skills[:, 2]
+    return users, proficiency
+
+
+def requirement_matrices(snapshot: ReferenceSnapshot, slots: Sequence[Slot],
+                         skill_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (slots, skills) ranks of the minimum levels of the mandatory and of the
+    optional requirements, 0 = not required.
+    """
+    mandatory = np.zeros((len(slots), len(skill_ids)), dtype=np.int8)
+    optional = np.zeros_like(mandatory)
+    for row, slot in enumerate(slots):
+        for requirement in slot.requirements:
+            target = mandatory if requirement.is_mandatory else optional
+            column = np.searchsorted(skill_ids, requirement.skill_id)
+            target[row, column] = max(target[row, column], snapshot.level_rank(requirement.min_proficiency_level_id))
+    return mandatory, optional
+
+
+def staff(db, snapshot: ReferenceSnapshot, slots: Sequence[Slot], *criteria) -> dict:
+    """
+    Optimal assignment of the users matching ``criteria`` to ``slots``, with
+    the per-seat assignments and a gap summary per slot, as a
+    StaffingResponse dict.
+    """
+    skill_ids = np.array(sorted({r.skill_id for slot in slots for r in slot.requirements}), dtype=np.int64)
+    users, levels = load_candidates(db, skill_ids, *criteria)
+    proficiency = snapshot.level_ranks_of(levels)
+    mandatory, optional = requirement_matrices(snapshot, slots, skill_ids)
+    mandatory_gaps = level_gaps(proficiency, mandatory).astype(np.int64)
+    optional_gaps = level_gaps(proficiency, optional).astype(np.int64)
+    scale = int(optional.sum(axis=1, dtype=np.int64).max(initial=0)) + 1
+    cost = mandatory_gaps * scale + optional_gaps  # (candidates, slots)
+
+    seat_slots = np.repeat(np.arange(len(slots)), [slot.headcount for slot in slots])
+    pool = np.arange(len(users))
+    if len(users) > len(seat_slots) > 0:
+        # A seat of slot s never needs a candidate outside the len(seats)
+        # cheapest for s: one of those is always free and no worse
+        pool = np.unique(np.argpartition(cost, len(seat_slots) - 1, axis=0)[:len(seat_slots)])
+    seats, chosen = solve_assignment(cost[pool][:, seat_slots].T)
+    chosen = pool[chosen]
+    logger.debug("Staffing: %s candidates (%s after pruning), %s slots, %s seats, %s assigned",
+                 len(users), len(pool), len(slots), len(seat_slots), len(seats))
+
+    def skill_name(skill_id: int) -> Optional[str]:
+        skill = snapshot.skills.get(skill_id)
+        return skill.name if skill else None
+
+    seat_numbers = np.arange(len(seat_slots)) - np.searchsorted(seat_slots, seat_slots) + 1
+    assignments = []
+    for seat, row in zip(seats.tolist(), chosen.tolist()):
+        slot = int(seat_slots[seat])
+        user = users[row]
+        required = np.maximum(mandatory[slot], optional[slot])
+        missing = np.flatnonzero(proficiency[row] < required)
+        assignments.append({
+            "slot_index": slot,
+            "seat": int(seat_numbers[seat]),
+            "user_id": user.id,
+            "user_name": f"{user.first_name} {user.last_name}",
+            "current_project_role_id": user.current_project_role_id,
+            "mandatory_gap": int(mandatory_gaps[row, slot]),
+            "optional_gap": int(optional_gaps[row, slot]),
+            "missing_skills": [skill_name(int(skill_ids[column])) or str(skill_ids[column]) for column in missing],
+        })
+
+    summaries = []
+    for index, slot in enumerate(slots):
+        rows = chosen[seat_slots[seats] == index]
+        role = snapshot.project_roles.get(slot.project_role_id)
+        ranks = proficiency[rows]
+        skill_gaps = []
+        for requirement in slot.requirements:
+            column = np.searchsorted(skill_ids, requirement.skill_id)
+            short = snapshot.level_rank(requirement.min_proficiency_level_id) - ranks[:, column].astype(np.int64)
+            skill_gaps.append({
+                "skill_id": requirement.skill_id,
+                "skill_name": skill_name(requirement.skill_id),
+                "min_proficiency_level_id": requirement.min_proficiency_level_id,
+                "is_mandatory": requirement.is_mandatory,
+                "assignees_below": int((short > 0).sum()),
+                "missing_levels": int(short[short > 0].sum()),
+            })
+        summaries.append({
+            "slot_index": index,
+            "project_role_id": slot.project_role_id,
+            "project_role_name": role.name if role else None,
+            "label": slot.label,
+            "headcount": slot.headcount,
+            "filled": len(rows),
+            "fully_qualified": int(((mandatory_gaps[rows, index] + optional_gaps[rows, index]) == 0).sum()),
+            "mandatory_gap": int(mandatory_gaps[rows, index].sum()),
+            "optional_gap": int(optional_gaps[rows, index].sum()),
+            "skill_gaps": skill_gaps,
+        })
+    return {
+        "candidates": len(users),
+        "seats": len(seat_slots),
+        "mandatory_gap": sum(summary["mandatory_gap"] for summary in summaries),
+        "optional_gap": sum(summary["optional_gap"] for summary in summaries),
+        "assignments": assignments,
+        "slots": summaries,
+    }
@@ -0,0 +1,175 @@
+"""
+Benchmark for GET /admin/reports/lagging-progress on a large progress table.
+
+Seeds a throwaway SQLite database with --users developers (default 100k),
+each assigned one of 10 learning paths of 10 courses on a random date in the
+last year and holding a progress row for every course of it: 1M
+user_course_progress rows by default. The report is streamed from a uvicorn
+server; the script prints time to first byte, total time, items and bytes,
+and the server's peak resident memory before and after, which shows that the
+report does not hold the result in memory.
+
+    python scripts/bench_lagging_progress.py [--users 100000] [--runs 2]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PATHS = 10
+COURSES_PER_PATH = 10
+STATUSES = ("Not Started", "In Progress", "Completed")
+
+
+def seed(engine, models, users: int):
+    rng = random.Random(43)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    courses = PATHS * COURSES_PER_PATH
+    assignments, progress = [], []
+    for user in range(2, users + 2):
+        path = rng.randint(1, PATHS)
+        assignments.append({"user_id": user, "learning_path_id": path, "status": "Assigned",
+                            "assigned_date": now - timedelta(days=rng.randint(0, 365)),
+                            "is_mandatory_by_system": True, "is_registered_by_developer": False})
+        for order in range(COURSES_PER_PATH):
+            percentage = rng.choice((0, 0, 20, 50, 80, 100))
+            progress.append({"user_id": user, "course_id": (path - 1) * COURSES_PER_PATH + order + 1,
+                             "status": STATUSES[0] if percentage == 0 else STATUSES[2] if percentage == 100 else STATUSES[1],
+                             "progress_percentage": percentage})
+
+    with engine.begin() as connection:
+        connection.execute(models.Course.__table__.insert(),
+                           [{"id": course, "name": f"Course {course}"} for course in range(1, courses + 1)])
+        connection.execute(models.LearningPath.__table__.insert(),
+                           [{"id": path, "name": f"Path {path}"} for path in range(1, PATHS + 1)])
+        connection.execute(models.LearningPathCourse.__table__.insert(), [
+            {"learning_path_id": path, "course_id": (path - 1) * COURSES_PER_PATH + order, "sequence_order": order}
+            for path in range(1, PATHS + 1) for order in range(1, COURSES_PER_PATH + 1)
+        ])
+        connection.execute(models.User.__table__.insert(), [
+            {"id": 1, "sso_id": "admin", "email": "admin@example.com", "first_name": "Bench", "last_name": "Admin",
+             "hashed_password": "-", "role": "Admin"}
+        ] + [
+            {"id": user, "sso_id": f"dev{user}", "email": f"dev{user}@example.com", "first_name": f"First{user}",
+             "last_name": f"Last{user}", "hashed_password": "-", "role": "Developer"}
+            for user in range(2, users + 2)
+        ])
+        connection.execute(models.UserLearningPath.__table__.insert(), assignments)
+        connection.execute(models.UserCourseProgress.__table__.insert(), progress)
+        connection.exec_driver_sql("ANALYZE")
+    return len(progress)
+
+
+def peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def run_once(port: int, token: str, query: str):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+    start = time.perf_counter()
+    connection.request("GET", f"/admin/reports/lagging-progress{query}", headers={"Authorization": f"Bearer {token}"})
+    response = connection.getresponse()
+    if response.status != 200:
+        raise RuntimeError(f"GET lagging-progress{query} returned {response.status}: {response.read()[:500]!r}")
+    first = response.read1(65536)
+    first_byte = time.perf_counter() - start
+    body = first + response.read()
+    total = time.perf_counter() - start
+    connection.close()
+    return first_byte, total, len(json.loads(body)["lagging_individuals"]), len(body)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(port: int, server: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/api-health")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"uvicorn not ready within {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=2)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{os.path.join(tmp.name, 'lagging.db')}",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench-lagging-progress"),
+        "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "bench-lagging-progress"),
+        "LOG_LEVEL": "WARNING",
+        "AI_WARMUP": "false",
+    }
+    os.environ.update(env)
+    sys.path.insert(0, ROOT)
+
+    from app.api.auth import create_access_token
+    from app.core.database import engine
+    from app.core.migrations import upgrade
+    import app.models.models as models
+
+    upgrade(engine)
+    start = time.perf_counter()
+    rows = seed(engine, models, args.users)
+    print(f"Seeded {args.users} developers, {rows} progress rows in {time.perf_counter() - start:.1f}s")
+    engine.dispose()
+
+    token = create_access_token({"sub": "admin"}, role="Admin")
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_ready(port, server)
+        print(f"server peak RSS before: {peak_rss_mb(server.pid):.0f} MB")
+        for label, query in (("company, default pace", ""),
+                             ("company, every late course", "?min_days_lagging=0&grace_days=0&course_days=7"),
+                             ("one learning path", "?learning_path_id=3")):
+            results = [run_once(port, token, query) for _ in range(args.runs)]
+            first_byte = statistics.median(r[0] for r in results) * 1000
+            total = statistics.median(r[1] for r in results) * 1000
+            _, _, items, size = results[-1]
+            print(f"{label:<28} first byte {first_byte:7.1f} ms  total {total:8.1f} ms  "
+                  f"{items:>8} items  {size / 1e6:6.1f} MB")
+        print(f"server peak RSS after: {peak_rss_mb(server.pid):.0f} MB")
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Request overhead of the logging pipeline.
+
+Runs the same authenticated GET /admin/skills/{id} loop in a fresh process per
+logging configuration against a throwaway SQLite database and reports the
+latency per request:
+
+    python scripts/bench_logging.py [--requests 2000]
+
+Modes:
+    off            LOG_LEVEL=CRITICAL, no records emitted
+    info           LOG_LEVEL=INFO through the queue (JSON)
+    debug          LOG_LEVEL=DEBUG through the queue (JSON)
+    debug-sampled  LOG_LEVEL=DEBUG, LOG_DEBUG_SAMPLE_RATE=0.05
+    debug-sync     LOG_LEVEL=DEBUG with file/stream handlers attached directly
+                   to the root logger (the previous setup), for comparison
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "off": {"LOG_LEVEL": "CRITICAL"},
+    "info": {"LOG_LEVEL": "INFO"},
+    "debug": {"LOG_LEVEL": "DEBUG"},
+    "debug-sampled": {"LOG_LEVEL": "DEBUG", "LOG_DEBUG_SAMPLE_RATE": "0.05"},
+    "debug-sync": {"LOG_LEVEL": "DEBUG", "BENCH_SYNC_LOGGING": "1"},
+}
+
+
+def _use_sync_handlers():
+    import logging
+    from logging.handlers import RotatingFileHandler
+    from app.core.logger import LOG_FILE, TEXT_FORMAT, log_listener
+
+    log_listener.stop()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in (RotatingFileHandler(LOG_FILE, maxBytes=5*1024*1024, backupCount=5), logging.StreamHandler()):
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        root.addHandler(handler)
+
+
+def run_mode(requests: int) -> dict:
+    sys.path.insert(0, ROOT)
+    from fastapi.testclient import TestClient
+
+    if os.environ.get("BENCH_SYNC_LOGGING"):
+        _use_sync_handlers()
+
+    from app.main import app
+    from app.core.database import Base, engine, SessionLocal
+    from app.api.auth import create_access_token
+    from app.models import models
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    db.add(models.User(sso_id="bench", email="bench@example.com", first_name="Bench", last_name="Admin",
+                       hashed_password="-", role="Admin"))
+    db.add(models.Skill(id=1, name="Python"))
+    db.commit()
+    db.close()
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench'}, role='Admin')}"}
+    timings = []
+    with TestClient(app) as client:
+        for _ in range(50):
+            client.get("/admin/skills/1", headers=headers)
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = client.get("/admin/skills/1", headers=headers)
+            timings.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+
+    from app.core.logger import log_listener
+    log_listener.stop()
+    timings.sort()
+    return {
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "p50_ms": timings[len(timings) // 2] * 1000,
+        "p95_ms": timings[int(len(timings) * 0.95)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--mode", choices=list(MODES), action="append",
+                        help="Run only the given mode(s)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args.requests)))
+        return
+
+    results = {}
+    for mode in args.mode or MODES:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {
+                **os.environ,
+                "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                "SECRET_KEY": os.environ.get("SECRET_KEY", "bench"),
+                "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "bench"),
+                "LOG_FORMAT": "json",
+                "LOG_DEBUG_SAMPLE_RATE": "1.0",
+                **MODES[mode],
+            }
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", "--requests", str(args.requests)],
+                env=env, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+            )
+            if proc.returncode != 0:
+                print(f"{mode}: failed (exit {proc.returncode})")
+                continue
+            results[mode] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    baseline = results.get("off", {}).get("mean_ms")
+    print(f"{'mode':<15}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'overhead':>12}")
+    for mode, r in results.items():
+        overhead = f"{r['mean_ms'] - baseline:+.3f} ms" if baseline else "-"
+        print(f"{mode:<15}{r['mean_ms']:>10.3f}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{overhead:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Benchmark for the role swap suggestion engine (app.services.role_swaps).
+
+For each --employees size (default 10k and 50k) seeds a throwaway SQLite
+database with --roles project roles of --requirements requirements each over
+--skills skills and --user-skills skills per employee, then times:
+
+    load      load_matrices: two queries into the dense int8 matrices
+    gaps      gap_matrix: the employees x roles gap matrix
+    top-k     top_swaps: per role pair top-k of each side, k x k outer sum
+    full      every swap of every role pair as a NumPy outer sum (the
+              vectorized version without the top-k pruning)
+    pairwise  a Python loop over employee pairs, the way a per-pair
+              implementation would score them; timed on --sample employees
+              and extrapolated to all pairs
+
+and checks that top-k and the full computation agree on the benefits.
+
+    python scripts/bench_role_swaps.py [--employees 10000 50000] [--k 10]
+"""
+import argparse
+import heapq
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(engine, models, args, employees: int):
+    rng = np.random.default_rng(45)
+    levels = 5
+    with engine.begin() as connection:
+        connection.execute(models.ProficiencyLevel.__table__.insert(),
+                           [{"id": level, "name": f"Level {level}", "rank": level} for level in range(1, levels + 1)])
+        connection.execute(models.Skill.__table__.insert(),
+                           [{"id": skill, "name": f"Skill {skill}"} for skill in range(1, args.skills + 1)])
+        connection.execute(models.ProjectRole.__table__.insert(),
+                           [{"id": role, "name": f"Role {role}"} for role in range(1, args.roles + 1)])
+        connection.execute(models.RoleSkillRequirement.__table__.insert(), [
+            {"project_role_id": role, "skill_id": int(skill), "min_proficiency_level_id": int(rng.integers(2, levels + 1)),
+             "is_mandatory": True}
+            for role in range(1, args.roles + 1)
+            for skill in rng.choice(np.arange(1, args.skills + 1), args.requirements, replace=False)
+        ])
+        roles = rng.integers(1, args.roles + 1, employees)
+        connection.execute(models.User.__table__.insert(), [
+            {"id": user, "sso_id": f"dev{user}", "email": f"dev{user}@example.com", "first_name": f"First{user}",
+             "last_name": f"Last{user}", "hashed_password": "-", "role": "Developer",
+             "current_project_role_id": int(roles[user - 1])}
+            for user in range(1, employees + 1)
+        ])
+        skills = rng.random((employees, args.skills)).argsort(axis=1)[:, :args.user_skills] + 1
+        connection.execute(models.UserSkill.__table__.insert(), [
+            {"user_id": user, "skill_id": int(skill), "proficiency_level_id": int(rng.integers(1, levels + 1))}
+            for user in range(1, employees + 1) for skill in skills[user - 1]
+        ])
+    return employees * args.user_skills
+
+
+def full_benefits(matrices, gaps, k: int):
+    """
+    Top ``k`` benefits from every swap of every role pair, no pruning.
+    """
+    members = [np.flatnonzero(matrices.user_roles == role) for role in range(len(matrices.role_ids))]
+    heap = []
+    for ra in range(len(members)):
+        for rb in range(ra + 1, len(members)):
+            a_rows, b_rows = members[ra], members[rb]
+            benefit = ((gaps[a_rows, ra] - gaps[a_rows, rb])[:, None]
+                       + (gaps[b_rows, rb] - gaps[b_rows, ra])[None, :]).ravel()
+            top = np.partition(benefit, -k)[-k:] if len(benefit) > k else benefit
+            for value in top[top > 0].tolist():
+                if len(heap) < k:
+                    heapq.heappush(heap, value)
+                elif value > heap[0]:
+                    heapq.heappushpop(heap, value)
+    return sorted(heap, reverse=True)
+
+
+def pairwise_seconds(matrices, sample: int):
+    """
+    Seconds per employee pair for a Python loop scoring each swap from the
+    skill rows, measured over the first ``sample`` employees.
+    """
+    requirements = [{int(s): int(level) for s, level in enumerate(row) if level} for row in matrices.requirements]
+    skills = [{int(s): int(level) for s, level in enumerate(row) if level} for row in matrices.proficiency[:sample]]
+    roles = matrices.user_roles[:sample].tolist()
+
+    def gap(user, role):
+        return sum(max(0, level - skills[user].get(skill, 0)) for skill, level in requirements[role].items())
+
+    pairs = 0
+    best = 0
+    start = time.perf_counter()
+    for a in range(sample):
+        for b in range(a + 1, sample):
+            if roles[a] == roles[b]:
+                continue
+            pairs += 1
+            before = gap(a, roles[a]) + gap(b, roles[b])
+            after = gap(a, roles[b]) + gap(b, roles[a])
+            best = max(best, before - after)
+    return (time.perf_counter() - start) / max(pairs, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--skills", type=int, default=200)
+    parser.add_argument("--roles", type=int, default=40)
+    parser.add_argument("--requirements", type=int, default=12)
+    parser.add_argument("--user-skills", type=int, default=15)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--sample", type=int, default=400)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(tmp.name, 'role_swaps.db')}",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench-role-swaps"),
+        "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "bench-role-swaps"),
+        "LOG_LEVEL": "WARNING",
+        "AI_WARMUP": "false",
+    })
+    sys.path.insert(0, ROOT)
+
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.reference_data import load_snapshot
+    from app.services.role_swaps import gap_matrix, load_matrices, top_swaps
+    import app.models.models as models
+
+    try:
+        for employees in args.employees:
+            Base.metadata.drop_all(engine)
+            Base.metadata.create_all(engine)
+            start = time.perf_counter()
+            rows = seed(engine, models, args, employees)
+            print(f"{employees} employees, {rows} user skills, {args.roles} roles: "
+                  f"seeded in {time.perf_counter() - start:.1f}s")
+
+            with SessionLocal() as db:
+                snapshot = load_snapshot(db, 1)
+                start = time.perf_counter()
+                matrices = load_matrices(db, snapshot)
+                load = time.perf_counter() - start
+            start = time.perf_counter()
+            gaps = gap_matrix(matrices)
+            gap_time = time.perf_counter() - start
+            start = time.perf_counter()
+            candidates = top_swaps(matrices, args.k, gaps)
+            top_time = time.perf_counter() - start
+            start = time.perf_counter()
+            expected = full_benefits(matrices, gaps, args.k)
+            full_time = time.perf_counter() - start
+            per_pair = pairwise_seconds(matrices, min(args.sample, employees))
+            counts = np.bincount(matrices.user_roles, minlength=len(matrices.role_ids)).astype(np.int64)
+            pairs = int((counts.sum() ** 2 - (counts ** 2).sum()) // 2)
+
+            got = [candidate.benefit for candidate in candidates]
+            assert got == expected, f"top-k {got} != full {expected}"
+            print(f"  load      {load * 1000:9.1f} ms  ({matrices.proficiency.nbytes / 1e6:.1f} MB int8 matrix)")
+            print(f"  gaps      {gap_time * 1000:9.1f} ms")
+            print(f"  top-k     {top_time * 1000:9.1f} ms  best benefits {got[:5]}")
+            print(f"  full      {full_time * 1000:9.1f} ms  ({pairs:,} swaps)")
+            print(f"  pairwise  {per_pair * pairs:9.1f} s   (extrapolated, {per_pair * 1e6:.1f} us per pair)")
+    finally:
+        engine.dispose()
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Benchmark for GET /admin/reports/skill-gaps on a company-sized data set.
+
+Seeds a throwaway SQLite database with --users developers (default 200k)
+spread over 20 project roles with 8 skill requirements each. A developer
+holds most of their role's skills, about a third of the requirements end up
+as gaps. The seed bypasses the ORM, so the skill_gaps table is rebuilt
+afterwards (timed). The script then times the report query on its own next
+to computing the same rows live from the joined tables, the incremental
+refresh a single skill update costs, and finally streams the report from a
+uvicorn server and prints time to first byte, total time, items and bytes. It exits 1 when the full company report takes longer than
+--budget-ms. Server and client share the machine, so on a single core the
+totals include reading the response.
+
+    python scripts/bench_skill_gaps.py [--users 200000] [--runs 3] [--budget-ms 2000]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROLES = 20
+SKILLS = 60
+LEVELS = 5
+REQUIREMENTS_PER_ROLE = 8
+EXTRA_SKILLS_PER_USER = 2
+
+
+def seed(engine, models, users: int):
+    rng = random.Random(42)
+    requirements = {
+        role: [(skill, rng.randint(2, LEVELS)) for skill in rng.sample(range(1, SKILLS + 1), REQUIREMENTS_PER_ROLE)]
+        for role in range(1, ROLES + 1)
+    }
+    roles = {user: rng.randint(1, ROLES) for user in range(2, users + 2)}
+    user_skills = []
+    for user, role in roles.items():
+        held = {}
+        for skill, required in requirements[role]:
+            if rng.random() < 0.85:
+                held[skill] = required - 1 if rng.random() < 0.25 else rng.randint(required, LEVELS)
+        for skill in rng.sample(range(1, SKILLS + 1), EXTRA_SKILLS_PER_USER):
+            held.setdefault(skill, rng.randint(1, LEVELS))
+        user_skills.extend({"user_id": user, "skill_id": skill, "proficiency_level_id": level}
+                           for skill, level in held.items())
+
+    with engine.begin() as connection:
+        connection.execute(models.ProficiencyLevel.__table__.insert(),
+                           [{"id": level, "name": f"Level {level}", "rank": level} for level in range(1, LEVELS + 1)])
+        connection.execute(models.ProjectRole.__table__.insert(),
+                           [{"id": role, "name": f"Role {role}"} for role in range(1, ROLES + 1)])
+        connection.execute(models.Skill.__table__.insert(),
+                           [{"id": skill, "name": f"Skill {skill}"} for skill in range(1, SKILLS + 1)])
+        connection.execute(models.RoleSkillRequirement.__table__.insert(), [
+            {"project_role_id": role, "skill_id": skill, "min_proficiency_level_id": required,
+             "is_mandatory": rng.random() < 0.6}
+            for role, role_requirements in requirements.items()
+            for skill, required in role_requirements
+        ])
+        connection.execute(models.User.__table__.insert(), [
+            {"id": 1, "sso_id": "admin", "email": "admin@example.com", "first_name": "Bench", "last_name": "Admin",
+             "hashed_password": "-", "role": "Admin", "current_project_role_id": None}
+        ] + [
+            {"id": user, "sso_id": f"dev{user}", "email": f"dev{user}@example.com", "first_name": f"First{user}",
+             "last_name": f"Last{user}", "hashed_password": "-", "role": "Developer", "current_project_role_id": role}
+            for user, role in roles.items()
+        ])
+        connection.execute(models.UserSkill.__table__.insert(), user_skills)
+        connection.exec_driver_sql("ANALYZE")
+
+
+def run_once(port: int, token: str, query: str):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    start = time.perf_counter()
+    connection.request("GET", f"/admin/reports/skill-gaps{query}", headers={"Authorization": f"Bearer {token}"})
+    response = connection.getresponse()
+    if response.status != 200:
+        raise RuntimeError(f"GET skill-gaps{query} returned {response.status}: {response.read()[:500]!r}")
+    first = response.read1(65536)
+    first_byte = time.perf_counter() - start
+    body = first + response.read()
+    total = time.perf_counter() - start
+    connection.close()
+    return first_byte, total, len(json.loads(body)["skill_gaps"]), len(body)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(port: int, server: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/api-health")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"uvicorn not ready within {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=2000)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{os.path.join(tmp.name, 'gaps.db')}",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench-skill-gaps"),
+        "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "bench-skill-gaps"),
+        "LOG_LEVEL": "WARNING",
+        "AI_WARMUP": "false",
+    }
+    os.environ.update(env)
+    sys.path.insert(0, ROOT)
+
+    from app.api.auth import create_access_token
+    from app.core.database import engine
+    from app.core.migrations import upgrade
+    import app.models.models as models
+
+    upgrade(engine)
+    start = time.perf_counter()
+    seed(engine, models, args.users)
+    print(f"Seeded {args.users} developers in {time.perf_counter() - start:.1f}s")
+
+    from sqlalchemy import func
+    from app.core import skill_gaps
+    start = time.perf_counter()
+    rows = skill_gaps.rebuild(engine)
+    print(f"Rebuilt skill_gaps ({rows} rows) in {time.perf_counter() - start:.1f}s")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE skill_gaps")
+
+    # The query alone, for comparison with the full report
+    import app.crud.crud as crud
+    from app.core.database import SessionLocal
+    with SessionLocal() as db:
+        start = time.perf_counter()
+        rows = sum(1 for _ in crud.iter_skill_gaps(db))
+        print(f"query only (company, gaps): {(time.perf_counter() - start) * 1000:.1f} ms for {rows} rows")
+        start = time.perf_counter()
+        gap = func.coalesce(models.UserSkill.proficiency_level_id, 0) < models.RoleSkillRequirement.min_proficiency_level_id
+        rows = sum(1 for _ in db.connection().execute(skill_gaps.computed_rows(gap)))
+        print(f"live computation (company, gaps): {(time.perf_counter() - start) * 1000:.1f} ms for {rows} rows")
+        # What one admin skill update adds to its transaction
+        timings = []
+        for user in range(2, 2 + 50):
+            start = time.perf_counter()
+            skill_gaps.refresh_users(db.connection(), [user])
+            timings.append(time.perf_counter() - start)
+        db.rollback()
+        print(f"incremental refresh of one developer: {statistics.median(timings) * 1000:.2f} ms (median of 50)")
+    engine.dispose()
+
+    token = create_access_token({"sub": "admin"}, role="Admin")
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    failures = 0
+    try:
+        _wait_ready(port, server)
+        for label, query, budgeted in (("company, gaps", "", True),
+                                       ("company, all requirements", "?gaps_only=false", False),
+                                       ("one role, mandatory gaps", "?project_role_id=3&mandatory_only=true", False)):
+            results = [run_once(port, token, query) for _ in range(args.runs)]
+            first_byte = statistics.median(r[0] for r in results) * 1000
+            total = statistics.median(r[1] for r in results) * 1000
+            _, _, items, size = results[-1]
+            over = budgeted and total > args.budget_ms
+            failures += over
+            print(f"[{'FAIL' if over else 'ok'}] {label:<26} first byte {first_byte:7.1f} ms  "
+                  f"total {total:8.1f} ms  {items:>8} items  {size / 1e6:6.1f} MB")
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        tmp.cleanup()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark for the in-memory skill matrix behind /admin/skills/search and
+/admin/users/{id}/similar.
+
+Seeds a throwaway SQLite database with --users employees (default 100k)
+holding --user-skills of --skills skills each, loads app.core.skill_matrix
+and times multi-skill threshold queries against it and against the
+equivalent SQL (one EXISTS per skill over user_skills), and cosine top-k
+similarity queries against an exact product with a dense normalized
+float32 copy of the matrix. Also prints the matrix's memory footprint, its
+load time and the cost of an incremental refresh after a write.
+
+    python scripts/bench_skill_matrix.py [--users 100000] [--runs 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUERIES = (
+    ("one skill", [(1, 3)], None),
+    ("two skills", [(1, 4), (2, 3)], None),
+    ("two skills, one role", [(1, 4), (2, 3)], 3),
+    ("four skills", [(1, 2), (2, 2), (3, 3), (4, 2)], None),
+)
+
+
+def seed(engine, models, args):
+    rng = np.random.default_rng(46)
+    with engine.begin() as connection:
+        connection.execute(models.ProficiencyLevel.__table__.insert(),
+                           [{"id": level, "name": f"Level {level}", "rank": level} for level in range(1, 6)])
+        connection.execute(models.Skill.__table__.insert(),
+                           [{"id": skill, "name": f"Skill {skill}"} for skill in range(1, args.skills + 1)])
+        connection.execute(models.ProjectRole.__table__.insert(),
+                           [{"id": role, "name": f"Role {role}"} for role in range(1, 21)])
+        connection.execute(models.User.__table__.insert(), [
+            {"id": user, "sso_id": f"dev{user}", "email": f"dev{user}@example.com", "first_name": f"First{user}",
+             "last_name": f"Last{user}", "hashed_password": "-", "role": "Developer",
+             "current_project_role_id": int(rng.integers(1, 21))}
+            for user in range(1, args.users + 1)
+        ])
+        # Skewed towards low skill ids so the queried skills are common ones
+        weights = 1 / np.arange(1, args.skills + 1)
+        weights /= weights.sum()
+        rows = []
+        for user in range(1, args.users + 1):
+            for skill in rng.choice(args.skills, args.user_skills, replace=False, p=weights) + 1:
+                rows.append({"user_id": user, "skill_id": int(skill), "proficiency_level_id": int(rng.integers(1, 6))})
+        connection.execute(models.UserSkill.__table__.insert(), rows)
+        connection.exec_driver_sql("ANALYZE")
+    return len(rows)
+
+
+def sql_search(db, models, conditions, project_role_id):
+    from sqlalchemy import and_, exists, func, select
+
+    user_skill = models.UserSkill
+    query = select(func.count(models.User.id))
+    for skill_id, level in conditions:
+        query = query.where(exists().where(and_(user_skill.user_id == models.User.id, user_skill.skill_id == skill_id,
+                                                user_skill.proficiency_level_id >= level)))
+    if project_role_id is not None:
+        query = query.where(models.User.current_project_role_id == project_role_id)
+    return db.execute(query).scalar()
+
+
+def timed(function, runs: int):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--skills", type=int, default=300)
+    parser.add_argument("--user-skills", type=int, default=12)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(tmp.name, 'skill_matrix.db')}",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench-skill-matrix"),
+        "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "bench-skill-matrix"),
+        "LOG_LEVEL": "WARNING",
+        "AI_WARMUP": "false",
+    })
+    sys.path.insert(0, ROOT)
+
+    from app.core.database import SessionLocal, engine
+    from app.core.migrations import upgrade
+    from app.core.skill_matrix import skill_matrix
+    import app.models.models as models
+
+    try:
+        upgrade(engine)
+        start = time.perf_counter()
+        rows = seed(engine, models, args)
+        print(f"Seeded {args.users} users, {rows} user skills in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        stats = skill_matrix.stats()
+        print(f"matrix load {(time.perf_counter() - start) * 1000:.0f} ms: {stats['users']} users x "
+              f"{stats['skills']} skills, {stats['memory_bytes'] / 1e6:.1f} MB")
+
+        with SessionLocal() as db:
+            for label, conditions, role in QUERIES:
+                matrix_time, result = timed(lambda: skill_matrix.search(conditions, role), args.runs)
+                sql_time, count = timed(lambda: sql_search(db, models, conditions, role), max(args.runs // 20, 3))
+                assert result.total == count, f"{label}: matrix {result.total} != SQL {count}"
+                print(f"{label:<22} {result.total:>7} matches  matrix {matrix_time * 1e6:8.1f} us  "
+                      f"SQL {sql_time * 1000:8.1f} ms  ({sql_time / matrix_time:,.0f}x)")
+
+        similarity_users = np.random.default_rng(47).integers(1, args.users + 1, 20)
+        similar_time, _ = timed(lambda: [skill_matrix.similar(int(user), 10) for user in similarity_users], 5)
+        role_time, _ = timed(lambda: [skill_matrix.similar(int(user), 10, 3) for user in similarity_users], 5)
+        state = skill_matrix._current()
+        dense = state.levels[:, :state.size].T.astype(np.float32)
+        dense /= np.maximum(np.linalg.norm(dense, axis=1, keepdims=True), 1e-9)
+
+        def dense_similar(user):
+            scores = dense @ dense[state.user_index[user]]
+            scores[state.user_index[user]] = -1
+            top = np.argpartition(scores, -10)[-10:]
+            return np.sort(scores[top])[::-1]
+
+        dense_time, _ = timed(lambda: [dense_similar(int(user)) for user in similarity_users], 5)
+        for user in similarity_users:
+            assert np.allclose(skill_matrix.similar(int(user), 10).similarity, dense_similar(int(user)), atol=1e-5)
+        print(f"similar, top 10          matrix {similar_time / len(similarity_users) * 1e6:8.1f} us  "
+              f"dense normalized copy ({dense.nbytes / 1e6:.0f} MB) {dense_time / len(similarity_users) * 1e6:8.1f} us")
+        print(f"similar, top 10, 1 role  matrix {role_time / len(similarity_users) * 1e6:8.1f} us")
+        del dense
+
+        with SessionLocal() as db:
+            user_skill = db.query(models.UserSkill).filter(models.UserSkill.user_id == args.users // 2).first()
+            user_skill.proficiency_level_id = user_skill.proficiency_level_id % 5 + 1
+            db.commit()
+        start = time.perf_counter()
+        skill_matrix.search(QUERIES[0][1])
+        print(f"first search after a write (refreshes 1 user): {(time.perf_counter() - start) * 1e6:.0f} us")
+    finally:
+        engine.dispose()
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
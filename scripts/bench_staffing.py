@@ -0,0 +1,180 @@
+"""
+Benchmark for the project staffing solver (app.services.staffing).
+
+Seeds a throwaway SQLite database with --candidates employees holding
+--user-skills of --skills skills and --roles project roles of
+--requirements requirements each, builds --slots slots of --headcount
+seats over random roles, and times:
+
+    load     load_candidates: users and their levels in the required skills
+    cost     level ranks, level_gaps for mandatory and optional requirements, the
+             (candidates x slots) lexicographic cost
+    solve    solve_assignment on the full (seats x candidates) matrix
+    staff    the whole staff() call, summaries included
+
+and compares the optimal total cost with a greedy assignment (each seat in
+turn takes its cheapest free candidate). Before that it checks
+solve_assignment against brute force on small random matrices, and against
+scipy.optimize.linear_sum_assignment on the full instance if SciPy is
+installed.
+
+    python scripts/bench_staffing.py [--candidates 2000] [--slots 500]
+"""
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(engine, models, args):
+    rng = np.random.default_rng(50)
+    levels = 5
+    with engine.begin() as connection:
+        connection.execute(models.ProficiencyLevel.__table__.insert(),
+                           [{"id": level, "name": f"Level {level}", "rank": level} for level in range(1, levels + 1)])
+        connection.execute(models.Skill.__table__.insert(),
+                           [{"id": skill, "name": f"Skill {skill}"} for skill in range(1, args.skills + 1)])
+        connection.execute(models.ProjectRole.__table__.insert(),
+                           [{"id": role, "name": f"Role {role}"} for role in range(1, args.roles + 1)])
+        connection.execute(models.RoleSkillRequirement.__table__.insert(), [
+            {"project_role_id": role, "skill_id": int(skill), "min_proficiency_level_id": int(rng.integers(2, levels + 1)),
+             "is_mandatory": bool(rng.random() < 0.7)}
+            for role in range(1, args.roles + 1)
+            for skill in rng.choice(np.arange(1, args.skills + 1), args.requirements, replace=False)
+        ])
+        connection.execute(models.User.__table__.insert(), [
+            {"id": user, "sso_id": f"dev{user}", "email": f"dev{user}@example.com", "first_name": f"First{user}",
+             "last_name": f"Last{user}", "hashed_password": "-", "role": "Developer",
+             "current_project_role_id": int(rng.integers(1, args.roles + 1))}
+            for user in range(1, args.candidates + 1)
+        ])
+        skills = rng.random((args.candidates, args.skills)).argsort(axis=1)[:, :args.user_skills] + 1
+        connection.execute(models.UserSkill.__table__.insert(), [
+            {"user_id": user, "skill_id": int(skill), "proficiency_level_id": int(rng.integers(1, levels + 1))}
+            for user in range(1, args.candidates + 1) for skill in skills[user - 1]
+        ])
+    return rng.integers(1, args.roles + 1, args.slots)
+
+
+def check_small(solve_assignment, runs: int = 300):
+    rng = np.random.default_rng(7)
+    for _ in range(runs):
+        rows, columns = (int(size) for size in rng.integers(1, 7, 2))
+        cost = rng.integers(0, 8, (rows, columns)).astype(float)
+        assigned_rows, assigned_columns = solve_assignment(cost)
+        if rows <= columns:
+            best = min(cost[range(rows), list(p)].sum() for p in itertools.permutations(range(columns), rows))
+        else:
+            best = min(cost[list(p), range(columns)].sum() for p in itertools.permutations(range(rows), columns))
+        assert len(assigned_rows) == min(rows, columns) and cost[assigned_rows, assigned_columns].sum() == best
+
+
+def greedy(cost: np.ndarray) -> int:
+    """
+    Total cost when each seat (row) in turn takes its cheapest free candidate.
+    """
+    free = np.ones(cost.shape[1], dtype=bool)
+    total = 0
+    for row in cost:
+        column = int(np.argmin(np.where(free, row, np.inf)))
+        free[column] = False
+        total += int(row[column])
+    return total
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=2000)
+    parser.add_argument("--slots", type=int, default=500)
+    parser.add_argument("--headcount", type=int, default=1)
+    parser.add_argument("--skills", type=int, default=200)
+    parser.add_argument("--roles", type=int, default=40)
+    parser.add_argument("--requirements", type=int, default=8)
+    parser.add_argument("--user-skills", type=int, default=25)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(tmp.name, 'staffing.db')}",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench-staffing"),
+        "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "bench-staffing"),
+        "LOG_LEVEL": "WARNING",
+        "AI_WARMUP": "false",
+    })
+    sys.path.insert(0, ROOT)
+
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.reference_data import load_snapshot
+    from app.services.role_swaps import level_gaps
+    from app.services.staffing import (Slot, SlotRequirement, load_candidates, requirement_matrices,
+                                       solve_assignment, staff)
+    import app.models.models as models
+
+    check_small(solve_assignment)
+    print("solve_assignment matches brute force on small matrices")
+    try:
+        Base.metadata.create_all(engine)
+        start = time.perf_counter()
+        slot_roles = seed(engine, models, args)
+        print(f"{args.candidates} candidates, {args.slots} slots x {args.headcount} seats over {args.roles} roles: "
+              f"seeded in {time.perf_counter() - start:.1f}s")
+
+        with SessionLocal() as db:
+            snapshot = load_snapshot(db, 1)
+            slots = [Slot(int(role), args.headcount,
+                          [SlotRequirement(r.skill_id, r.min_proficiency_level_id, r.is_mandatory)
+                           for r in snapshot.requirements_for_role(int(role))])
+                     for role in slot_roles]
+            skill_ids = np.array(sorted({r.skill_id for slot in slots for r in slot.requirements}), dtype=np.int64)
+            load_time, (users, levels) = timed(lambda: load_candidates(db, skill_ids))
+
+            def costs():
+                proficiency = snapshot.level_ranks_of(levels)
+                mandatory, optional = requirement_matrices(snapshot, slots, skill_ids)
+                scale = int(optional.sum(axis=1, dtype=np.int64).max(initial=0)) + 1
+                return (level_gaps(proficiency, mandatory).astype(np.int64) * scale
+                        + level_gaps(proficiency, optional).astype(np.int64))
+
+            cost_time, cost = timed(costs)
+            seat_cost = cost[:, np.repeat(np.arange(len(slots)), args.headcount)].T
+            solve_time, (seats, chosen) = timed(lambda: solve_assignment(seat_cost))
+            staff_time, result = timed(lambda: staff(db, snapshot, slots))
+
+        optimum = int(seat_cost[seats, chosen].sum())
+        print(f"  load   {load_time * 1000:9.1f} ms")
+        print(f"  cost   {cost_time * 1000:9.1f} ms  ({cost.shape[0]} x {cost.shape[1]})")
+        print(f"  solve  {solve_time * 1000:9.1f} ms  ({seat_cost.shape[0]} x {seat_cost.shape[1]}, unpruned)")
+        print(f"  staff  {staff_time * 1000:9.1f} ms  (end to end, pruned, with summaries)")
+        print(f"  total cost: optimal {optimum}, greedy {greedy(seat_cost)}; "
+              f"mandatory gap {result['mandatory_gap']}, optional gap {result['optional_gap']}")
+        user_rows = np.searchsorted([user.id for user in users], [a["user_id"] for a in result["assignments"]])
+        pruned = int(cost[user_rows, [a["slot_index"] for a in result["assignments"]]].sum())
+        assert len(result["assignments"]) == min(len(users), seat_cost.shape[0])
+        assert pruned == optimum, f"pruned staff() {pruned} != unpruned optimum {optimum}"
+        try:
+            from scipy.optimize import linear_sum_assignment
+        except ImportError:
+            print("  (SciPy not installed; skipped the linear_sum_assignment cross-check)")
+        else:
+            expected = seat_cost[linear_sum_assignment(seat_cost)].sum()
+            assert optimum == expected, f"solve_assignment {optimum} != linear_sum_assignment {expected}"
+            print("  matches scipy.optimize.linear_sum_assignment")
+    finally:
+        engine.dispose()
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Cold-start benchmark for app.main:app.
+
+Measures, each in a fresh interpreter against a throwaway SQLite database:
+
+  * import cost of app.main (``python -X importtime``), with the slowest
+    modules listed
+  * time to first response: from spawning uvicorn until GET /api-health
+    answers 200
+
+and fails (exit code 1) when a budget is exceeded or when a module that must
+stay off the start-up path (pandas, openpyxl, langchain, ...) gets imported:
+
+    python scripts/bench_startup.py [--runs 3] [--import-budget-ms 2000] [--ttfr-budget-ms 3000]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only the upload and AI routes need these; they are imported on first use
+DEFERRED_MODULES = (
+    "pandas",
+    "openpyxl",
+    "numpy",
+    "langchain",
+    "langchain_community",
+    "langchain_core",
+    "langchain_google_genai",
+)
+
+
+def _env(tmp: str) -> dict:
+    return {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'startup.db')}",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench"),
+        "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "bench"),
+        "LOG_LEVEL": "WARNING",
+    }
+
+
+def measure_imports(tmp: str):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=_env(tmp), cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import app.main failed:\n{proc.stderr[-2000:]}")
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|", 1).split("|")]
+        if self_us.isdigit():
+            modules[name] = int(cumulative_us)
+    return modules
+
+
+def measure_first_response(tmp: str, timeout: float = 60.0) -> float:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    url = f"http://127.0.0.1:{port}/api-health"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=_env(tmp), cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError, OSError):
+                time.sleep(0.01)
+        raise RuntimeError(f"no response from {url} within {timeout}s")
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--import-budget-ms", type=float, default=2000)
+    parser.add_argument("--ttfr-budget-ms", type=float, default=3000)
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    args = parser.parse_args()
+
+    import_times, first_responses, modules = [], [], {}
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            modules = measure_imports(tmp)
+            import_times.append(modules.get("app.main", 0) / 1000)
+        with tempfile.TemporaryDirectory() as tmp:
+            first_responses.append(measure_first_response(tmp) * 1000)
+
+    print("Slowest imports (cumulative, last run):")
+    for name, cumulative in sorted(modules.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:9.1f} ms  {name}")
+
+    import_ms = statistics.median(import_times)
+    ttfr_ms = statistics.median(first_responses)
+    print(f"\nimport app.main:        {import_ms:8.1f} ms (median of {args.runs}, budget {args.import_budget_ms:.0f} ms)")
+    print(f"time to first response: {ttfr_ms:8.1f} ms (median of {args.runs}, budget {args.ttfr_budget_ms:.0f} ms)")
+
+    failures = []
+    eager = sorted(name for name in modules if name.split(".")[0] in DEFERRED_MODULES and "." not in name)
+    if eager:
+        failures.append(f"imported at start-up but should be deferred: {', '.join(eager)}")
+    if import_ms > args.import_budget_ms:
+        failures.append(f"import app.main took {import_ms:.0f} ms, budget {args.import_budget_ms:.0f} ms")
+    if ttfr_ms > args.ttfr_budget_ms:
+        failures.append(f"first response after {ttfr_ms:.0f} ms, budget {args.ttfr_budget_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
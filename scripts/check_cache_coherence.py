@@ -0,0 +1,173 @@
+"""
+Multi-process cache coherence check.
+
+Starts two uvicorn processes ("workers" A and B) on one throwaway SQLite
+database with a shared invalidation bus (CACHE_BUS_URL) and cache TTLs of an
+hour, so that only the bus can make B see a write made through A:
+
+  * user detail: B caches GET /admin/users/{id}, A renames the user, B must
+    return the new name
+  * reference data: B loads its snapshot, A creates a project role, B must
+    find it by id
+
+Each step fails (exit code 1) when B has not converged within --timeout
+seconds. ``--no-bus`` runs the same steps without CACHE_BUS_URL to show the
+stale reads the bus prevents (expected to fail).
+
+    python scripts/check_cache_coherence.py [--timeout 5] [--shared-tier] [--no-bus]
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = "coherence"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _request(base: str, method: str, path: str, token: str = None, body=None, form=None):
+    headers = {}
+    data = None
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if body is not None:
+        data = json.dumps(body).encode()
+        headers["Content-Type"] = "application/json"
+    elif form is not None:
+        data = urllib.parse.urlencode(form).encode()
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+    request = urllib.request.Request(base + path, data=data, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read() or b"null")
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"null")
+
+
+def seed(env: dict):
+    script = (
+        "from app.core.database import engine, SessionLocal\n"
+        "from app.core.migrations import upgrade\n"
+        "import app.models.models as models\n"
+        "from app.crud.crud import hash_password\n"
+        "upgrade(engine)\n"
+        "with SessionLocal() as db:\n"
+        "    db.add(models.ProjectRole(id=1, name='Backend Developer'))\n"
+        f"    db.add(models.User(id=1, sso_id='admin', email='admin@example.com', first_name='Ada', last_name='Admin',\n"
+        f"                       hashed_password=hash_password({PASSWORD!r}), role='Admin', current_project_role_id=1))\n"
+        "    db.commit()\n"
+    )
+    subprocess.run([sys.executable, "-c", script], env=env, cwd=ROOT, check=True)
+
+
+def start_worker(env: dict, port: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(base: str, server: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        try:
+            if _request(base, "GET", "/api-health")[0] == 200:
+                return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.05)
+    raise RuntimeError(f"{base} not ready within {timeout}s")
+
+
+def converge(check, timeout: float):
+    """
+    Seconds until ``check()`` is true, or None after ``timeout``.
+    """
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        if check():
+            return time.monotonic() - start
+        time.sleep(0.05)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--timeout", type=float, default=5.0, help="Seconds B may take to see a write")
+    parser.add_argument("--shared-tier", action="store_true", help="Also use a shared SQLite cache tier")
+    parser.add_argument("--no-bus", action="store_true", help="Run without the invalidation bus")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'app.db')}",
+            "SECRET_KEY": os.environ.get("SECRET_KEY", "coherence"),
+            "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "coherence"),
+            "LOG_LEVEL": "WARNING",
+            "AI_WARMUP": "false",
+            "USER_CACHE_TTL_SECONDS": "3600",
+            "REFERENCE_DATA_TTL_SECONDS": "3600",
+            "CACHE_BUS_POLL_SECONDS": "0.1",
+        }
+        if not args.no_bus:
+            env["CACHE_BUS_URL"] = f"sqlite:///{os.path.join(tmp, 'bus.db')}"
+        if args.shared_tier:
+            env["CACHE_SHARED_URL"] = f"sqlite:///{os.path.join(tmp, 'cache.db')}"
+        seed(env)
+
+        ports = [_free_port(), _free_port()]
+        servers = [start_worker(env, port) for port in ports]
+        a, b = (f"http://127.0.0.1:{port}" for port in ports)
+        failures = 0
+        try:
+            for base, server in zip((a, b), servers):
+                wait_ready(base, server)
+            token = _request(a, "POST", "/token", form={"username": "admin", "password": PASSWORD})[1]["access_token"]
+
+            # User detail cache
+            assert _request(b, "GET", "/admin/users/1", token)[1]["first_name"] == "Ada"
+            assert _request(a, "GET", "/admin/users/1", token)[1]["first_name"] == "Ada"
+            _request(a, "PUT", "/admin/users/1", token, body={"first_name": "Grace"})
+            seconds = converge(lambda: _request(b, "GET", "/admin/users/1", token)[1]["first_name"] == "Grace",
+                               args.timeout)
+            failures += seconds is None
+            print(f"[{'ok' if seconds is not None else 'STALE'}] user rename visible on B"
+                  + (f" after {seconds * 1000:.0f} ms" if seconds is not None else f" (not within {args.timeout}s)"))
+
+            # Reference data snapshot
+            assert _request(b, "GET", "/admin/project-roles/1", token)[0] == 200
+            status, role = _request(a, "POST", "/admin/project-roles/", token, body={"name": "Data Engineer"})
+            assert status == 200, role
+            seconds = converge(lambda: _request(b, "GET", f"/admin/project-roles/{role['id']}", token)[0] == 200,
+                               args.timeout)
+            failures += seconds is None
+            print(f"[{'ok' if seconds is not None else 'STALE'}] new project role visible on B"
+                  + (f" after {seconds * 1000:.0f} ms" if seconds is not None else f" (not within {args.timeout}s)"))
+        finally:
+            for server in servers:
+                server.terminate()
+                try:
+                    server.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
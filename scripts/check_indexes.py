@@ -0,0 +1,117 @@
+"""
+EXPLAIN-based check that the hot crud queries use the access-path indexes
+added by app/migrations/v0002_access_path_indexes.py, the skill_gaps
+indexes of v0005 and the lagging-progress index of v0006.
+
+Each check calls a crud function, captures the SELECTs it sends and
+EXPLAINs them. It fails (exit code 1) when none of them uses the expected
+index, or when an ordered read sorts instead of following the index.
+
+    python scripts/check_indexes.py                         # throwaway SQLite schema
+    python scripts/check_indexes.py --database-url mysql+mysqlconnector://...
+"""
+import argparse
+from datetime import datetime
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (description, crud call, expected index, must read in index order)
+CHECKS = [
+    ("in-progress courses of a user",
+     lambda crud, db: crud.get_user_course_progress(db, 1, status="In Progress"),
+     "idx_user_course_progress_user_status", False),
+    ("learning path registration lookup",
+     lambda crud, db: crud.get_user_learning_path(db, 1, 1),
+     "idx_user_learning_paths_user_path", False),
+    ("courses of a learning path in sequence",
+     lambda crud, db: crud.get_learning_path_courses(db, 1),
+     "idx_learning_path_courses_path_order", True),
+    ("learning path details (ordered relationship load)",
+     lambda crud, db: crud.get_learning_path_with_details(db, 1),
+     "idx_learning_path_courses_path_order", True),
+    ("developers of a project role",
+     lambda crud, db: crud.get_users_by_project_role(db, 1),
+     "idx_users_current_project_role", False),
+    ("skill gap dashboard",
+     lambda crud, db: list(crud.iter_skill_gaps(db)),
+     "idx_skill_gaps_gap_user_requirement", True),
+    ("skill gap dashboard of a project role",
+     lambda crud, db: list(crud.iter_skill_gaps(db, project_role_id=1)),
+     "idx_skill_gaps_role_gap_user_requirement", True),
+    ("skill gap dashboard of a skill",
+     lambda crud, db: list(crud.iter_skill_gaps(db, skill_id=1)),
+     "idx_skill_gaps_skill_gap_user_requirement", True),
+    ("lagging-progress report",
+     lambda crud, db: list(crud.iter_lagging_progress(db, datetime(2100, 1, 1))),
+     "idx_user_course_progress_course_user", False),
+]
+
+# MySQL reuses the UNIQUE key of create_database.sql for this lookup
+EQUIVALENT_INDEXES = {"idx_user_learning_paths_user_path": ("key=user_id",)}
+
+
+def _seed(db, models):
+    # One row per table so the relationship loads actually run
+    db.add(models.ProjectRole(id=1, name="Backend Developer"))
+    db.add(models.LearningPath(id=1, name="Backend"))
+    db.add(models.Course(id=1, name="Python"))
+    db.flush()
+    db.add(models.LearningPathCourse(learning_path_id=1, course_id=1, sequence_order=1))
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Check an existing, migrated database instead of a throwaway SQLite one")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp.name, 'indexes.db')}"
+    os.environ.setdefault("SECRET_KEY", "check-indexes")
+    sys.path.insert(0, ROOT)
+
+    from app.core.database import engine, SessionLocal
+    from app.core.migrations import upgrade
+    from app.core.query_plans import capture_statements, explain, uses_index, sorts_without_index
+    import app.crud.crud as crud
+    import app.models.models as models
+
+    if tmp is not None:
+        upgrade(engine)
+        with SessionLocal() as db:
+            _seed(db, models)
+
+    failures = 0
+    for description, call, index_name, ordered in CHECKS:
+        with SessionLocal() as db:
+            with capture_statements(engine) as statements:
+                call(crud, db)
+        with engine.connect() as connection:
+            plans = [explain(connection, statement, parameters) for statement, parameters in statements]
+        matching = [
+            plan for plan in plans
+            if uses_index(plan, index_name) or any(uses_index(plan, alt) for alt in EQUIVALENT_INDEXES.get(index_name, ()))
+        ]
+        ok = bool(matching) and not (ordered and any(sorts_without_index(plan) for plan in matching))
+        failures += not ok
+        print(f"[{'ok' if ok else 'FAIL'}] {description}: expects {index_name}")
+        if not ok:
+            for plan in plans:
+                for step in plan:
+                    print(f"        {step}")
+
+    if tmp is not None:
+        engine.dispose()
+        tmp.cleanup()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Query-plan snapshot check for app/crud/crud.py.
+
+Runs every crud read (and the lookup part of the upserts) against a seeded
+database, EXPLAINs each SELECT it issues and compares the plans with the
+committed snapshots in scripts/query_plans/<dialect>.json.
+
+    python scripts/check_query_plans.py            # compare, exit 1 on differences
+    python scripts/check_query_plans.py --update   # accept the current plans
+
+A difference that adds a full scan or a sort of users, user_skills or
+user_course_progress is reported as a REGRESSION; any other difference as
+CHANGED. Both fail until the snapshot is updated in the same change, so
+every plan change is visible in review.
+
+By default a throwaway SQLite database is migrated, seeded and ANALYZEd.
+The seed data is fixed and the baseline migration creates indexes in name
+order, so every run gets the same plans, index names included.
+``--database-url`` checks an existing, migrated (and seeded) MySQL database
+against scripts/query_plans/mysql.json instead.
+"""
+import argparse
+from datetime import datetime
+from itertools import islice
+import json
+import os
+import re
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_DIR = os.path.join(ROOT, "scripts", "query_plans")
+
+LARGE_TABLES = ("users", "user_skills", "user_course_progress")
+
+SEED_USERS = 500
+SEED_SKILLS = 40
+SEED_COURSES = 120
+# After every seeded assignment, so the lagging-progress report has rows
+REPORT_DATE = datetime(2100, 1, 1)
+# Small enough for a second keyset page
+PAGE_SIZE = 100
+
+
+def _user_relationships(crud, db):
+    user = crud.get_user(db, 7)
+    return user.project_role, list(user.user_skills), list(user.user_course_progress), list(user.user_learning_paths)
+
+
+def _recommendations(crud, db):
+    from app.services.recommendations import recommend
+    return recommend(db, crud.reference_data.get(), 2, 5)
+
+
+# name -> crud call; names are the snapshot keys
+CHECKS = {
+    "get_user_by_sso_id": lambda crud, db: crud.get_user_by_sso_id(db, "user00042"),
+    "get_user": lambda crud, db: crud.get_user(db, 42),
+    "get_user+relationships": _user_relationships,
+    "get_users": lambda crud, db: crud.get_users(db),
+    "get_users(search)": lambda crud, db: crud.get_users(db, search="user0004"),
+    "get_users(sort=last_name desc)": lambda crud, db: crud.get_users(db, sort_by="last_name", sort_order="desc"),
+    "count_users": lambda crud, db: crud.count_users(db),
+    "count_users(search)": lambda crud, db: crud.count_users(db, search="user0004"),
+    "get_users_by_project_role": lambda crud, db: crud.get_users_by_project_role(db, 2),
+    "get_skill": lambda crud, db: crud.get_skill(db, 7),
+    "get_skills": lambda crud, db: crud.get_skills(db),
+    "count_skills": lambda crud, db: crud.count_skills(db),
+    # by-name/by-id reference lookups are served from this snapshot load
+    "reference_data.refresh": lambda crud, db: crud.reference_data.refresh(),
+    "get_courses": lambda crud, db: crud.get_courses(db),
+    "get_course": lambda crud, db: crud.get_course(db, 5),
+    "count_courses": lambda crud, db: crud.count_courses(db),
+    "get_learning_paths_with_details": lambda crud, db: crud.get_learning_paths_with_details(db),
+    "get_learning_path_with_details": lambda crud, db: crud.get_learning_path_with_details(db, 2),
+    "count_learning_paths": lambda crud, db: crud.count_learning_paths(db),
+    "get_learning_path_courses": lambda crud, db: crud.get_learning_path_courses(db, 2),
+    "get_user_course_progress": lambda crud, db: crud.get_user_course_progress(db, 42),
+    "get_user_course_progress(status)": lambda crud, db: crud.get_user_course_progress(db, 42, status="Completed"),
+    "get_user_learning_path": lambda crud, db: crud.get_user_learning_path(db, 42, 2),
+    "upsert_user_skill": lambda crud, db: crud.upsert_user_skill(db, 42, 3, 4),
+    "iter_skill_gaps": lambda crud, db: list(crud.iter_skill_gaps(db)),
+    "iter_skill_gaps(role, mandatory)": lambda crud, db: list(crud.iter_skill_gaps(db, project_role_id=2, mandatory_only=True)),
+    "iter_skill_gaps(skill)": lambda crud, db: list(crud.iter_skill_gaps(db, skill_id=7)),
+    "iter_skill_gaps(next page)": lambda crud, db: list(islice(crud.iter_skill_gaps(db, batch_size=PAGE_SIZE), PAGE_SIZE + 1)),
+    "iter_lagging_progress": lambda crud, db: list(crud.iter_lagging_progress(db, REPORT_DATE)),
+    "iter_lagging_progress(path)": lambda crud, db: list(crud.iter_lagging_progress(db, REPORT_DATE, learning_path_id=2)),
+    "iter_lagging_progress(next page)": lambda crud, db: list(
+        islice(crud.iter_lagging_progress(db, REPORT_DATE, batch_size=PAGE_SIZE), PAGE_SIZE + 1)),
+    "get_compliance_by_designation": lambda crud, db: crud.get_compliance_by_designation(db),
+    "recommend(role)": _recommendations,
+}
+
+
+def seed(db, models):
+    """
+    Deterministic data set, large enough that the planner prefers indexes
+    wherever they apply.
+    """
+    for level in range(1, 6):
+        db.add(models.ProficiencyLevel(id=level, name=f"Level {level}", rank=level))
+    for role in range(1, 9):
+        db.add(models.ProjectRole(id=role, name=f"Role {role}"))
+    for skill in range(1, SEED_SKILLS + 1):
+        db.add(models.Skill(id=skill, name=f"Skill {skill}"))
+    db.flush()
+    for course in range(1, SEED_COURSES + 1):
+        db.add(models.Course(id=course, name=f"Course {course}", skill_id=course % SEED_SKILLS + 1,
+                             recommended_proficiency_level_id=course % 5 + 1, duration_hours=course % 20 + 1))
+    for path in range(1, 11):
+        db.add(models.LearningPath(id=path, name=f"Path {path}"))
+    for user in range(1, SEED_USERS + 1):
+        db.add(models.User(id=user, sso_id=f"user{user:05d}", email=f"user{user:05d}@example.com",
+                           first_name=f"First{user}", last_name=f"Last{user % 97}", hashed_password="-",
+                           role="Admin" if user == 1 else "Developer", current_project_role_id=user % 8 + 1))
+    db.flush()
+    for path in range(1, 11):
+        for order in range(1, 9):
+            db.add(models.LearningPathCourse(learning_path_id=path, course_id=(path * 8 + order) % SEED_COURSES + 1,
+                                             sequence_order=order))
+    for role in range(1, 9):
+        for offset in range(5):
+            db.add(models.RoleSkillRequirement(project_role_id=role, skill_id=(role * 5 + offset) % SEED_SKILLS + 1,
+                                               min_proficiency_level_id=offset % 5 + 1, is_mandatory=offset < 3))
+    statuses = ("Not Started", "In Progress", "Completed")
+    for user in range(1, SEED_USERS + 1):
+        for offset in range(8):
+            db.add(models.UserSkill(user_id=user, skill_id=(user + offset * 5) % SEED_SKILLS + 1,
+                                    proficiency_level_id=(user + offset) % 5 + 1))
+            db.add(models.UserCourseProgress(user_id=user, course_id=(user * 3 + offset * 7) % SEED_COURSES + 1,
+                                             status=statuses[(user + offset) % 3], progress_percentage=(user * offset) % 101))
+        db.add(models.UserLearningPath(user_id=user, learning_path_id=user % 10 + 1))
+    db.commit()
+
+
+def _normalize_sql(statement: str) -> str:
+    return re.sub(r"\s+", " ", statement).strip()[:200]
+
+
+def collect_plans(engine, session_factory, crud) -> dict:
+    from app.core.query_plans import capture_statements, explain
+
+    plans = {}
+    for name, call in CHECKS.items():
+        with session_factory() as db:
+            with capture_statements(engine) as statements:
+                call(crud, db)
+        with engine.connect() as connection:
+            plans[name] = [
+                {"sql": _normalize_sql(statement), "plan": explain(connection, statement, parameters)}
+                for statement, parameters in statements
+            ]
+    return plans
+
+
+def _risky_steps(entries) -> set:
+    from app.core.query_plans import full_scans, sorts_without_index
+
+    risky = set()
+    for entry in entries:
+        risky.update(full_scans(entry["plan"], LARGE_TABLES))
+        if sorts_without_index(entry["plan"]) and any(
+                re.search(rf"\b{table}\b", step) for step in entry["plan"] for table in LARGE_TABLES):
+            risky.add(f"sort: {entry['sql'][:80]}")
+    return risky
+
+
+def compare(current: dict, snapshot: dict) -> int:
+    failures = 0
+    for name, entries in current.items():
+        expected = snapshot.get(name)
+        if expected is None:
+            print(f"[NEW] {name}: no snapshot, run with --update")
+            failures += 1
+            continue
+        if [e["plan"] for e in entries] == [e["plan"] for e in expected]:
+            continue
+        failures += 1
+        introduced = _risky_steps(entries) - _risky_steps(expected)
+        print(f"[{'REGRESSION' if introduced else 'CHANGED'}] {name}")
+        for step in sorted(introduced):
+            print(f"    new full scan/sort: {step}")
+        for label, plan_entries in (("snapshot", expected), ("current", entries)):
+            print(f"  {label}:")
+            for entry in plan_entries:
+                print(f"    {entry['sql']}")
+                for step in entry["plan"]:
+                    print(f"      {step}")
+    for name in snapshot.keys() - current.keys():
+        print(f"[STALE] {name}: in the snapshot but no longer checked, run with --update")
+        failures += 1
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--update", action="store_true", help="Write the current plans to the snapshot file")
+    parser.add_argument("--database-url", help="Check an existing, migrated and seeded database")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp.name, 'plans.db')}"
+    os.environ.setdefault("SECRET_KEY", "check-query-plans")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    sys.path.insert(0, ROOT)
+
+    from sqlalchemy import text
+    from app.core.database import engine, SessionLocal
+    from app.core.migrations import upgrade
+    import app.crud.crud as crud
+    import app.models.models as models
+
+    if tmp is not None:
+        upgrade(engine)
+        with SessionLocal() as db:
+            seed(db, models)
+        with engine.begin() as connection:
+            connection.execute(text("ANALYZE"))
+        # Pooled connections keep the statistics they loaded before ANALYZE
+        engine.dispose()
+
+    current = collect_plans(engine, SessionLocal, crud)
+    snapshot_path = os.path.join(SNAPSHOT_DIR, f"{engine.dialect.name}.json")
+    engine.dispose()
+    if tmp is not None:
+        tmp.cleanup()
+
+    if args.update:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        with open(snapshot_path, "w") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Wrote {len(current)} plan snapshots to {os.path.relpath(snapshot_path, ROOT)}")
+        return
+
+    if not os.path.exists(snapshot_path):
+        print(f"No snapshot at {os.path.relpath(snapshot_path, ROOT)}, run with --update")
+        sys.exit(1)
+    with open(snapshot_path) as f:
+        snapshot = json.load(f)
+    failures = compare(current, snapshot)
+    print(f"{len(current)} crud checks, {failures} plan difference(s)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
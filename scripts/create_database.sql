@@ -21,6 +21,10 @@
 USE lmsdb;
 
 -- Drop Tables in reverse order of dependency to avoid foreign key constraints issues
+DROP TABLE IF EXISTS schema_migrations;
+DROP TABLE IF EXISTS skill_gaps;
+DROP TABLE IF EXISTS report_snapshots;
+DROP TABLE IF EXISTS revoked_tokens;
 DROP TABLE IF EXISTS user_course_progress;
 DROP TABLE IF EXISTS user_learning_paths;
 DROP TABLE IF EXISTS learning_path_courses;
@@ -40,7 +44,8 @@ DROP TABLE IF EXISTS skills;
 CREATE TABLE proficiency_levels (
     id INT AUTO_INCREMENT PRIMARY KEY,
     name VARCHAR(50) UNIQUE NOT NULL,
-    description TEXT
+    description TEXT,
+    `rank` INT NOT NULL -- Order of the levels, lowest first; ids are not in level order
 );
 
 --
@@ -75,7 +80,8 @@ CREATE TABLE users (
     current_project_role_id INT,
     date_joined DATETIME DEFAULT CURRENT_TIMESTAMP,
     last_login DATETIME ON UPDATE CURRENT_TIMESTAMP,
-    FOREIGN KEY (current_project_role_id) REFERENCES project_roles(id)
+    FOREIGN KEY (current_project_role_id) REFERENCES project_roles(id),
+    INDEX idx_users_current_project_role (current_project_role_id)
 );
 
 --
@@ -90,7 +96,8 @@ CREATE TABLE user_skills (
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (skill_id) REFERENCES skills(id) ON DELETE CASCADE,
     FOREIGN KEY (proficiency_level_id) REFERENCES proficiency_levels(id) ON DELETE CASCADE,
-    UNIQUE (user_id, skill_id) -- A user can only have one entry for a specific skill
+    UNIQUE (user_id, skill_id), -- A user can only have one entry for a specific skill
+    INDEX idx_user_skills_user_skill_level (user_id, skill_id, proficiency_level_id)
 );
 
 --
@@ -143,7 +150,8 @@ CREATE TABLE learning_path_courses (
     sequence_order INT NOT NULL,
     FOREIGN KEY (learning_path_id) REFERENCES learning_paths(id) ON DELETE CASCADE,
     FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
-    UNIQUE (learning_path_id, course_id) -- A course is part of a learning path once
+    UNIQUE (learning_path_id, course_id), -- A course is part of a learning path once
+    INDEX idx_learning_path_courses_path_order (learning_path_id, sequence_order, course_id)
 );
 
 --
@@ -160,7 +168,7 @@ CREATE TABLE user_learning_paths (
     is_registered_by_developer BOOLEAN NOT NULL DEFAULT FALSE,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (learning_path_id) REFERENCES learning_paths(id) ON DELETE CASCADE,
-    UNIQUE (user_id, learning_path_id) -- A user can be assigned/register for a learning path once
+    UNIQUE (user_id, learning_path_id) -- A user can be assigned/register for a learning path once; also serves (user_id, learning_path_id) lookups
 );
 
 --
@@ -176,7 +184,9 @@ CREATE TABLE user_course_progress (
     completion_date DATETIME,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
-    UNIQUE (user_id, course_id) -- A user has one progress entry per course
+    UNIQUE (user_id, course_id), -- A user has one progress entry per course
+    INDEX idx_user_course_progress_user_status (user_id, status, course_id),
+    INDEX idx_user_course_progress_course_user (course_id, user_id, status, progress_percentage)
 );
 
 --
@@ -191,22 +201,89 @@ CREATE TABLE audit_logs (
     FOREIGN KEY (admin_user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
+--
+-- Table structure for table `revoked_tokens`
+--
+CREATE TABLE revoked_tokens (
+    jti VARCHAR(64) PRIMARY KEY,
+    sso_id VARCHAR(255) NOT NULL,
+    expires_at DATETIME NOT NULL, -- UTC expiry of the revoked token; rows past it are purged
+    revoked_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_revoked_tokens_sso_id (sso_id),
+    INDEX idx_revoked_tokens_expires_at (expires_at)
+);
+
+--
+-- Table structure for table `skill_gaps`
+-- Materialized skill gap report, maintained by the application
+-- (`python -m app.core.skill_gaps rebuild` refills it).
+--
+CREATE TABLE skill_gaps (
+    user_id INT NOT NULL,
+    requirement_id INT NOT NULL, -- role_skill_requirements.id
+    project_role_id INT NOT NULL,
+    skill_id INT NOT NULL,
+    required_level_id INT NOT NULL,
+    current_level_id INT, -- NULL when the user does not have the skill
+    is_mandatory BOOLEAN NOT NULL,
+    gap BOOLEAN NOT NULL,
+    PRIMARY KEY (user_id, requirement_id),
+    INDEX idx_skill_gaps_gap_user_requirement (gap, user_id, requirement_id),
+    INDEX idx_skill_gaps_role_gap_user_requirement (project_role_id, gap, user_id, requirement_id),
+    INDEX idx_skill_gaps_skill_gap_user_requirement (skill_id, gap, user_id, requirement_id)
+);
+
+--
+-- Table structure for table `report_snapshots`
+-- Timestamped results of the precomputed admin reports
+--
+CREATE TABLE report_snapshots (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    report VARCHAR(100) NOT NULL,
+    computed_at DATETIME NOT NULL, -- UTC
+    payload TEXT NOT NULL, -- the report's JSON response
+    INDEX idx_report_snapshots_report_computed (report, computed_at)
+);
+
+--
+-- Table structure for table `schema_migrations`
+-- Versions of app/migrations already contained in this script; run
+-- `python -m app.core.migrations upgrade` for anything newer.
+--
+CREATE TABLE schema_migrations (
+    version INT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO schema_migrations (version, name) VALUES
+(1, 'baseline'),
+(2, 'access_path_indexes'),
+(3, 'skill_lookup_indexes'),
+(4, 'skill_gap_covering_index'),
+(5, 'skill_gaps_table'),
+(6, 'lagging_progress_index'),
+(7, 'report_snapshots'),
+(8, 'skill_gaps_keyset_indexes'),
+(9, 'progress_course_user_index'),
+(10, 'proficiency_level_rank');
+
 --
 -- Sample Data
 --
 
 -- Proficiency Levels (10 entries)
-INSERT INTO proficiency_levels (id, name, description) VALUES
-(1, 'Beginner', 'Basic understanding and limited practical experience.'),
-(2, 'Novice', 'Some theoretical knowledge, minimal practical application.'),
-(3, 'Intermediate', 'Solid understanding, capable of independent work on moderate tasks.'),
-(4, 'Proficient', 'Strong grasp, can handle complex tasks, mentor others.'),
-(5, 'Advanced', 'In-depth expertise, recognized as a subject matter expert.'),
-(6, 'Expert', 'Leading authority, innovates and sets standards.'),
-(7, 'Master', 'Exceptional, globally recognized thought leader.'),
-(8, 'Fundamental', 'Core concepts understood.'),
-(9, 'Working Knowledge', 'Can perform tasks with some guidance.'),
-(10, 'Highly Proficient', 'Can perform tasks efficiently and mentor peers.');
+INSERT INTO proficiency_levels (id, name, description, `rank`) VALUES
+(1, 'Beginner', 'Basic understanding and limited practical experience.', 1),
+(2, 'Novice', 'Some theoretical knowledge, minimal practical application.', 2),
+(3, 'Intermediate', 'Solid understanding, capable of independent work on moderate tasks.', 5),
+(4, 'Proficient', 'Strong grasp, can handle complex tasks, mentor others.', 6),
+(5, 'Advanced', 'In-depth expertise, recognized as a subject matter expert.', 8),
+(6, 'Expert', 'Leading authority, innovates and sets standards.', 9),
+(7, 'Master', 'Exceptional, globally recognized thought leader.', 10),
+(8, 'Fundamental', 'Core concepts understood.', 3),
+(9, 'Working Knowledge', 'Can perform tasks with some guidance.', 4),
+(10, 'Highly Proficient', 'Can perform tasks efficiently and mentor peers.', 7);
 
 -- Skills (Now 13 entries to include HTML, CSS, FastAPI)
 INSERT INTO skills (id, name, description) VALUES
@@ -413,3 +490,11 @@ INSERT INTO audit_logs (id, admin_user_id, action, details, timestamp) VALUES
 (9, (SELECT id FROM users WHERE sso_id = 'admin.user1'), 'Reviewed Compliance Report', '{"report_date": "2024-06-01", "overall_compliance": "70%"}', '2024-06-09 17:00:00'),
 (10, (SELECT id FROM users WHERE sso_id = 'admin.user2'), 'Adjusted User Skill', '{"user_id": 5, "skill_id": 2, "proficiency": "Expert"}', '2024-06-10 10:00:00');
 
+
+-- Skill Gaps (derived from the rows above, as app.core.skill_gaps computes them)
+INSERT INTO skill_gaps (user_id, requirement_id, project_role_id, skill_id, required_level_id, current_level_id, is_mandatory, gap)
+SELECT u.id, r.id, r.project_role_id, r.skill_id, r.min_proficiency_level_id, us.proficiency_level_id, r.is_mandatory,
+       COALESCE(us.proficiency_level_id, 0) < r.min_proficiency_level_id
+FROM users u
+JOIN role_skill_requirements r ON r.project_role_id = u.current_project_role_id
+LEFT JOIN user_skills us ON us.user_id = u.id AND us.skill_id = r.skill_id;